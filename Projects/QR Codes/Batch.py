@@ -0,0 +1,239 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import csv
+import os
+import unittest
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from GaloisField import GaloisField
+from Profiler import Profiler
+from QRCode import QRCode
+from ReedSolomon import ReedSolomon
+from Renderer import Renderer
+
+# WORKER FUNCTIONS #
+
+def _initialise_worker() -> None:
+    """Build the field and every Reed-Solomon generator table once per worker process."""
+
+    ReedSolomon(GaloisField.shared(0x11D, 0x100, 2)).precompute(QRCode.ERROR_CORRECTION_CODEWORDS.values())
+
+
+def _encode_chunk(chunk: list[str], error_correction: QRCode.ERROR_CORRECTIONS, profile: bool = False,
+                  errors: str = "raise") -> tuple[list[np.ndarray | ValueError], Profiler | None]:
+    """Encode a chunk of payloads in a worker process.
+
+    Returns:
+        list[np.ndarray | ValueError]: The module matrix of each payload, or with errors="return" the
+            error it could not be encoded with, in order.
+        Profiler | None: Stage measurements for the chunk, if profile is set.
+    """
+
+    profiler = Profiler() if profile else None
+    results = []
+
+    for data in chunk:
+        try:
+            results.append(QRCode(data, error_correction, profiler=profiler).modules)
+        except ValueError as error:
+            if errors == "raise":
+                raise
+            results.append(error)
+
+    return results, profiler
+
+# BATCH ENCODER CLASS #
+
+class BatchEncoder:
+
+    ERROR_POLICIES = ("raise", "return")
+
+    def __init__(self, error_correction: QRCode.ERROR_CORRECTIONS = QRCode.ERROR_CORRECTIONS.M,
+                 workers: int | None = None, chunk_size: int = 64, profiler: Profiler | None = None,
+                 errors: str = "raise"):
+        """Initialise a batch encoder that fans QR codes out over a process pool.
+
+        Args:
+            error_correction: The error correction level to use for every code
+            workers: Number of worker processes (optional, defaults to the CPU count)
+            chunk_size: Number of payloads sent to a worker at a time
+            profiler: Aggregates the stage measurements of every worker (optional)
+            errors: "raise" to stop at the first payload that cannot be encoded, or "return" to
+                yield its ValueError in its place and carry on with the rest
+        """
+
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        if errors not in self.ERROR_POLICIES:
+            raise ValueError(f"Unknown error policy {errors!r}, expected one of {', '.join(self.ERROR_POLICIES)}")
+
+        self.error_correction = error_correction
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.profiler = profiler
+        self.errors = errors
+
+    @staticmethod
+    def read_payloads(path: str | os.PathLike) -> Iterator[str]:
+        """Read payloads lazily from a file: the first column of a .csv file, otherwise one per line.
+
+        Empty lines and rows are skipped.
+
+        Args:
+            path: The file to read
+
+        Returns:
+            Iterator[str]: The payloads in file order.
+        """
+
+        with open(path, newline="", encoding="utf-8") as file:
+            if Path(path).suffix.lower() == ".csv":
+                for row in csv.reader(file):
+                    if row and row[0]:
+                        yield row[0]
+            else:
+                for line in file:
+                    line = line.rstrip("\r\n")
+                    if line:
+                        yield line
+
+    def _chunks(self, payloads: Iterable[str]) -> Iterator[list[str]]:
+        iterator = iter(payloads)
+        while chunk := list(islice(iterator, self.chunk_size)):
+            yield chunk
+
+    def encode(self, payloads: Iterable[str]) -> Iterator[np.ndarray | ValueError]:
+        """Encode payloads in parallel, yielding their module matrices in input order.
+
+        At most two chunks per worker are in flight at once, so arbitrarily long inputs
+        (e.g. a generator over a manifest file) stream through in bounded memory.
+
+        Args:
+            payloads: The data to encode, one QR code each
+
+        Returns:
+            Iterator[np.ndarray | ValueError]: The module matrix of each payload, or with the
+                "return" error policy the error of each payload that cannot be encoded.
+
+        Raises:
+            ValueError: If a payload cannot be encoded and the error policy is "raise".
+        """
+
+        with ProcessPoolExecutor(self.workers, initializer=_initialise_worker) as executor:
+            pending = deque()
+
+            for chunk in self._chunks(payloads):
+                pending.append(executor.submit(_encode_chunk, chunk, self.error_correction, self.profiler is not None,
+                                               self.errors))
+                if len(pending) >= 2 * self.workers:
+                    yield from self._collect(pending.popleft().result())
+
+            while pending:
+                yield from self._collect(pending.popleft().result())
+
+    def _collect(self, result: tuple[list[np.ndarray | ValueError], Profiler | None]) -> list[np.ndarray | ValueError]:
+        modules, profiler = result
+        if profiler is not None:
+            self.profiler.merge(profiler)
+        return modules
+
+    def encode_file(self, path: str | os.PathLike) -> Iterator[np.ndarray | ValueError]:
+        """Encode every payload in a CSV or newline-separated file.
+
+        Returns:
+            Iterator[np.ndarray | ValueError]: The module matrix (or error) of each payload, in file order.
+        """
+
+        return self.encode(self.read_payloads(path))
+
+    def render_file(self, path: str | os.PathLike, directory: str | os.PathLike, file_format: str = "svg",
+                    border: int = 4, scale: int = 1) -> Iterator[tuple[int, Path | ValueError]]:
+        """Encode every payload in a file and save each symbol as an image in a directory.
+
+        Images are named by the payload's position in the file, e.g. 000042.svg.
+
+        Args:
+            path: The CSV or newline-separated file of payloads
+            directory: The directory to write the images to, created if missing
+            file_format: One of "pbm", "png" or "svg"
+            border: Width of the quiet zone in modules
+            scale: Pixels per module for raster formats
+
+        Returns:
+            Iterator[tuple[int, Path | ValueError]]: The position of each payload with the path of its image,
+                or with the "return" error policy the error it could not be encoded with.
+        """
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for index, result in enumerate(self.encode_file(path)):
+            if isinstance(result, ValueError):
+                yield index, result
+                continue
+            image_path = directory / f"{index:06d}.{file_format}"
+            Renderer(result, border, scale).save(image_path)
+            yield index, image_path
+
+# BATCH ENCODER CLASS TESTS #
+
+class TestBatchEncoder(unittest.TestCase):
+
+    def test_encode_in_order(self):
+        payloads = [str(n) * (n % 40 + 1) for n in range(30)] + ["HELLO WORLD", "Hello, world!"]
+        encoder = BatchEncoder(QRCode.ERROR_CORRECTIONS.Q, workers=2, chunk_size=4)
+        for payload, modules in zip(payloads, encoder.encode(payloads), strict=True):
+            self.assertTrue(np.array_equal(modules, QRCode(payload, QRCode.ERROR_CORRECTIONS.Q).modules))
+
+    def test_profiler_aggregates_workers(self):
+        profiler = Profiler()
+        encoder = BatchEncoder(workers=2, chunk_size=3, profiler=profiler)
+        self.assertEqual(len(list(encoder.encode(str(n) for n in range(10)))), 10)
+        self.assertEqual(profiler.stages["masking"].calls, 10)
+
+    def test_error_policy(self):
+        payloads = ["A", "1" * 8000, "B"]
+        self.assertRaises(ValueError, list, BatchEncoder(workers=1, chunk_size=1).encode(payloads))
+
+        results = list(BatchEncoder(workers=2, chunk_size=1, errors="return").encode(payloads))
+        self.assertEqual(len(results), 3)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertTrue(np.array_equal(results[2], QRCode("B").modules))
+
+        self.assertRaises(ValueError, BatchEncoder, errors="ignore")
+
+    def test_render_file(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "payloads.txt"
+            path.write_text("SKU-1\n" + "1" * 8000 + "\nSKU-2\n", encoding="utf-8")
+
+            results = list(BatchEncoder(workers=1, errors="return").render_file(path, Path(directory) / "labels", "png"))
+            self.assertEqual([index for index, _ in results], [0, 1, 2])
+            self.assertIsInstance(results[1][1], ValueError)
+            self.assertEqual(results[2][1].read_bytes(), QRCode("SKU-2").render("png"))
+
+    def test_read_payloads(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            text_path = Path(directory) / "payloads.txt"
+            text_path.write_text("SKU-1\n\nSKU-2\r\n", encoding="utf-8")
+            csv_path = Path(directory) / "payloads.csv"
+            csv_path.write_text('"A,1",x\n\nB,y\n', encoding="utf-8")
+
+            self.assertEqual(list(BatchEncoder.read_payloads(text_path)), ["SKU-1", "SKU-2"])
+            self.assertEqual(list(BatchEncoder.read_payloads(csv_path)), ["A,1", "B"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import time
+import unittest
+from collections.abc import Callable, Iterable
+
+import numpy as np
+
+from QRCode import QRCode
+from Renderer import Renderer
+
+# BENCHMARK CLASS #
+
+class Benchmark:
+
+    STAGES = ("mode_detection", "codewords", "blocks", "reed_solomon", "interleaving", "placement", "masking",
+              "rendering", "verification")
+
+    PAYLOAD_CHARACTERS = {
+        QRCode.MODES.NUMERIC: "7",
+        QRCode.MODES.ALPHANUMERIC: "Q",
+        QRCode.MODES.BYTE: "q",
+        QRCode.MODES.KANJI: "茗",
+    }
+
+    def __init__(self, versions: Iterable[int] = range(1, 41),
+                 error_corrections: Iterable[QRCode.ERROR_CORRECTIONS] = tuple(QRCode.ERROR_CORRECTIONS),
+                 modes: Iterable[QRCode.MODES] = tuple(QRCode.MODES), repeat: int = 5, file_format: str = "png"):
+        """Initialise a benchmark sweep over the QR code pipeline.
+
+        Every (version, error correction, mode) case encodes a payload that fills the version
+        to capacity, and each pipeline stage is timed separately, keeping the best of repeat runs.
+
+        Args:
+            versions: QR code versions to sweep
+            error_corrections: Error correction levels to sweep
+            modes: Encoding modes to sweep
+            repeat: Number of runs per case, the fastest of which is reported
+            file_format: Image format used for the rendering stage
+        """
+
+        if repeat < 1:
+            raise ValueError("Repeat must be at least 1")
+
+        self.versions = tuple(versions)
+        self.error_corrections = tuple(error_corrections)
+        self.modes = tuple(modes)
+        self.repeat = repeat
+        self.file_format = file_format
+
+    @classmethod
+    def payload(cls, version: int, error_correction: QRCode.ERROR_CORRECTIONS, mode: QRCode.MODES) -> str:
+        """Return a single-mode payload that exactly fills a version at an error correction level.
+
+        Returns:
+            str: The payload.
+        """
+
+        return cls.PAYLOAD_CHARACTERS[mode] * QRCode.CAPACITIES[(version, error_correction.value, mode.value)]
+
+    def _stages(self, qr_code: QRCode, data: str,
+                error_correction: QRCode.ERROR_CORRECTIONS) -> list[tuple[str, Callable[[], None]]]:
+        """Return the pipeline stages of QRCode construction as separately timeable steps.
+
+        The steps run in order on an uninitialised QRCode, forcing each of its lazy stages in turn,
+        and leave it fully built. The last step reads the codewords back out of the symbol and
+        decodes them, as when verifying printed codes.
+        """
+
+        def mode_detection():
+            qr_code.__init__(data, error_correction, lazy=True)
+
+        def codewords():
+            qr_code.codewords
+
+        def blocks():
+            qr_code.blocks
+
+        def reed_solomon():
+            qr_code.error_correction_blocks
+
+        def interleaving():
+            qr_code.final_codewords
+
+        def placement():
+            qr_code.placed_modules
+
+        def masking():
+            qr_code.modules
+
+        def rendering():
+            Renderer(qr_code.modules).render(self.file_format)
+
+        def verification():
+            qr_code.verify()
+
+        return [(stage.__name__, stage) for stage in
+                (mode_detection, codewords, blocks, reed_solomon, interleaving, placement, masking, rendering,
+                 verification)]
+
+    def measure(self, data: str, error_correction: QRCode.ERROR_CORRECTIONS) -> dict[str, float]:
+        """Time each pipeline stage for one payload.
+
+        Returns:
+            dict[str, float]: Fastest time in seconds of each stage over the repeat runs.
+        """
+
+        best = dict.fromkeys(self.STAGES, float("inf"))
+
+        for _ in range(self.repeat):
+            qr_code = QRCode.__new__(QRCode)
+            for stage, run in self._stages(qr_code, data, error_correction):
+                start = time.perf_counter_ns()
+                run()
+                best[stage] = min(best[stage], (time.perf_counter_ns() - start) / 1e9)
+
+        return best
+
+    def run(self) -> dict:
+        """Run the sweep.
+
+        Returns:
+            dict: JSON-serialisable results, with environment details and one entry per case.
+        """
+
+        results = []
+        for version in self.versions:
+            for error_correction in self.error_corrections:
+                for mode in self.modes:
+                    data = self.payload(version, error_correction, mode)
+                    stages = self.measure(data, error_correction)
+                    results.append({
+                        "version": version,
+                        "error_correction": error_correction.name,
+                        "mode": mode.name,
+                        "length": len(data),
+                        "stages": stages,
+                        "total": sum(stages.values()),
+                    })
+
+        return {
+            "commit": self._git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": self.repeat,
+            "file_format": self.file_format,
+            "results": results,
+        }
+
+    def write(self, path: str | os.PathLike) -> dict:
+        """Run the sweep and write the results to a JSON file.
+
+        Returns:
+            dict: The results written.
+        """
+
+        results = self.run()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=1)
+        return results
+
+    @classmethod
+    def compare(cls, baseline: dict, current: dict) -> dict[str, float]:
+        """Compare two benchmark results over the cases they have in common.
+
+        Returns:
+            dict[str, float]: Ratio of current to baseline total time for each stage measured in both,
+                and over those stages, below 1 where current is faster.
+        """
+
+        def totals(results: dict) -> dict[tuple, dict]:
+            return {(case["version"], case["error_correction"], case["mode"]): case for case in results["results"]}
+
+        baseline_cases, current_cases = totals(baseline), totals(current)
+        common = baseline_cases.keys() & current_cases.keys()
+        if not common:
+            raise ValueError("The results have no cases in common")
+
+        ratios = {}
+        total_before = total_after = 0.0
+        for stage in cls.STAGES:
+            if any(stage not in cases[case]["stages"] for cases in (baseline_cases, current_cases) for case in common):
+                continue
+            before = sum(baseline_cases[case]["stages"][stage] for case in common)
+            after = sum(current_cases[case]["stages"][stage] for case in common)
+            ratios[stage] = after / before if before else float("nan")
+            total_before += before
+            total_after += after
+        ratios["total"] = total_after / total_before
+
+        return ratios
+
+    @staticmethod
+    def _git_commit() -> str | None:
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+# BENCHMARK CLASS TESTS #
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_payloads_fill_versions(self):
+        for version in (1, 9, 10, 26, 27, 40):
+            for error_correction in QRCode.ERROR_CORRECTIONS:
+                for mode in QRCode.MODES:
+                    qr_code = QRCode(Benchmark.payload(version, error_correction, mode), error_correction, lazy=True)
+                    self.assertEqual((qr_code.version, qr_code.mode), (version, mode))
+
+    def test_stages_build_the_code(self):
+        benchmark = Benchmark(repeat=1)
+        data = Benchmark.payload(7, QRCode.ERROR_CORRECTIONS.Q, QRCode.MODES.BYTE)
+        qr_code = QRCode.__new__(QRCode)
+        for _, run in benchmark._stages(qr_code, data, QRCode.ERROR_CORRECTIONS.Q):
+            run()
+        self.assertTrue(np.array_equal(qr_code.modules, QRCode(data, QRCode.ERROR_CORRECTIONS.Q).modules))
+
+    def test_run_and_compare(self):
+        benchmark = Benchmark(versions=(1, 2), error_corrections=(QRCode.ERROR_CORRECTIONS.L,), repeat=1)
+        results = json.loads(json.dumps(benchmark.run()))
+        self.assertEqual(len(results["results"]), 2 * len(QRCode.MODES))
+        self.assertEqual(set(results["results"][0]["stages"]), set(Benchmark.STAGES))
+
+        ratios = Benchmark.compare(results, results)
+        self.assertEqual(ratios["total"], 1.0)
+
+        for case in results["results"]:
+            del case["stages"]["verification"]
+        self.assertNotIn("verification", Benchmark.compare(results, json.loads(json.dumps(benchmark.run()))))
+
+
+if __name__ == '__main__':
+    unittest.main()
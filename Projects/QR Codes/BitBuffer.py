@@ -0,0 +1,153 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+# BIT BUFFER CLASS #
+
+class BitBuffer:
+
+    __slots__ = ("buffer", "_accumulator", "_bit_count")
+
+    def __init__(self):
+        """Initialise an empty, most-significant-bit-first bit writer.
+
+        Whole bytes are flushed into a bytearray as soon as they are complete; at most
+        seven pending bits are kept in an integer accumulator.
+        """
+
+        self.buffer = bytearray()
+        self._accumulator = 0
+        self._bit_count = 0
+
+    def append(self, value: int, length: int) -> None:
+        """Append the lowest length bits of value, most significant bit first.
+
+        Args:
+            value (int): Non-negative value to write; must fit in length bits.
+            length (int): Number of bits to write.
+        """
+
+        self._accumulator = (self._accumulator << length) | value
+        self._bit_count += length
+
+        if self._bit_count >= 8:
+            remaining = self._bit_count & 7
+            self.buffer += (self._accumulator >> remaining).to_bytes(self._bit_count >> 3, "big")
+            self._accumulator &= (1 << remaining) - 1
+            self._bit_count = remaining
+
+    def append_array(self, values: np.ndarray, length: int) -> None:
+        """Append every value of an integer array in length bits each, most significant bit first.
+
+        The values are expanded into one bit array and packed into bytes in bulk, behind any
+        pending bits, so long runs of fixed-width groups cost a few NumPy passes.
+
+        Args:
+            values (np.ndarray): One-dimensional array of non-negative values that fit in length bits.
+            length (int): Number of bits to write per value.
+        """
+
+        if not len(values):
+            return
+
+        shifts = np.arange(length - 1, -1, -1, dtype=np.uint16)
+        bits = ((values.astype(np.uint16, copy=False)[:, None] >> shifts) & 1).astype(np.uint8).ravel()
+
+        if self._bit_count:
+            pending = (self._accumulator >> np.arange(self._bit_count - 1, -1, -1)) & 1
+            bits = np.concatenate((np.asarray(pending, dtype=np.uint8), bits))
+
+        whole = len(bits) & ~7
+        self.buffer += np.packbits(bits[:whole]).tobytes()
+
+        self._bit_count = len(bits) - whole
+        self._accumulator = 0
+        for bit in bits[whole:].tolist():
+            self._accumulator = (self._accumulator << 1) | bit
+
+    def append_bytes(self, data: bytes | bytearray | memoryview) -> None:
+        """Append whole bytes.
+
+        They are copied straight into the buffer when it is byte aligned. Otherwise, as for a
+        byte mode segment behind its 12 or 20 bit header, they are shifted into place through one
+        integer conversion, which costs about the same as a vectorised shift even for a full
+        version 40 payload.
+
+        Args:
+            data (bytes | bytearray | memoryview): Bytes to write.
+        """
+
+        if self._bit_count == 0:
+            self.buffer += data
+        elif data:
+            self.append(int.from_bytes(data, "big"), 8 * len(data))
+
+    def pad_to_byte(self) -> None:
+        """Append zero bits up to the next byte boundary."""
+
+        if self._bit_count:
+            self.append(0, 8 - self._bit_count)
+
+    def __len__(self) -> int:
+        """Return the number of bits written.
+
+        Returns:
+            int: Number of bits written.
+        """
+
+        return 8 * len(self.buffer) + self._bit_count
+
+    def to_bytes(self) -> bytes:
+        """Return the written bits as bytes, zero padding any final partial byte.
+
+        Returns:
+            bytes: The buffer contents.
+        """
+
+        if self._bit_count:
+            return bytes(self.buffer) + bytes([(self._accumulator << (8 - self._bit_count)) & 0xFF])
+        return bytes(self.buffer)
+
+# BIT BUFFER CLASS TESTS #
+
+class TestBitBuffer(unittest.TestCase):
+
+    def test_append(self):
+        buffer = BitBuffer()
+        buffer.append(0b0010, 4)
+        buffer.append(11, 9)
+        buffer.append(779, 11)
+        self.assertEqual(len(buffer), 24)
+        self.assertEqual(buffer.to_bytes(), bytes([0b00100000, 0b01011011, 0b00001011]))
+
+    def test_append_array(self):
+        values = np.array([1023, 0, 777, 5, 512], dtype=np.uint16)
+        for prefix_length in range(8):
+            expected, actual = BitBuffer(), BitBuffer()
+            for buffer in (expected, actual):
+                buffer.append(0b1011011 >> (7 - prefix_length), prefix_length)
+            for value in values:
+                expected.append(int(value), 10)
+            actual.append_array(values, 10)
+            actual.append_array(values[:0], 10)
+            actual.append(3, 2)
+            expected.append(3, 2)
+            self.assertEqual(len(actual), len(expected))
+            self.assertEqual(actual.to_bytes(), expected.to_bytes())
+
+    def test_append_bytes_unaligned(self):
+        buffer = BitBuffer()
+        buffer.append(0b0100, 4)
+        buffer.append_bytes(b"\xAB\xCD")
+        buffer.append_bytes(b"")
+        self.assertEqual(len(buffer), 20)
+        buffer.pad_to_byte()
+        self.assertEqual(buffer.to_bytes(), b"\x4A\xBC\xD0")
+
+
+if __name__ == '__main__':
+    unittest.main()
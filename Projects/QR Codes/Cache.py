@@ -0,0 +1,228 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from pathlib import Path
+
+from QRCode import QRCode
+
+# QR CODE CACHE CLASS #
+
+class QRCodeCache:
+
+    def __init__(self, directory: str | os.PathLike | None = None, max_memory_bytes: int = 64 << 20,
+                 border: int = 4, scale: int = 1):
+        """Initialise a content-addressed cache of rendered QR codes.
+
+        Rendered images are kept in an in-memory LRU tier bounded by total size and, when a
+        directory is given, in an on-disk tier of one file per key. Disk errors are never fatal:
+        an unreadable file is a miss and an image that cannot be written is not persisted.
+
+        Args:
+            directory: Directory for the on-disk tier (optional, memory only if not given)
+            max_memory_bytes: Upper bound on the total size of images held in memory
+            border: Width of the quiet zone in modules
+            scale: Pixels per module for raster formats
+        """
+
+        if max_memory_bytes < 0:
+            raise ValueError("Memory bound must be non-negative")
+
+        self.directory = Path(directory) if directory is not None else None
+        self.max_memory_bytes = max_memory_bytes
+        self.border = border
+        self.scale = scale
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def hits(self) -> int:
+        """Return the number of lookups answered by either tier.
+
+        Returns:
+            int: Memory and disk hits combined.
+        """
+
+        return self.memory_hits + self.disk_hits
+
+    def key(self, data: str | bytes | bytearray | memoryview,
+            error_correction: QRCode.ERROR_CORRECTIONS = QRCode.ERROR_CORRECTIONS.M, version: int | None = None,
+            mask: int | None = None, file_format: str = "svg", eci: int | None = None) -> str:
+        """Return the content address of a rendered QR code.
+
+        Text and bytes are keyed apart, since text may be encoded in other modes than byte mode.
+
+        Returns:
+            str: Hex SHA-256 digest of the data and every option that affects the output.
+        """
+
+        digest = hashlib.sha256()
+        digest.update(b"%s\0%r\0%r\0%s\0%d\0%d\0%r\0" % (error_correction.name.encode(), version, mask,
+                                                      file_format.lower().encode(), self.border, self.scale, eci))
+        if isinstance(data, str):
+            digest.update(b"s" + data.encode("utf-8"))
+        else:
+            digest.update(b"b")
+            digest.update(data.tobytes() if isinstance(data, memoryview) and not data.c_contiguous else data)
+        return digest.hexdigest()
+
+    def get(self, data: str | bytes | bytearray | memoryview,
+            error_correction: QRCode.ERROR_CORRECTIONS = QRCode.ERROR_CORRECTIONS.M, version: int | None = None,
+            mask: int | None = None, file_format: str = "svg", eci: int | None = None) -> bytes:
+        """Return a rendered QR code, encoding it only if neither tier holds it.
+
+        Args:
+            data: The data to encode in the QR code
+            error_correction: The error correction level to use
+            version: The QR code version to use (optional)
+            mask: The mask pattern to apply (optional)
+            file_format: One of "pbm", "png" or "svg"
+            eci: Extended Channel Interpretation designator (optional)
+
+        Returns:
+            bytes: The encoded image.
+        """
+
+        key = self.key(data, error_correction, version, mask, file_format, eci)
+
+        image = self._memory.get(key)
+        if image is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return image
+
+        image = self._read_disk(key)
+        if image is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            image = QRCode(data, error_correction, version, mask, eci=eci).render(file_format, self.border, self.scale)
+            self._write_disk(key, image)
+
+        self._remember(key, image)
+        return image
+
+    def clear(self) -> None:
+        """Empty the in-memory tier and reset the counters, leaving the on-disk tier intact."""
+
+        self._memory.clear()
+        self._memory_bytes = 0
+        self.memory_hits = self.disk_hits = self.misses = 0
+
+    def _remember(self, key: str, image: bytes) -> None:
+        if len(image) > self.max_memory_bytes:
+            return
+
+        self._memory[key] = image
+        self._memory_bytes += len(image)
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _read_disk(self, key: str) -> bytes | None:
+        """Read an image from the on-disk tier; any failure to read it counts as a miss."""
+
+        if self.directory is None:
+            return None
+
+        try:
+            with open(self._path(key), "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, image: bytes) -> None:
+        """Persist an image to the on-disk tier, skipping it if the disk cannot be written."""
+
+        if self.directory is None:
+            return
+
+        path = self._path(key)
+        temporary_path = None
+
+        # Write to a temporary file first so concurrent readers never see a partial image
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(image)
+            os.replace(temporary_path, path)
+        except OSError:
+            if temporary_path is not None:
+                try:
+                    os.unlink(temporary_path)
+                except OSError:
+                    pass
+
+# QR CODE CACHE CLASS TESTS #
+
+class TestQRCodeCache(unittest.TestCase):
+
+    def test_memory_tier(self):
+        cache = QRCodeCache()
+        image = cache.get("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q, file_format="png")
+        self.assertEqual(image, QRCode("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q).render("png"))
+        self.assertIs(cache.get("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q, file_format="png"), image)
+        self.assertEqual((cache.memory_hits, cache.disk_hits, cache.misses), (1, 0, 1))
+
+        cache.get("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q, file_format="svg")
+        cache.get("HELLO WORLD", QRCode.ERROR_CORRECTIONS.H, file_format="png")
+        cache.get(b"HELLO WORLD", QRCode.ERROR_CORRECTIONS.H, file_format="png")
+        cache.get(memoryview(b"HELLO WORLD"), QRCode.ERROR_CORRECTIONS.H, file_format="png")
+        cache.get(memoryview(b"HHEELLLLOO  WWOORRLLDD")[::2], QRCode.ERROR_CORRECTIONS.H, file_format="png")
+        self.assertEqual((cache.memory_hits, cache.misses), (3, 4))
+
+    def test_memory_bound_evicts_least_recently_used(self):
+        size = len(QRCodeCache().get("1", file_format="pbm"))
+        cache = QRCodeCache(max_memory_bytes=2 * size)
+        cache.get("1", file_format="pbm")
+        cache.get("2", file_format="pbm")
+        cache.get("1", file_format="pbm")
+        cache.get("3", file_format="pbm")
+        cache.get("1", file_format="pbm")
+        cache.get("2", file_format="pbm")
+        self.assertEqual((cache.memory_hits, cache.misses), (2, 4))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            image = QRCodeCache(directory).get("https://example.com", file_format="svg")
+
+            cache = QRCodeCache(directory)
+            self.assertEqual(cache.get("https://example.com", file_format="svg"), image)
+            self.assertEqual(cache.get("https://example.com", file_format="svg"), image)
+            self.assertEqual((cache.memory_hits, cache.disk_hits, cache.misses), (1, 1, 0))
+            self.assertEqual(cache.hits, 2)
+
+    def test_disk_errors_are_misses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = QRCodeCache(Path(directory) / "cache")
+            key = cache.key("HELLO WORLD")
+            cache._path(key).mkdir(parents=True)
+            (Path(directory) / "cache" / key[:2] / "stale.tmp").touch()
+
+            image = cache.get("HELLO WORLD")
+            self.assertEqual(image, QRCode("HELLO WORLD").render("svg"))
+            self.assertEqual(cache.misses, 1)
+            self.assertEqual(sorted(path.name for path in cache._path(key).parent.iterdir()), [key, "stale.tmp"])
+
+            blocked = Path(directory) / "blocked"
+            blocked.touch()
+            self.assertEqual(QRCodeCache(blocked).get("HELLO WORLD"), image)
+
+
+if __name__ == '__main__':
+    unittest.main()
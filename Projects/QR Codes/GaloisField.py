@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import unittest
+from array import array
 
 # GALOIS FIELD ELEMENT CLASS #
 
@@ -13,70 +14,430 @@ class GaloisFieldElement:
         "5": "⁵", "6": "⁶", "7": "⁷", "8": "⁸", "9": "⁹"
     }
 
-    def __init__(self, real_value: int = 0, log_value: int = 0, field: GaloisField = None):
+    __slots__ = ("value", "galois_field")
 
-        self.real_value = real_value
-        self.log_value = log_value
+    def __init__(self, value: int = 0, galois_field: GaloisField = None):
+        """Initialise a GaloisFieldElement object wrapping an integer field value.
 
-        self.field = field
+        Args:
+            value (int): Value of the Galois Field element (not its logarithm).
+            galois_field (GaloisField): GaloisField object.
+        """
 
-    def __add__(self, other: GaloisFieldElement) -> GaloisFieldElement:
+        self.value = value
+        self.galois_field = galois_field
 
-        return GaloisFieldElement(self.real_value + other.real_value, self.log_value ^ other.log_value, self.field)
+    def __add__(self, other: GaloisFieldElement | int) -> GaloisFieldElement:
+        """Add two numbers in GF(prime).
+
+        Returns:
+            GaloisFieldElement: Result of adding two numbers in GF(prime).
+        """
+
+        return GaloisFieldElement(self.galois_field.add(self.value, int(other)), self.galois_field)
 
     __sub__ = __add__
     __radd__ = __add__
+    __rsub__ = __add__
+
+    def __mul__(self, other: GaloisFieldElement | int) -> GaloisFieldElement:
+        """Multiply two numbers in GF(prime).
 
-    def __mul__(self, other: GaloisFieldElement) -> GaloisFieldElement:
+        Returns:
+            GaloisFieldElement: Result of multiplying two numbers in GF(prime).
+        """
 
-        return GaloisFieldElement(self.real_value * other.real_value, (self.log_value + other.log_value) % self.field.size, self.field)
+        return GaloisFieldElement(self.galois_field.mul(self.value, int(other)), self.galois_field)
 
     __rmul__ = __mul__
 
-    def __abs__(self) -> int:
+    def __truediv__(self, other: GaloisFieldElement | int) -> GaloisFieldElement:
+        """Divide two numbers in GF(prime).
+
+        Returns:
+            GaloisFieldElement: Result of dividing two numbers in GF(prime).
+        """
 
-        return abs(self.real_value)
+        return GaloisFieldElement(self.galois_field.div(self.value, int(other)), self.galois_field)
 
-    def __eq__(self, other: GaloisFieldElement | float | int) -> bool:
+    def __pow__(self, exponent: int) -> GaloisFieldElement:
+        """Raise a number in GF(prime) to an integer power.
 
-        return self.real_value == (other.real_value if isinstance(other, GaloisFieldElement) else other)
+        Returns:
+            GaloisFieldElement: Result of the exponentiation in GF(prime).
+        """
 
-    def __ne__(self, other: GaloisFieldElement | float | int) -> bool:
+        return GaloisFieldElement(self.galois_field.pow(self.value, exponent), self.galois_field)
 
-        return self.real_value != (other.real_value if isinstance(other, GaloisFieldElement) else other)
+    def inv(self) -> GaloisFieldElement:
+        """Return the multiplicative inverse in GF(prime).
 
-    def __lt__(self, other: GaloisFieldElement | float | int) -> bool:
+        Returns:
+            GaloisFieldElement: Multiplicative inverse of the element.
+        """
 
-        return self.real_value < (other.real_value if isinstance(other, GaloisFieldElement) else other)
+        return GaloisFieldElement(self.galois_field.inv(self.value), self.galois_field)
 
-    def __le__(self, other: GaloisFieldElement | float | int) -> bool:
+    def __int__(self) -> int:
+        return self.value
 
-        return self.real_value <= (other.real_value if isinstance(other, GaloisFieldElement) else other)
+    __index__ = __int__
 
-    def __gt__(self, other: GaloisFieldElement | float | int) -> bool:
+    def __abs__(self) -> int:
+        return self.value
 
-        return self.real_value > (other.real_value if isinstance(other, GaloisFieldElement) else other)
+    def __eq__(self, other: GaloisFieldElement | int) -> bool:
+        return self.value == int(other)
 
-    def __ge__(self, other: GaloisFieldElement | float | int) -> bool:
+    def __ne__(self, other: GaloisFieldElement | int) -> bool:
+        return self.value != int(other)
 
-        return self.real_value >= (other.real_value if isinstance(other, GaloisFieldElement) else other)
+    def __hash__(self) -> int:
+        return hash(self.value)
 
     def __str__(self) -> str:
+        """Return the element written as a power of the generator, e.g. a²⁵.
 
-        return 'a' + ''.join([self.EXPONENTIAL_STRINGS[n] for n in str(self.log_value - 1)])
+        Returns:
+            str: A string representation of the GaloisFieldElement object.
+        """
+
+        if self.value == 0:
+            return "0"
+
+        return 'a' + ''.join([self.EXPONENTIAL_STRINGS[n] for n in str(self.galois_field.log[self.value])])
 
 # GALOIS FIELD CLASS #
 
 class GaloisField:
 
-    def __init__(self, prime: int = 0x11B, size: int = 0x100, generator: int = 2):
+    INSTANCES = {}
+
+    def __init__(self, prime: int = 0x11D, size: int = 0x100, generator: int = 2, full_table: bool = False):
+        """Initialise a GaloisField object with a given prime, size and generator.
+
+        The exponential table is stored twice over so that a product only needs
+        exp[log[a] + log[b]] without reducing the exponent modulo the field order.
+
+        With full_table set, the whole size x size product table is also built and
+        each of its rows is exposed as a translate table for scaling byte vectors.
+
+        Fields are immutable once built. Use shared to get the process-wide instance for a
+        (prime, size, generator) rather than building the tables again.
+
+        Args:
+            prime (int): Irreducible polynomial of the Galois Field.
+            size (int): Size of the Galois Field.
+            generator (int): Primitive element (commonly 2).
+            full_table (bool): Precompute the full multiplication table.
+
+        Raises:
+            ValueError: If the generator is not primitive for the given prime, or a full
+                table is requested for a field larger than 0x100.
+        """
+
+        self._set_parameters(prime, size, generator)
+
+        exp, log = self._generate_exp_log_tables()
+
+        mul_table = None
+        if full_table:
+            if self.size != 0x100:
+                raise ValueError("Full multiplication tables are only supported for GF(2^8)")
+            mul_table = self._generate_mul_table(exp, log)
+
+        self._set_tables(exp, log, mul_table)
+
+    @classmethod
+    def shared(cls, prime: int = 0x11D, size: int = 0x100, generator: int = 2,
+               full_table: bool = False) -> GaloisField:
+        """Return the process-wide field for a prime, size and generator, building it on first use.
+
+        Args:
+            prime (int): Irreducible polynomial of the Galois Field.
+            size (int): Size of the Galois Field.
+            generator (int): Primitive element (commonly 2).
+            full_table (bool): Ensure the shared field has the full multiplication table.
+
+        Returns:
+            GaloisField: The shared, immutable field.
+        """
+
+        galois_field = cls.INSTANCES.get((prime, size, generator))
+        if galois_field is None or (full_table and galois_field.mul_table is None):
+            galois_field = cls.INSTANCES[(prime, size, generator)] = cls(prime, size, generator, full_table)
+        return galois_field
 
+    @classmethod
+    def _restore(cls, prime: int, size: int, generator: int, exp: bytes | array, log: bytes | array,
+                 mul_table: bytes | None) -> GaloisField:
+        """Unpickle a field into the shared instance, reusing the pickled tables if there is none yet."""
+
+        galois_field = cls.INSTANCES.get((prime, size, generator))
+        if galois_field is None or (mul_table is not None and galois_field.mul_table is None):
+            galois_field = cls.__new__(cls)
+            galois_field._set_parameters(prime, size, generator)
+            galois_field._set_tables(exp, log, memoryview(mul_table) if mul_table is not None else None)
+            cls.INSTANCES[(prime, size, generator)] = galois_field
+        return galois_field
+
+    def _set_parameters(self, prime: int, size: int, generator: int) -> None:
         self.prime = prime
         self.size = size
         self.generator = generator
 
-        self.n = self.size.bit_length()
+        self.n = self.size.bit_length() - 1
+        self.order = self.size - 1
+
+    def _set_tables(self, exp: bytes | array, log: bytes | array, mul_table: memoryview | None) -> None:
+        """Attach the lookup tables and freeze the field."""
+
+        self.exp, self.log = exp, log
+
+        self.mul_table = mul_table
+        self.mul_rows = None
+
+        if mul_table is not None:
+            self.mul_rows = [mul_table[row:row + self.size] for row in range(0, len(mul_table), self.size)]
+            self.mul = self._mul_full_table
+
+        self._frozen = True
+
+    def __setattr__(self, name: str, value) -> None:
+        if getattr(self, "_frozen", False):
+            raise AttributeError("GaloisField objects are immutable")
+        object.__setattr__(self, name, value)
+
+    def __reduce__(self) -> tuple:
+        """Pickle the field with its tables, so unpickling (e.g. in a pool worker) never rebuilds them."""
+
+        mul_table = bytes(self.mul_table) if self.mul_table is not None else None
+        return GaloisField._restore, (self.prime, self.size, self.generator, self.exp, self.log, mul_table)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GaloisField):
+            return NotImplemented
+        return (self.prime, self.size, self.generator) == (other.prime, other.size, other.generator)
+
+    def __hash__(self) -> int:
+        return hash((self.prime, self.size, self.generator))
+
+    def _galois_field_multiplication(self, a: int, b: int) -> int:
+        """Multiply two numbers in GF(prime) by carry-less multiplication.
+
+        Only used to build the tables; use mul for arithmetic.
+        """
+
+        result = 0
+
+        while b:
+            if b & 1:
+                result ^= a
+            a <<= 1
+            if a & self.size:
+                a ^= self.prime
+            b >>= 1
+
+        return result
+
+    def _generate_exp_log_tables(self) -> tuple[bytes | array, bytes | array]:
+        """Generate the exponential (antilog) and logarithm tables for GF(prime).
+
+        Returns:
+            tuple: Doubled exponential table of length 2 * order and logarithm table of length size.
+
+        Raises:
+            ValueError: If the generator is not primitive for the given prime.
+        """
+
+        exp_table = [0] * (2 * self.order)
+        log_table = [0] * self.size
+
+        current = 1
+        for power in range(self.order):
+            if power and current == 1:
+                raise ValueError("Generator is not primitive for the given prime")
+            exp_table[power] = current
+            log_table[current] = power
+            current = self._galois_field_multiplication(current, self.generator)
+
+        exp_table[self.order:] = exp_table[:self.order]
+
+        if self.size <= 0x100:
+            return bytes(exp_table), bytes(log_table)
+        return array('H', exp_table), array('H', log_table)
+
+    def _generate_mul_table(self, exp: bytes, log: bytes) -> memoryview:
+        """Generate the full multiplication table, row-major so that a * b is at (a << n) | b.
+
+        Returns:
+            memoryview: Read-only view over the size * size product table.
+        """
+
+        table = bytearray(self.size * self.size)
+
+        for a in range(1, self.size):
+            log_a = log[a]
+            row = a << self.n
+            table[row + 1:row + self.size] = bytes(exp[log_a + log[b]] for b in range(1, self.size))
+
+        return memoryview(bytes(table))
+
+    def _mul_full_table(self, a: int, b: int) -> int:
+        """Multiply two numbers in GF(prime) with a single lookup in the full table."""
+
+        return self.mul_table[(a << self.n) | b]
+
+    def mul_row(self, constant: int) -> bytes | memoryview:
+        """Return the 256-entry translate table mapping each byte x to constant * x.
+
+        Args:
+            constant (int): Constant to multiply by.
+
+        Returns:
+            bytes | memoryview: Translate table for bytes.translate.
+        """
+
+        if self.mul_rows is not None:
+            return self.mul_rows[constant]
+
+        if constant == 0:
+            return bytes(self.size)
+
+        exp, log_c = self.exp, self.log[constant]
+        return bytes([0]) + bytes(exp[log_c + log_x] for log_x in self.log[1:])
+
+    def scale(self, data: bytes | bytearray, constant: int) -> bytes | bytearray:
+        """Multiply every byte of a vector by a constant in GF(prime).
+
+        Args:
+            data (bytes | bytearray): Vector of field elements.
+            constant (int): Constant to multiply by.
+
+        Returns:
+            bytes | bytearray: The scaled vector, of the same type as data.
+        """
+
+        return data.translate(self.mul_row(constant))
+
+    def add(self, a: int, b: int) -> int:
+        """Add (or subtract) two numbers in GF(prime)."""
+
+        return a ^ b
+
+    sub = add
+
+    def mul(self, a: int, b: int) -> int:
+        """Multiply two numbers in GF(prime)."""
+
+        if a == 0 or b == 0:
+            return 0
+        return self.exp[self.log[a] + self.log[b]]
+
+    def div(self, a: int, b: int) -> int:
+        """Divide two numbers in GF(prime).
+
+        Raises:
+            ZeroDivisionError: If b is zero.
+        """
+
+        if b == 0:
+            raise ZeroDivisionError("Cannot divide by 0 in a Galois Field")
+        if a == 0:
+            return 0
+        return self.exp[self.log[a] + self.order - self.log[b]]
+
+    def inv(self, a: int) -> int:
+        """Return multiplicative inverse of a in GF(prime).
+
+        Raises:
+            ZeroDivisionError: If a is zero.
+        """
+
+        if a == 0:
+            raise ZeroDivisionError("Cannot find multiplicative inverse of 0")
+        return self.exp[self.order - self.log[a]]
+
+    def pow(self, a: int, exponent: int) -> int:
+        """Raise a to an integer power in GF(prime).
+
+        Raises:
+            ZeroDivisionError: If a is zero and the exponent is negative.
+        """
+
+        if a == 0:
+            if exponent < 0:
+                raise ZeroDivisionError("Cannot raise 0 to a negative power")
+            return 0 if exponent else 1
+        return self.exp[(self.log[a] * exponent) % self.order]
+
+# GALOIS FIELD CLASS TESTS #
+
+class TestGaloisField(unittest.TestCase):
+
+    def setUp(self):
+        self.gf = GaloisField(0x11D, 0x100, 2)
+
+    def test_tables(self):
+        self.assertEqual(len(self.gf.exp), 2 * 255)
+        self.assertEqual(self.gf.exp[:8], bytes([1, 2, 4, 8, 16, 32, 64, 128]))
+        self.assertEqual(self.gf.exp[8], 0x1D)
+        self.assertEqual(self.gf.exp[25], 3)
+        for value in range(1, 256):
+            self.assertEqual(self.gf.exp[self.gf.log[value]], value)
+
+    def test_mul_matches_carry_less_multiplication(self):
+        for a in range(0, 256, 7):
+            for b in range(256):
+                self.assertEqual(self.gf.mul(a, b), self.gf._galois_field_multiplication(a, b))
+
+    def test_div_inv_pow(self):
+        for a in range(1, 256):
+            self.assertEqual(self.gf.mul(a, self.gf.inv(a)), 1)
+            self.assertEqual(self.gf.div(self.gf.mul(a, 29), 29), a)
+            self.assertEqual(self.gf.pow(a, 3), self.gf.mul(a, self.gf.mul(a, a)))
+            self.assertEqual(self.gf.pow(a, -1), self.gf.inv(a))
+        self.assertRaises(ZeroDivisionError, self.gf.inv, 0)
+        self.assertRaises(ZeroDivisionError, self.gf.div, 5, 0)
+
+    def test_full_table(self):
+        gf = GaloisField(0x11D, 0x100, 2, full_table=True)
+        self.assertEqual(len(gf.mul_table), 0x10000)
+        for a in range(0, 256, 5):
+            for b in range(256):
+                self.assertEqual(gf.mul(a, b), self.gf.mul(a, b))
+
+        data = bytes(range(256))
+        for constant in (0, 1, 2, 29, 255):
+            expected = bytes(self.gf.mul(constant, x) for x in data)
+            self.assertEqual(gf.scale(data, constant), expected)
+            self.assertEqual(self.gf.scale(data, constant), expected)
+
+        self.assertRaises(ValueError, GaloisField, 0x13, 0x10, 2, True)
+
+    def test_shared(self):
+        import pickle
+
+        gf = GaloisField.shared(0x11D, 0x100, 2)
+        self.assertIs(GaloisField.shared(), gf)
+        self.assertEqual(gf, self.gf)
+        self.assertRaises(AttributeError, setattr, gf, "exp", b"")
 
-        self.log_table = self._generate_log_table()
-        print([(v.real_value, v.log_value) for v in self.log_table])
+        self.assertIs(pickle.loads(pickle.dumps(gf)), gf)
 
+        field = GaloisField(0x13, 0x10, 2)
+        GaloisField.INSTANCES.pop((0x13, 0x10, 2), None)
+        restored = pickle.loads(pickle.dumps(field))
+        self.assertIs(restored, GaloisField.shared(0x13, 0x10, 2))
+        self.assertEqual((restored.exp, restored.log), (field.exp, field.log))
+
+        full = pickle.loads(pickle.dumps(GaloisField(0x11D, 0x100, 2, full_table=True)))
+        self.assertIs(GaloisField.shared(full_table=True), full)
+        self.assertEqual(full.mul(29, 76), self.gf.mul(29, 76))
+
+    def test_non_primitive_generator(self):
+        self.assertRaises(ValueError, GaloisField, 0x11B, 0x100, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
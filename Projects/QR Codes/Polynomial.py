@@ -3,6 +3,9 @@
 from __future__ import annotations
 
 import unittest
+from functools import lru_cache
+
+import numpy as np
 
 # POLYNOMIAL CLASS #
 
@@ -62,8 +65,6 @@ class Polynomial:
             Polynomial: Result of multiplying two polynomials or polynomial by scalar.
         """
 
-        print(self, other, sep="  ########  ")
-
         if isinstance(other, Polynomial):
             result = [0] * (self.degree + other.degree - 1)
             for i in range(self.degree):
@@ -157,6 +158,184 @@ class Polynomial:
 
         return out or "0"
     
+# GALOIS POLYNOMIAL CLASS #
+
+@lru_cache(maxsize=None)
+def _field_tables(galois_field: GaloisField) -> tuple[np.ndarray, np.ndarray]:
+    """Build NumPy exp/log lookup tables for a field that multiply without branching on zero.
+
+    The log of 0 is mapped past the end of the doubled exponential table into a run of
+    zeros, so exp[log[a] + log[b]] is 0 whenever either operand is 0.
+
+    Returns:
+        tuple: Extended exponential table (uint8) and logarithm table (intp).
+    """
+
+    order = galois_field.order
+    exp = np.zeros(4 * order + 2, dtype=np.uint8)
+    exp[:2 * order] = np.frombuffer(bytes(galois_field.exp), dtype=np.uint8)
+
+    log = np.frombuffer(bytes(galois_field.log), dtype=np.uint8).astype(np.intp)
+    log[0] = 2 * order
+
+    return exp, log
+
+
+class GaloisPolynomial:
+
+    def __init__(self, coefficients, galois_field: GaloisField):
+        """Initialise a polynomial over GF(2^8) backed by a uint8 array.
+
+        Coefficients are stored lowest degree first, like Polynomial. A 2-D array holds a
+        batch of polynomials, one per row, which are all operated on at once.
+
+        Args:
+            coefficients (array_like): Coefficient values, shape (length,) or (batch, length).
+            galois_field (GaloisField): Field the coefficients belong to.
+
+        Raises:
+            ValueError: If coefficients None or empty
+        """
+
+        if coefficients is None or len(coefficients) == 0:
+            raise ValueError("Coefficients must be provided")
+
+        self.coefficients = np.asarray(coefficients, dtype=np.uint8)
+        self.galois_field = galois_field
+        self.exp, self.log = _field_tables(galois_field)
+
+    @property
+    def degree(self) -> int:
+        """Number of coefficients, matching Polynomial.degree."""
+
+        return self.coefficients.shape[-1]
+
+    def _mul(self, a: np.ndarray, b: np.ndarray | int) -> np.ndarray:
+        """Multiply arrays of field elements elementwise (with broadcasting)."""
+
+        return self.exp[self.log[a] + self.log[b]]
+
+    def __add__(self, other: GaloisPolynomial) -> GaloisPolynomial:
+        """Add two polynomials (or batches) together by XOR.
+
+        Returns:
+            GaloisPolynomial: Result of adding two polynomials.
+        """
+
+        a, b = self.coefficients, other.coefficients
+        length = max(a.shape[-1], b.shape[-1])
+        result = np.zeros(np.broadcast_shapes(a.shape[:-1], b.shape[:-1]) + (length,), dtype=np.uint8)
+        result[..., :a.shape[-1]] ^= a
+        result[..., :b.shape[-1]] ^= b
+
+        return GaloisPolynomial(result, self.galois_field)
+
+    __sub__ = __add__
+
+    def __mul__(self, other: GaloisPolynomial | int) -> GaloisPolynomial:
+        """Multiply by another polynomial (or batch) or by a constant field element.
+
+        The product is accumulated one coefficient of the shorter operand at a time, each
+        step scaling and XOR-ing a whole shifted row of the other operand.
+
+        Returns:
+            GaloisPolynomial: Result of the multiplication.
+        """
+
+        if not isinstance(other, GaloisPolynomial):
+            return GaloisPolynomial(self._mul(self.coefficients, int(other)), self.galois_field)
+
+        a, b = self.coefficients, other.coefficients
+        if a.shape[-1] < b.shape[-1]:
+            a, b = b, a
+
+        length = a.shape[-1]
+        result = np.zeros(np.broadcast_shapes(a.shape[:-1], b.shape[:-1]) + (length + b.shape[-1] - 1,),
+                          dtype=np.uint8)
+        log_a = self.log[a]
+
+        for j in range(b.shape[-1]):
+            result[..., j:j + length] ^= self.exp[log_a + self.log[b[..., j:j + 1]]]
+
+        return GaloisPolynomial(result, self.galois_field)
+
+    __rmul__ = __mul__
+
+    def __divmod__(self, divisor: GaloisPolynomial) -> tuple[GaloisPolynomial, GaloisPolynomial]:
+        """Divide by a single polynomial by long division, across the whole batch at once.
+
+        Returns:
+            GaloisPolynomial: Quotient of the division.
+            GaloisPolynomial: Remainder of the division, with divisor.degree - 1 coefficients.
+
+        Raises:
+            ValueError: If the divisor is longer than the dividend or has a zero leading coefficient.
+        """
+
+        divisor_coefficients = np.trim_zeros(divisor.coefficients, 'b')
+        length = divisor_coefficients.shape[-1]
+
+        if divisor.coefficients.ndim != 1 or length == 0:
+            raise ValueError("Divisor must be a single non-zero polynomial")
+        if length > self.degree:
+            raise ValueError("Cannot divide polynomial by a polynomial with higher degree")
+
+        remainder = self.coefficients.copy()
+        quotient = np.zeros(remainder.shape[:-1] + (self.degree - length + 1,), dtype=np.uint8)
+
+        lead_inverse_log = self.galois_field.order - self.log[divisor_coefficients[-1]]
+        log_divisor = self.log[divisor_coefficients]
+
+        for degree in range(self.degree - length, -1, -1):
+            lead_term = self.exp[self.log[remainder[..., degree + length - 1]] + lead_inverse_log]
+            quotient[..., degree] = lead_term
+            remainder[..., degree:degree + length] ^= self.exp[log_divisor + self.log[lead_term][..., None]]
+
+        return (GaloisPolynomial(quotient, self.galois_field),
+                GaloisPolynomial(remainder[..., :max(length - 1, 1)], self.galois_field))
+
+    def __mod__(self, divisor: GaloisPolynomial) -> GaloisPolynomial:
+        """Return the remainder of dividing by a polynomial.
+
+        Returns:
+            GaloisPolynomial: Remainder of the division.
+        """
+
+        return divmod(self, divisor)[1]
+
+    def evaluate(self, x) -> np.ndarray:
+        """Evaluate the polynomial (or batch) at one or more points with Horner's method.
+
+        Args:
+            x (array_like): Field element(s) to evaluate at.
+
+        Returns:
+            np.ndarray: Values with shape batch_shape + x.shape.
+        """
+
+        x = np.asarray(x, dtype=np.uint8)
+        coefficients = self.coefficients.reshape(self.coefficients.shape[:-1] + (1,) * x.ndim + (self.degree,))
+        log_x = self.log[x]
+
+        result = np.zeros(coefficients.shape[:-1], dtype=np.uint8)
+        for degree in range(self.degree - 1, -1, -1):
+            result = self.exp[self.log[result] + log_x] ^ coefficients[..., degree]
+
+        return result
+
+    def __eq__(self, other: GaloisPolynomial) -> bool:
+        return isinstance(other, GaloisPolynomial) and np.array_equal(self.coefficients, other.coefficients)
+
+    def __str__(self) -> str:
+        """Return a string representation of the polynomial, or one line per batch row.
+
+        Returns:
+            str: A string representation of the GaloisPolynomial object.
+        """
+
+        rows = self.coefficients.reshape(-1, self.degree)
+        return "\n".join(str(Polynomial(row.tolist())) for row in rows)
+
 # POLYNOMIAL CLASS TESTS #
 
 from GaloisField import GaloisField, GaloisFieldElement
@@ -167,51 +346,80 @@ class TestPolynomial(unittest.TestCase):
         self.gf = GaloisField(0x11D, 0x100, 2)
 
     def test_galois_field(self):
-        print("\nTesting individual operations first:")
-        a = GaloisFieldElement(25, self.gf)  # a²⁵
-        b = GaloisFieldElement(1, self.gf)   # a¹
-
-        print(f"\na²⁵ field value: {self.gf.antilog_table[25].value}")
-        print(f"a¹ field value: {self.gf.antilog_table[1].value}")
-        
-        sum_result = self.gf.add(a, b)
-        print(f"a²⁵ + a¹ = {sum_result}")
-        
-        mul_result = self.gf.mul(a, b)
-        print(f"a²⁵ × a¹ = {mul_result}")
-
-        print("\nNow testing polynomial addition:")
+        a = GaloisFieldElement(self.gf.exp[25], self.gf)  # a²⁵
+        b = GaloisFieldElement(self.gf.exp[1], self.gf)   # a¹
+
+        self.assertEqual(self.gf.exp[25], 3)
+        self.assertEqual(self.gf.exp[1], 2)
+
+        self.assertEqual(a + b, 3 ^ 2)
+        self.assertEqual(str(a * b), "a²⁶")
+
         p1 = Polynomial([
-            GaloisFieldElement(25, self.gf),  # a²⁵
-            GaloisFieldElement(24, self.gf),  # a²⁴x
-            GaloisFieldElement(1, self.gf)    # ax²
+            GaloisFieldElement(self.gf.exp[25], self.gf),  # a²⁵
+            GaloisFieldElement(self.gf.exp[24], self.gf),  # a²⁴x
+            GaloisFieldElement(self.gf.exp[1], self.gf)    # ax²
         ])
-        print(f"First polynomial: {p1}")
 
         p2 = Polynomial([
-            GaloisFieldElement(1, self.gf),   # a¹
-            GaloisFieldElement(25, self.gf),  # a²⁵x
-            GaloisFieldElement(0, self.gf)    # x²
+            GaloisFieldElement(self.gf.exp[1], self.gf),   # a¹
+            GaloisFieldElement(self.gf.exp[25], self.gf),  # a²⁵x
+            GaloisFieldElement(self.gf.exp[0], self.gf)    # x²
         ])
-        print(f"Second polynomial: {p2}")
 
         result = p1 + p2
-        print(f"Sum: {result}")
+        self.assertEqual(result.coefficients, [
+            self.gf.exp[25] ^ self.gf.exp[1],
+            self.gf.exp[24] ^ self.gf.exp[25],
+            self.gf.exp[1] ^ self.gf.exp[0]
+        ])
 
     def test_inverse(self):
         """Test the inverse function for correctness."""
-        print("\nTesting inverse function:")
-        # Test several elements
         for power in [1, 2, 25, 50]:
-            a = GaloisFieldElement(power, self.gf)
-            try:
-                a_inv = self.gf.inv(a)
-                product = self.gf.mul(a, a_inv)
-                print(f"a^{power} × (a^{power})⁻¹ = a^{product.value}")
-                if product.value != 0:  # Should be a⁰
-                    print(f"ERROR: Expected a⁰, got a^{product.value}")
-            except ValueError as e:
-                print(f"Error with a^{power}: {e}")
+            a = GaloisFieldElement(self.gf.exp[power], self.gf)
+            a_inv = a.inv()
+            self.assertEqual(str(a_inv), "a" + "".join(GaloisFieldElement.EXPONENTIAL_STRINGS[n] for n in str(255 - power)))
+            self.assertEqual(a * a_inv, 1)
+
+
+class TestGaloisPolynomial(unittest.TestCase):
+
+    def setUp(self):
+        self.gf = GaloisField(0x11D, 0x100, 2)
+        self.rng = np.random.default_rng(0)
+
+    def _reference_mul(self, a, b):
+        result = [0] * (len(a) + len(b) - 1)
+        for i, x in enumerate(a):
+            for j, y in enumerate(b):
+                result[i + j] ^= self.gf.mul(x, y)
+        return result
+
+    def test_mul(self):
+        a = self.rng.integers(0, 256, 12).tolist()
+        b = self.rng.integers(0, 256, 5).tolist()
+        product = GaloisPolynomial(a, self.gf) * GaloisPolynomial(b, self.gf)
+        self.assertEqual(product.coefficients.tolist(), self._reference_mul(a, b))
+        self.assertEqual((GaloisPolynomial(a, self.gf) * 3).coefficients.tolist(), [self.gf.mul(x, 3) for x in a])
+
+    def test_divmod_batch(self):
+        dividends = GaloisPolynomial(self.rng.integers(0, 256, (6, 20)), self.gf)
+        divisor = GaloisPolynomial(self.rng.integers(1, 256, 8), self.gf)
+        quotient, remainder = divmod(dividends, divisor)
+        self.assertEqual(remainder.coefficients.shape, (6, 7))
+        self.assertEqual(quotient * divisor + remainder, dividends)
+
+    def test_evaluate(self):
+        coefficients = self.rng.integers(0, 256, (3, 9))
+        values = GaloisPolynomial(coefficients, self.gf).evaluate(np.arange(256))
+        self.assertEqual(values.shape, (3, 256))
+        for row, coefficient_row in zip(values, coefficients.tolist()):
+            for x in (0, 1, 2, 77, 255):
+                expected = 0
+                for c in reversed(coefficient_row):
+                    expected = self.gf.mul(expected, x) ^ c
+                self.assertEqual(row[x], expected)
 
 
 if __name__ == '__main__':
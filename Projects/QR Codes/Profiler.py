@@ -0,0 +1,142 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import sys
+import time
+import unittest
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Iterator
+
+# STAGE STATISTICS CLASS #
+
+@dataclass
+class StageStatistics:
+    """Accumulated measurements of one pipeline stage."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    allocated_blocks: int = 0
+
+    def merge(self, other: StageStatistics) -> None:
+        """Add another set of measurements of the same stage to these."""
+
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.allocated_blocks += other.allocated_blocks
+
+# PROFILER CLASS #
+
+@dataclass
+class Profiler:
+    """Records wall time and net allocated memory blocks per pipeline stage.
+
+    One profiler can be passed to any number of QR codes to aggregate over a batch, and
+    profilers from worker processes (they pickle) can be combined with merge.
+    """
+
+    stages: dict[str, StageStatistics] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the body of a with statement as one call of a stage.
+
+        Args:
+            name (str): The stage name.
+        """
+
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            statistics = self.stages.get(name)
+            if statistics is None:
+                statistics = self.stages[name] = StageStatistics()
+            statistics.calls += 1
+            statistics.seconds += seconds
+            statistics.allocated_blocks += sys.getallocatedblocks() - blocks
+
+    def merge(self, other: Profiler) -> None:
+        """Add the measurements of another profiler to this one.
+
+        Args:
+            other (Profiler): E.g. the profiler of a worker process.
+        """
+
+        for name, statistics in other.stages.items():
+            self.stages.setdefault(name, StageStatistics()).merge(statistics)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Summarise every stage, slowest first.
+
+        Returns:
+            dict[str, dict[str, float]]: Calls, total and mean seconds, and allocated blocks per stage.
+        """
+
+        return {name: {"calls": statistics.calls,
+                       "seconds": statistics.seconds,
+                       "mean_seconds": statistics.seconds / statistics.calls,
+                       "allocated_blocks": statistics.allocated_blocks}
+                for name, statistics in sorted(self.stages.items(), key=lambda item: -item[1].seconds)}
+
+# NULL PROFILER CLASS #
+
+class NullProfiler:
+    """Profiler stand-in used when instrumentation is disabled; every hook is a no-op."""
+
+    __slots__ = ()
+
+    _NULL_CONTEXT = nullcontext()
+
+    def __reduce__(self) -> str:
+        return "NULL_PROFILER"
+
+    def stage(self, name: str) -> nullcontext:
+        return self._NULL_CONTEXT
+
+
+NULL_PROFILER = NullProfiler()
+
+# PROFILER CLASS TESTS #
+
+class TestProfiler(unittest.TestCase):
+
+    def test_stage(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.stage("build"):
+                data = [bytearray(16) for _ in range(100)]
+        with profiler.stage("sleep"):
+            time.sleep(0.01)
+
+        self.assertEqual(profiler.stages["build"].calls, 3)
+        self.assertGreaterEqual(profiler.stages["build"].allocated_blocks, 100)
+        self.assertGreaterEqual(profiler.stages["sleep"].seconds, 0.01)
+        self.assertEqual(list(profiler.summary()), ["sleep", "build"])
+        del data
+
+    def test_merge(self):
+        first, second = Profiler(), Profiler()
+        with first.stage("a"):
+            pass
+        with second.stage("a"):
+            pass
+        with second.stage("b"):
+            pass
+
+        first.merge(second)
+        self.assertEqual({name: statistics.calls for name, statistics in first.stages.items()}, {"a": 2, "b": 1})
+
+    def test_null_profiler(self):
+        import pickle
+
+        with NULL_PROFILER.stage("a"):
+            pass
+        self.assertIs(pickle.loads(pickle.dumps(NULL_PROFILER)), NULL_PROFILER)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,11 +3,110 @@
 from __future__ import annotations
 
 import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from array import array
+from bisect import bisect_left
 from enum import Enum
-
-from Polynomial import Polynomial
-from GaloisField import GaloisField, GaloisFieldElement
-
+from functools import cache, cached_property
+from typing import NamedTuple
+
+import numpy as np
+
+from BitBuffer import BitBuffer
+from GaloisField import GaloisField
+from Profiler import NULL_PROFILER, Profiler
+from QRMatrix import QRMatrix
+from ReedSolomon import ReedSolomon
+from Renderer import Renderer
+from SpecificationTables import SpecificationTables
+
+# KANJI TABLE #
+
+KANJI_RANGES = ((0x8140, 0x9FFC, 0x8140), (0xE040, 0xEBBF, 0xC140))
+NOT_KANJI = 0xFFFF
+
+KANJI_SIDECAR_MAGIC = b"QRKANJ01"
+KANJI_SIDECAR_HEADER = struct.Struct("<8sHH")
+
+
+def _build_kanji_table() -> array:
+    """Map every BMP code point to its 13-bit Kanji mode value, or NOT_KANJI.
+
+    Returns:
+        array: 0x10000 unsigned shorts indexed by code point.
+    """
+
+    table = array('H', [NOT_KANJI]) * 0x10000
+
+    for first, last, offset in KANJI_RANGES:
+        for code in range(first, last + 1):
+            try:
+                char = code.to_bytes(2, "big").decode('shift-jis')
+            except UnicodeError:
+                continue
+            if len(char) == 1:
+                value = code - offset
+                table[ord(char)] = (value >> 8) * 0xC0 + (value & 0xFF)
+
+    return table
+
+
+def _load_kanji_table(path: str | os.PathLike) -> np.ndarray:
+    """Return the code point to Kanji value table, memory-mapped from a sidecar file.
+
+    The sidecar starts with a header of KANJI_SIDECAR_MAGIC and the Python version whose
+    Shift JIS codec built it. A file without that header, e.g. one left by another Python
+    or written by something else, is rebuilt. If the file cannot be written the table is
+    kept in memory.
+
+    Returns:
+        np.ndarray: Read-only uint16 table indexed by code point.
+    """
+
+    header = KANJI_SIDECAR_HEADER.pack(KANJI_SIDECAR_MAGIC, *sys.version_info[:2])
+
+    try:
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) == len(header) + 2 * 0x10000 and mapped[:len(header)] == header:
+            return np.frombuffer(mapped, dtype=np.uint16, offset=len(header))
+        mapped.close()
+    except (OSError, ValueError):
+        pass
+
+    table = _build_kanji_table()
+    temporary_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header)
+            table.tofile(file)
+        os.replace(temporary_path, path)
+    except OSError:
+        if temporary_path is not None:
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
+
+    values = np.frombuffer(table, dtype=np.uint16)
+    values.flags.writeable = False
+    return values
+
+
+@cache
+def _kanji_table() -> np.ndarray:
+    """Return the code point to Kanji value table, loaded once per process from the sidecar next to
+    the compiled modules."""
+
+    return _load_kanji_table(os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__",
+                                          f"kanji.{sys.byteorder}.bin"))
 
 # QR CODE CLASS #
 
@@ -24,6 +123,10 @@ class QRCode:
         Q = 3
         H = 2
 
+    class Segment(NamedTuple):
+        mode: QRCode.MODES
+        data: str
+
     ALPHANUMERIC_CHARACTERS = [
         "0",
         "1",
@@ -74,6 +177,14 @@ class QRCode:
 
     CORRESPONDING_ERROR_MARGINS = [0.07, 0.15, 0.25, 0.3]
 
+    STRUCTURED_APPEND_INDICATOR = 0b0011
+    STRUCTURED_APPEND_HEADER_LENGTH = 20
+    STRUCTURED_APPEND_MAX_SYMBOLS = 16
+
+    ECI_INDICATOR = 0b0111
+    ECI_UTF8 = 26
+    ECI_MAX_DESIGNATOR = 999999
+
     ALIGNMENT_POSITIONS = [
         [],
         [6, 18],
@@ -117,596 +228,836 @@ class QRCode:
         [6, 30, 58, 86, 114, 142, 170],
     ]
 
-    CAPACITIES = {(1, 1, 1): 41, (1, 1, 2): 25, (1, 1, 4): 17, (1, 1, 8): 10, (1, 0, 1): 34, (1, 0, 2): 20,
-                  (1, 0, 4): 14, (1, 0, 8): 8, (1, 3, 1): 27, (1, 3, 2): 16, (1, 3, 4): 11, (1, 3, 8): 7, (1, 2, 1): 17,
-                  (1, 2, 2): 10, (1, 2, 4): 7, (1, 2, 8): 4, (2, 1, 1): 77, (2, 1, 2): 47, (2, 1, 4): 32, (2, 1, 8): 20,
-                  (2, 0, 1): 63, (2, 0, 2): 38, (2, 0, 4): 26, (2, 0, 8): 16, (2, 3, 1): 48, (2, 3, 2): 29,
-                  (2, 3, 4): 20, (2, 3, 8): 12, (2, 2, 1): 34, (2, 2, 2): 20, (2, 2, 4): 14, (2, 2, 8): 8,
-                  (3, 1, 1): 127, (3, 1, 2): 77, (3, 1, 4): 53, (3, 1, 8): 32, (3, 0, 1): 101, (3, 0, 2): 61,
-                  (3, 0, 4): 42, (3, 0, 8): 26, (3, 3, 1): 77, (3, 3, 2): 47, (3, 3, 4): 32, (3, 3, 8): 20,
-                  (3, 2, 1): 58, (3, 2, 2): 35, (3, 2, 4): 24, (3, 2, 8): 15, (4, 1, 1): 187, (4, 1, 2): 114,
-                  (4, 1, 4): 78, (4, 1, 8): 48, (4, 0, 1): 149, (4, 0, 2): 90, (4, 0, 4): 62, (4, 0, 8): 38,
-                  (4, 3, 1): 111, (4, 3, 2): 67, (4, 3, 4): 46, (4, 3, 8): 28, (4, 2, 1): 82, (4, 2, 2): 50,
-                  (4, 2, 4): 34, (4, 2, 8): 21, (5, 1, 1): 255, (5, 1, 2): 154, (5, 1, 4): 106, (5, 1, 8): 65,
-                  (5, 0, 1): 202, (5, 0, 2): 122, (5, 0, 4): 84, (5, 0, 8): 52, (5, 3, 1): 144, (5, 3, 2): 87,
-                  (5, 3, 4): 60, (5, 3, 8): 37, (5, 2, 1): 106, (5, 2, 2): 64, (5, 2, 4): 44, (5, 2, 8): 27,
-                  (6, 1, 1): 322, (6, 1, 2): 195, (6, 1, 4): 134, (6, 1, 8): 82, (6, 0, 1): 255, (6, 0, 2): 154,
-                  (6, 0, 4): 106, (6, 0, 8): 65, (6, 3, 1): 178, (6, 3, 2): 108, (6, 3, 4): 74, (6, 3, 8): 45,
-                  (6, 2, 1): 139, (6, 2, 2): 84, (6, 2, 4): 58, (6, 2, 8): 36, (7, 1, 1): 370, (7, 1, 2): 224,
-                  (7, 1, 4): 154, (7, 1, 8): 95, (7, 0, 1): 293, (7, 0, 2): 178, (7, 0, 4): 122, (7, 0, 8): 75,
-                  (7, 3, 1): 207, (7, 3, 2): 125, (7, 3, 4): 86, (7, 3, 8): 53, (7, 2, 1): 154, (7, 2, 2): 93,
-                  (7, 2, 4): 64, (7, 2, 8): 39, (8, 1, 1): 461, (8, 1, 2): 279, (8, 1, 4): 192, (8, 1, 8): 118,
-                  (8, 0, 1): 365, (8, 0, 2): 221, (8, 0, 4): 152, (8, 0, 8): 93, (8, 3, 1): 259, (8, 3, 2): 157,
-                  (8, 3, 4): 108, (8, 3, 8): 66, (8, 2, 1): 202, (8, 2, 2): 122, (8, 2, 4): 84, (8, 2, 8): 52,
-                  (9, 1, 1): 552, (9, 1, 2): 335, (9, 1, 4): 230, (9, 1, 8): 141, (9, 0, 1): 432, (9, 0, 2): 262,
-                  (9, 0, 4): 180, (9, 0, 8): 111, (9, 3, 1): 312, (9, 3, 2): 189, (9, 3, 4): 130, (9, 3, 8): 80,
-                  (9, 2, 1): 235, (9, 2, 2): 143, (9, 2, 4): 98, (9, 2, 8): 60, (10, 1, 1): 652, (10, 1, 2): 395,
-                  (10, 1, 4): 271, (10, 1, 8): 167, (10, 0, 1): 513, (10, 0, 2): 311, (10, 0, 4): 213, (10, 0, 8): 131,
-                  (10, 3, 1): 364, (10, 3, 2): 221, (10, 3, 4): 151, (10, 3, 8): 93, (10, 2, 1): 288, (10, 2, 2): 174,
-                  (10, 2, 4): 119, (10, 2, 8): 74, (11, 1, 1): 772, (11, 1, 2): 468, (11, 1, 4): 321, (11, 1, 8): 198,
-                  (11, 0, 1): 604, (11, 0, 2): 366, (11, 0, 4): 251, (11, 0, 8): 155, (11, 3, 1): 427, (11, 3, 2): 259,
-                  (11, 3, 4): 177, (11, 3, 8): 109, (11, 2, 1): 331, (11, 2, 2): 200, (11, 2, 4): 137, (11, 2, 8): 85,
-                  (12, 1, 1): 883, (12, 1, 2): 535, (12, 1, 4): 367, (12, 1, 8): 226, (12, 0, 1): 691, (12, 0, 2): 419,
-                  (12, 0, 4): 287, (12, 0, 8): 177, (12, 3, 1): 489, (12, 3, 2): 296, (12, 3, 4): 203, (12, 3, 8): 125,
-                  (12, 2, 1): 374, (12, 2, 2): 227, (12, 2, 4): 155, (12, 2, 8): 96, (13, 1, 1): 1022, (13, 1, 2): 619,
-                  (13, 1, 4): 425, (13, 1, 8): 262, (13, 0, 1): 796, (13, 0, 2): 483, (13, 0, 4): 331, (13, 0, 8): 204,
-                  (13, 3, 1): 580, (13, 3, 2): 352, (13, 3, 4): 241, (13, 3, 8): 149, (13, 2, 1): 427, (13, 2, 2): 259,
-                  (13, 2, 4): 177, (13, 2, 8): 109, (14, 1, 1): 1101, (14, 1, 2): 667, (14, 1, 4): 458, (14, 1, 8): 282,
-                  (14, 0, 1): 871, (14, 0, 2): 528, (14, 0, 4): 362, (14, 0, 8): 223, (14, 3, 1): 621, (14, 3, 2): 376,
-                  (14, 3, 4): 258, (14, 3, 8): 159, (14, 2, 1): 468, (14, 2, 2): 283, (14, 2, 4): 194, (14, 2, 8): 120,
-                  (15, 1, 1): 1250, (15, 1, 2): 758, (15, 1, 4): 520, (15, 1, 8): 320, (15, 0, 1): 991, (15, 0, 2): 600,
-                  (15, 0, 4): 412, (15, 0, 8): 254, (15, 3, 1): 703, (15, 3, 2): 426, (15, 3, 4): 292, (15, 3, 8): 180,
-                  (15, 2, 1): 530, (15, 2, 2): 321, (15, 2, 4): 220, (15, 2, 8): 136, (16, 1, 1): 1408, (16, 1, 2): 854,
-                  (16, 1, 4): 586, (16, 1, 8): 361, (16, 0, 1): 1082, (16, 0, 2): 656, (16, 0, 4): 450, (16, 0, 8): 277,
-                  (16, 3, 1): 775, (16, 3, 2): 470, (16, 3, 4): 322, (16, 3, 8): 198, (16, 2, 1): 602, (16, 2, 2): 365,
-                  (16, 2, 4): 250, (16, 2, 8): 154, (17, 1, 1): 1548, (17, 1, 2): 938, (17, 1, 4): 644, (17, 1, 8): 397,
-                  (17, 0, 1): 1212, (17, 0, 2): 734, (17, 0, 4): 504, (17, 0, 8): 310, (17, 3, 1): 876, (17, 3, 2): 531,
-                  (17, 3, 4): 364, (17, 3, 8): 224, (17, 2, 1): 674, (17, 2, 2): 408, (17, 2, 4): 280, (17, 2, 8): 173,
-                  (18, 1, 1): 1725, (18, 1, 2): 1046, (18, 1, 4): 718, (18, 1, 8): 442, (18, 0, 1): 1346,
-                  (18, 0, 2): 816, (18, 0, 4): 560, (18, 0, 8): 345, (18, 3, 1): 948, (18, 3, 2): 574, (18, 3, 4): 394,
-                  (18, 3, 8): 243, (18, 2, 1): 746, (18, 2, 2): 452, (18, 2, 4): 310, (18, 2, 8): 191, (19, 1, 1): 1903,
-                  (19, 1, 2): 1153, (19, 1, 4): 792, (19, 1, 8): 488, (19, 0, 1): 1500, (19, 0, 2): 909,
-                  (19, 0, 4): 624, (19, 0, 8): 384, (19, 3, 1): 1063, (19, 3, 2): 644, (19, 3, 4): 442, (19, 3, 8): 272,
-                  (19, 2, 1): 813, (19, 2, 2): 493, (19, 2, 4): 338, (19, 2, 8): 208, (20, 1, 1): 2061,
-                  (20, 1, 2): 1249, (20, 1, 4): 858, (20, 1, 8): 528, (20, 0, 1): 1600, (20, 0, 2): 970,
-                  (20, 0, 4): 666, (20, 0, 8): 410, (20, 3, 1): 1159, (20, 3, 2): 702, (20, 3, 4): 482, (20, 3, 8): 297,
-                  (20, 2, 1): 919, (20, 2, 2): 557, (20, 2, 4): 382, (20, 2, 8): 235, (21, 1, 1): 2232,
-                  (21, 1, 2): 1352, (21, 1, 4): 929, (21, 1, 8): 572, (21, 0, 1): 1708, (21, 0, 2): 1035,
-                  (21, 0, 4): 711, (21, 0, 8): 438, (21, 3, 1): 1224, (21, 3, 2): 742, (21, 3, 4): 509, (21, 3, 8): 314,
-                  (21, 2, 1): 969, (21, 2, 2): 587, (21, 2, 4): 403, (21, 2, 8): 248, (22, 1, 1): 2409,
-                  (22, 1, 2): 1460, (22, 1, 4): 1003, (22, 1, 8): 618, (22, 0, 1): 1872, (22, 0, 2): 1134,
-                  (22, 0, 4): 779, (22, 0, 8): 480, (22, 3, 1): 1358, (22, 3, 2): 823, (22, 3, 4): 565, (22, 3, 8): 348,
-                  (22, 2, 1): 1056, (22, 2, 2): 640, (22, 2, 4): 439, (22, 2, 8): 270, (23, 1, 1): 2620,
-                  (23, 1, 2): 1588, (23, 1, 4): 1091, (23, 1, 8): 672, (23, 0, 1): 2059, (23, 0, 2): 1248,
-                  (23, 0, 4): 857, (23, 0, 8): 528, (23, 3, 1): 1468, (23, 3, 2): 890, (23, 3, 4): 611, (23, 3, 8): 376,
-                  (23, 2, 1): 1108, (23, 2, 2): 672, (23, 2, 4): 461, (23, 2, 8): 284, (24, 1, 1): 2812,
-                  (24, 1, 2): 1704, (24, 1, 4): 1171, (24, 1, 8): 721, (24, 0, 1): 2188, (24, 0, 2): 1326,
-                  (24, 0, 4): 911, (24, 0, 8): 561, (24, 3, 1): 1588, (24, 3, 2): 963, (24, 3, 4): 661, (24, 3, 8): 407,
-                  (24, 2, 1): 1228, (24, 2, 2): 744, (24, 2, 4): 511, (24, 2, 8): 315, (25, 1, 1): 3057,
-                  (25, 1, 2): 1853, (25, 1, 4): 1273, (25, 1, 8): 784, (25, 0, 1): 2395, (25, 0, 2): 1451,
-                  (25, 0, 4): 997, (25, 0, 8): 614, (25, 3, 1): 1718, (25, 3, 2): 1041, (25, 3, 4): 715,
-                  (25, 3, 8): 440, (25, 2, 1): 1286, (25, 2, 2): 779, (25, 2, 4): 535, (25, 2, 8): 330,
-                  (26, 1, 1): 3283, (26, 1, 2): 1990, (26, 1, 4): 1367, (26, 1, 8): 842, (26, 0, 1): 2544,
-                  (26, 0, 2): 1542, (26, 0, 4): 1059, (26, 0, 8): 652, (26, 3, 1): 1804, (26, 3, 2): 1094,
-                  (26, 3, 4): 751, (26, 3, 8): 462, (26, 2, 1): 1425, (26, 2, 2): 864, (26, 2, 4): 593, (26, 2, 8): 365,
-                  (27, 1, 1): 3517, (27, 1, 2): 2132, (27, 1, 4): 1465, (27, 1, 8): 902, (27, 0, 1): 2701,
-                  (27, 0, 2): 1637, (27, 0, 4): 1125, (27, 0, 8): 692, (27, 3, 1): 1933, (27, 3, 2): 1172,
-                  (27, 3, 4): 805, (27, 3, 8): 496, (27, 2, 1): 1501, (27, 2, 2): 910, (27, 2, 4): 625, (27, 2, 8): 385,
-                  (28, 1, 1): 3669, (28, 1, 2): 2223, (28, 1, 4): 1528, (28, 1, 8): 940, (28, 0, 1): 2857,
-                  (28, 0, 2): 1732, (28, 0, 4): 1190, (28, 0, 8): 732, (28, 3, 1): 2085, (28, 3, 2): 1263,
-                  (28, 3, 4): 868, (28, 3, 8): 534, (28, 2, 1): 1581, (28, 2, 2): 958, (28, 2, 4): 658, (28, 2, 8): 405,
-                  (29, 1, 1): 3909, (29, 1, 2): 2369, (29, 1, 4): 1628, (29, 1, 8): 1002, (29, 0, 1): 3035,
-                  (29, 0, 2): 1839, (29, 0, 4): 1264, (29, 0, 8): 778, (29, 3, 1): 2181, (29, 3, 2): 1322,
-                  (29, 3, 4): 908, (29, 3, 8): 559, (29, 2, 1): 1677, (29, 2, 2): 1016, (29, 2, 4): 698,
-                  (29, 2, 8): 430, (30, 1, 1): 4158, (30, 1, 2): 2520, (30, 1, 4): 1732, (30, 1, 8): 1066,
-                  (30, 0, 1): 3289, (30, 0, 2): 1994, (30, 0, 4): 1370, (30, 0, 8): 843, (30, 3, 1): 2358,
-                  (30, 3, 2): 1429, (30, 3, 4): 982, (30, 3, 8): 604, (30, 2, 1): 1782, (30, 2, 2): 1080,
-                  (30, 2, 4): 742, (30, 2, 8): 457, (31, 1, 1): 4417, (31, 1, 2): 2677, (31, 1, 4): 1840,
-                  (31, 1, 8): 1132, (31, 0, 1): 3486, (31, 0, 2): 2113, (31, 0, 4): 1452, (31, 0, 8): 894,
-                  (31, 3, 1): 2473, (31, 3, 2): 1499, (31, 3, 4): 1030, (31, 3, 8): 634, (31, 2, 1): 1897,
-                  (31, 2, 2): 1150, (31, 2, 4): 790, (31, 2, 8): 486, (32, 1, 1): 4686, (32, 1, 2): 2840,
-                  (32, 1, 4): 1952, (32, 1, 8): 1201, (32, 0, 1): 3693, (32, 0, 2): 2238, (32, 0, 4): 1538,
-                  (32, 0, 8): 947, (32, 3, 1): 2670, (32, 3, 2): 1618, (32, 3, 4): 1112, (32, 3, 8): 684,
-                  (32, 2, 1): 2022, (32, 2, 2): 1226, (32, 2, 4): 842, (32, 2, 8): 518, (33, 1, 1): 4965,
-                  (33, 1, 2): 3009, (33, 1, 4): 2068, (33, 1, 8): 1273, (33, 0, 1): 3909, (33, 0, 2): 2369,
-                  (33, 0, 4): 1628, (33, 0, 8): 1002, (33, 3, 1): 2805, (33, 3, 2): 1700, (33, 3, 4): 1168,
-                  (33, 3, 8): 719, (33, 2, 1): 2157, (33, 2, 2): 1307, (33, 2, 4): 898, (33, 2, 8): 553,
-                  (34, 1, 1): 5253, (34, 1, 2): 3183, (34, 1, 4): 2188, (34, 1, 8): 1347, (34, 0, 1): 4134,
-                  (34, 0, 2): 2506, (34, 0, 4): 1722, (34, 0, 8): 1060, (34, 3, 1): 2949, (34, 3, 2): 1787,
-                  (34, 3, 4): 1228, (34, 3, 8): 756, (34, 2, 1): 2301, (34, 2, 2): 1394, (34, 2, 4): 958,
-                  (34, 2, 8): 590, (35, 1, 1): 5529, (35, 1, 2): 3351, (35, 1, 4): 2303, (35, 1, 8): 1417,
-                  (35, 0, 1): 4343, (35, 0, 2): 2632, (35, 0, 4): 1809, (35, 0, 8): 1113, (35, 3, 1): 3081,
-                  (35, 3, 2): 1867, (35, 3, 4): 1283, (35, 3, 8): 790, (35, 2, 1): 2361, (35, 2, 2): 1431,
-                  (35, 2, 4): 983, (35, 2, 8): 605, (36, 1, 1): 5836, (36, 1, 2): 3537, (36, 1, 4): 2431,
-                  (36, 1, 8): 1496, (36, 0, 1): 4588, (36, 0, 2): 2780, (36, 0, 4): 1911, (36, 0, 8): 1176,
-                  (36, 3, 1): 3244, (36, 3, 2): 1966, (36, 3, 4): 1351, (36, 3, 8): 832, (36, 2, 1): 2524,
-                  (36, 2, 2): 1530, (36, 2, 4): 1051, (36, 2, 8): 647, (37, 1, 1): 6153, (37, 1, 2): 3729,
-                  (37, 1, 4): 2563, (37, 1, 8): 1577, (37, 0, 1): 4775, (37, 0, 2): 2894, (37, 0, 4): 1989,
-                  (37, 0, 8): 1224, (37, 3, 1): 3417, (37, 3, 2): 2071, (37, 3, 4): 1423, (37, 3, 8): 876,
-                  (37, 2, 1): 2625, (37, 2, 2): 1591, (37, 2, 4): 1093, (37, 2, 8): 673, (38, 1, 1): 6479,
-                  (38, 1, 2): 3927, (38, 1, 4): 2699, (38, 1, 8): 1661, (38, 0, 1): 5039, (38, 0, 2): 3054,
-                  (38, 0, 4): 2099, (38, 0, 8): 1292, (38, 3, 1): 3599, (38, 3, 2): 2181, (38, 3, 4): 1499,
-                  (38, 3, 8): 923, (38, 2, 1): 2735, (38, 2, 2): 1658, (38, 2, 4): 1139, (38, 2, 8): 701,
-                  (39, 1, 1): 6743, (39, 1, 2): 4087, (39, 1, 4): 2809, (39, 1, 8): 1729, (39, 0, 1): 5313,
-                  (39, 0, 2): 3220, (39, 0, 4): 2213, (39, 0, 8): 1362, (39, 3, 1): 3791, (39, 3, 2): 2298,
-                  (39, 3, 4): 1579, (39, 3, 8): 972, (39, 2, 1): 2927, (39, 2, 2): 1774, (39, 2, 4): 1219,
-                  (39, 2, 8): 750, (40, 1, 1): 7089, (40, 1, 2): 4296, (40, 1, 4): 2953, (40, 1, 8): 1817,
-                  (40, 0, 1): 5596, (40, 0, 2): 3391, (40, 0, 4): 2331, (40, 0, 8): 1435, (40, 3, 1): 3993,
-                  (40, 3, 2): 2420, (40, 3, 4): 1663, (40, 3, 8): 1024, (40, 2, 1): 3057, (40, 2, 2): 1852,
-                  (40, 2, 4): 1273, (40, 2, 8): 784}
-
-    TOTAL_CODEWORDS = {(1, 1): 19, (1, 0): 16, (1, 3): 13, (1, 2): 9, (2, 1): 34, (2, 0): 28, (2, 3): 22, (2, 2): 16,
-                       (3, 1): 55, (3, 0): 44, (3, 3): 34, (3, 2): 26, (4, 1): 80, (4, 0): 64, (4, 3): 48, (4, 2): 36,
-                       (5, 1): 108, (5, 0): 86, (5, 3): 62, (5, 2): 46, (6, 1): 136, (6, 0): 108, (6, 3): 76,
-                       (6, 2): 60,
-                       (7, 1): 156, (7, 0): 124, (7, 3): 88, (7, 2): 66, (8, 1): 194, (8, 0): 154, (8, 3): 110,
-                       (8, 2): 86,
-                       (9, 1): 232, (9, 0): 182, (9, 3): 132, (9, 2): 100, (10, 1): 274, (10, 0): 216, (10, 3): 154,
-                       (10, 2): 122, (11, 1): 324, (11, 0): 254, (11, 3): 180, (11, 2): 140, (12, 1): 370, (12, 0): 290,
-                       (12, 3): 206, (12, 2): 158, (13, 1): 428, (13, 0): 334, (13, 3): 244, (13, 2): 180, (14, 1): 461,
-                       (14, 0): 365, (14, 3): 261, (14, 2): 197, (15, 1): 523, (15, 0): 415, (15, 3): 295, (15, 2): 223,
-                       (16, 1): 589, (16, 0): 453, (16, 3): 325, (16, 2): 253, (17, 1): 647, (17, 0): 507, (17, 3): 367,
-                       (17, 2): 283, (18, 1): 721, (18, 0): 563, (18, 3): 397, (18, 2): 313, (19, 1): 795, (19, 0): 627,
-                       (19, 3): 445, (19, 2): 341, (20, 1): 861, (20, 0): 669, (20, 3): 485, (20, 2): 385, (21, 1): 932,
-                       (21, 0): 714, (21, 3): 512, (21, 2): 406, (22, 1): 1006, (22, 0): 782, (22, 3): 568,
-                       (22, 2): 442,
-                       (23, 1): 1094, (23, 0): 860, (23, 3): 614, (23, 2): 464, (24, 1): 1174, (24, 0): 914,
-                       (24, 3): 664,
-                       (24, 2): 514, (25, 1): 1276, (25, 0): 1000, (25, 3): 718, (25, 2): 538, (26, 1): 1370,
-                       (26, 0): 1062,
-                       (26, 3): 754, (26, 2): 596, (27, 1): 1468, (27, 0): 1128, (27, 3): 808, (27, 2): 628,
-                       (28, 1): 1531,
-                       (28, 0): 1193, (28, 3): 871, (28, 2): 661, (29, 1): 1631, (29, 0): 1267, (29, 3): 911,
-                       (29, 2): 701,
-                       (30, 1): 1735, (30, 0): 1373, (30, 3): 985, (30, 2): 745, (31, 1): 1843, (31, 0): 1455,
-                       (31, 3): 1033,
-                       (31, 2): 793, (32, 1): 1955, (32, 0): 1541, (32, 3): 1115, (32, 2): 845, (33, 1): 2071,
-                       (33, 0): 1631,
-                       (33, 3): 1171, (33, 2): 901, (34, 1): 2191, (34, 0): 1725, (34, 3): 1231, (34, 2): 961,
-                       (35, 1): 2306,
-                       (35, 0): 1812, (35, 3): 1286, (35, 2): 986, (36, 1): 2434, (36, 0): 1914, (36, 3): 1354,
-                       (36, 2): 1054,
-                       (37, 1): 2566, (37, 0): 1992, (37, 3): 1426, (37, 2): 1096, (38, 1): 2702, (38, 0): 2102,
-                       (38, 3): 1502, (38, 2): 1142, (39, 1): 2812, (39, 0): 2216, (39, 3): 1582, (39, 2): 1222,
-                       (40, 1): 2956, (40, 0): 2334, (40, 3): 1666, (40, 2): 1276}
-
-    CODEWORD_BLOCK_GROUP_DISTRIBUTIONS = {(1, 1): [1, 19, 0, 0], (1, 0): [1, 16, 0, 0], (1, 3): [1, 13, 0, 0],
-                                          (1, 2): [1, 9, 0, 0],
-                                          (2, 1): [1, 34, 0, 0], (2, 0): [1, 28, 0, 0], (2, 3): [1, 22, 0, 0],
-                                          (2, 2): [1, 16, 0, 0],
-                                          (3, 1): [1, 55, 0, 0], (3, 0): [1, 44, 0, 0], (3, 3): [2, 17, 0, 0],
-                                          (3, 2): [2, 13, 0, 0],
-                                          (4, 1): [1, 80, 0, 0], (4, 0): [2, 32, 0, 0], (4, 3): [2, 24, 0, 0],
-                                          (4, 2): [4, 9, 0, 0],
-                                          (5, 1): [1, 108, 0, 0], (5, 0): [2, 43, 0, 0], (5, 3): [2, 15, 2, 16],
-                                          (5, 2): [2, 11, 2, 12],
-                                          (6, 1): [2, 68, 0, 0], (6, 0): [4, 27, 0, 0], (6, 3): [4, 19, 0, 0],
-                                          (6, 2): [4, 15, 0, 0],
-                                          (7, 1): [2, 78, 0, 0], (7, 0): [4, 31, 0, 0], (7, 3): [2, 14, 4, 15],
-                                          (7, 2): [4, 13, 1, 14],
-                                          (8, 1): [2, 97, 0, 0], (8, 0): [2, 38, 2, 39], (8, 3): [4, 18, 2, 19],
-                                          (8, 2): [4, 14, 2, 15],
-                                          (9, 1): [2, 116, 0, 0], (9, 0): [3, 36, 2, 37], (9, 3): [4, 16, 4, 17],
-                                          (9, 2): [4, 12, 4, 13],
-                                          (10, 1): [2, 68, 2, 69], (10, 0): [4, 43, 1, 44], (10, 3): [6, 19, 2, 20],
-                                          (10, 2): [6, 15, 2, 16], (11, 1): [4, 81, 0, 0], (11, 0): [1, 50, 4, 51],
-                                          (11, 3): [4, 22, 4, 23], (11, 2): [3, 12, 8, 13], (12, 1): [2, 92, 2, 93],
-                                          (12, 0): [6, 36, 2, 37], (12, 3): [4, 20, 6, 21], (12, 2): [7, 14, 4, 15],
-                                          (13, 1): [4, 107, 0, 0], (13, 0): [8, 37, 1, 38], (13, 3): [8, 20, 4, 21],
-                                          (13, 2): [12, 11, 4, 12], (14, 1): [3, 115, 1, 116], (14, 0): [4, 40, 5, 41],
-                                          (14, 3): [11, 16, 5, 17], (14, 2): [11, 12, 5, 13], (15, 1): [5, 87, 1, 88],
-                                          (15, 0): [5, 41, 5, 42], (15, 3): [5, 24, 7, 25], (15, 2): [11, 12, 7, 13],
-                                          (16, 1): [5, 98, 1, 99], (16, 0): [7, 45, 3, 46], (16, 3): [15, 19, 2, 20],
-                                          (16, 2): [3, 15, 13, 16], (17, 1): [1, 107, 5, 108], (17, 0): [10, 46, 1, 47],
-                                          (17, 3): [1, 22, 15, 23], (17, 2): [2, 14, 17, 15], (18, 1): [5, 120, 1, 121],
-                                          (18, 0): [9, 43, 4, 44], (18, 3): [17, 22, 1, 23], (18, 2): [2, 14, 19, 15],
-                                          (19, 1): [3, 113, 4, 114], (19, 0): [3, 44, 11, 45], (19, 3): [17, 21, 4, 22],
-                                          (19, 2): [9, 13, 16, 14], (20, 1): [3, 107, 5, 108], (20, 0): [3, 41, 13, 42],
-                                          (20, 3): [15, 24, 5, 25], (20, 2): [15, 15, 10, 16],
-                                          (21, 1): [4, 116, 4, 117],
-                                          (21, 0): [17, 42, 0, 0], (21, 3): [17, 22, 6, 23], (21, 2): [19, 16, 6, 17],
-                                          (22, 1): [2, 111, 7, 112], (22, 0): [17, 46, 0, 0], (22, 3): [7, 24, 16, 25],
-                                          (22, 2): [34, 13, 0, 0], (23, 1): [4, 121, 5, 122], (23, 0): [4, 47, 14, 48],
-                                          (23, 3): [11, 24, 14, 25], (23, 2): [16, 15, 14, 16],
-                                          (24, 1): [6, 117, 4, 118],
-                                          (24, 0): [6, 45, 14, 46], (24, 3): [11, 24, 16, 25], (24, 2): [30, 16, 2, 17],
-                                          (25, 1): [8, 106, 4, 107], (25, 0): [8, 47, 13, 48], (25, 3): [7, 24, 22, 25],
-                                          (25, 2): [22, 15, 13, 16], (26, 1): [10, 114, 2, 115],
-                                          (26, 0): [19, 46, 4, 47],
-                                          (26, 3): [28, 22, 6, 23], (26, 2): [33, 16, 4, 17], (27, 1): [8, 122, 4, 123],
-                                          (27, 0): [22, 45, 3, 46], (27, 3): [8, 23, 26, 24], (27, 2): [12, 15, 28, 16],
-                                          (28, 1): [3, 117, 10, 118], (28, 0): [3, 45, 23, 46],
-                                          (28, 3): [4, 24, 31, 25],
-                                          (28, 2): [11, 15, 31, 16], (29, 1): [7, 116, 7, 117],
-                                          (29, 0): [21, 45, 7, 46],
-                                          (29, 3): [1, 23, 37, 24], (29, 2): [19, 15, 26, 16],
-                                          (30, 1): [5, 115, 10, 116],
-                                          (30, 0): [19, 47, 10, 48], (30, 3): [15, 24, 25, 25],
-                                          (30, 2): [23, 15, 25, 16],
-                                          (31, 1): [13, 115, 3, 116], (31, 0): [2, 46, 29, 47],
-                                          (31, 3): [42, 24, 1, 25],
-                                          (31, 2): [23, 15, 28, 16], (32, 1): [17, 115, 0, 0],
-                                          (32, 0): [10, 46, 23, 47],
-                                          (32, 3): [10, 24, 35, 25], (32, 2): [19, 15, 35, 16],
-                                          (33, 1): [17, 115, 1, 116],
-                                          (33, 0): [14, 46, 21, 47], (33, 3): [29, 24, 19, 25],
-                                          (33, 2): [11, 15, 46, 16],
-                                          (34, 1): [13, 115, 6, 116], (34, 0): [14, 46, 23, 47],
-                                          (34, 3): [44, 24, 7, 25],
-                                          (34, 2): [59, 16, 1, 17], (35, 1): [12, 121, 7, 122],
-                                          (35, 0): [12, 47, 26, 48],
-                                          (35, 3): [39, 24, 14, 25], (35, 2): [22, 15, 41, 16],
-                                          (36, 1): [6, 121, 14, 122],
-                                          (36, 0): [6, 47, 34, 48], (36, 3): [46, 24, 10, 25], (36, 2): [2, 15, 64, 16],
-                                          (37, 1): [17, 122, 4, 123], (37, 0): [29, 46, 14, 47],
-                                          (37, 3): [49, 24, 10, 25],
-                                          (37, 2): [24, 15, 46, 16], (38, 1): [4, 122, 18, 123],
-                                          (38, 0): [13, 46, 32, 47],
-                                          (38, 3): [48, 24, 14, 25], (38, 2): [42, 15, 32, 16],
-                                          (39, 1): [20, 117, 4, 118],
-                                          (39, 0): [40, 47, 7, 48], (39, 3): [43, 24, 22, 25],
-                                          (39, 2): [10, 15, 67, 16],
-                                          (40, 1): [19, 118, 6, 119], (40, 0): [18, 47, 31, 48],
-                                          (40, 3): [34, 24, 34, 25],
-                                          (40, 2): [20, 15, 61, 16]}
-
-    ERROR_CORRECTION_CODEWORDS = {(1, 1): 7, (1, 0): 10, (1, 3): 13, (1, 2): 17, (2, 1): 10, (2, 0): 16, (2, 3): 22,
-                                  (2, 2): 28, (3, 1): 15, (3, 0): 26, (3, 3): 18, (3, 2): 22, (4, 1): 20, (4, 0): 18,
-                                  (4, 3): 26, (4, 2): 16, (5, 1): 26, (5, 0): 24, (5, 3): 18, (5, 2): 22, (6, 1): 18,
-                                  (6, 0): 16, (6, 3): 24, (6, 2): 28, (7, 1): 20, (7, 0): 18, (7, 3): 18, (7, 2): 26,
-                                  (8, 1): 24, (8, 0): 22, (8, 3): 22, (8, 2): 26, (9, 1): 30, (9, 0): 22, (9, 3): 20,
-                                  (9, 2): 24, (10, 1): 18, (10, 0): 26, (10, 3): 24, (10, 2): 28, (11, 1): 20,
-                                  (11, 0): 30, (11, 3): 28, (11, 2): 24, (12, 1): 24, (12, 0): 22, (12, 3): 26,
-                                  (12, 2): 28, (13, 1): 26, (13, 0): 22, (13, 3): 24, (13, 2): 22, (14, 1): 30,
-                                  (14, 0): 24, (14, 3): 20, (14, 2): 24, (15, 1): 22, (15, 0): 24, (15, 3): 30,
-                                  (15, 2): 24, (16, 1): 24, (16, 0): 28, (16, 3): 24, (16, 2): 30, (17, 1): 28,
-                                  (17, 0): 28, (17, 3): 28, (17, 2): 28, (18, 1): 30, (18, 0): 26, (18, 3): 28,
-                                  (18, 2): 28, (19, 1): 28, (19, 0): 26, (19, 3): 26, (19, 2): 26, (20, 1): 28,
-                                  (20, 0): 26, (20, 3): 30, (20, 2): 28, (21, 1): 28, (21, 0): 26, (21, 3): 28,
-                                  (21, 2): 30, (22, 1): 28, (22, 0): 28, (22, 3): 30, (22, 2): 24, (23, 1): 30,
-                                  (23, 0): 28, (23, 3): 30, (23, 2): 30, (24, 1): 30, (24, 0): 28, (24, 3): 30,
-                                  (24, 2): 30, (25, 1): 26, (25, 0): 28, (25, 3): 30, (25, 2): 30, (26, 1): 28,
-                                  (26, 0): 28, (26, 3): 28, (26, 2): 30, (27, 1): 30, (27, 0): 28, (27, 3): 30,
-                                  (27, 2): 30, (28, 1): 30, (28, 0): 28, (28, 3): 30, (28, 2): 30, (29, 1): 30,
-                                  (29, 0): 28, (29, 3): 30, (29, 2): 30, (30, 1): 30, (30, 0): 28, (30, 3): 30,
-                                  (30, 2): 30, (31, 1): 30, (31, 0): 28, (31, 3): 30, (31, 2): 30, (32, 1): 30,
-                                  (32, 0): 28, (32, 3): 30, (32, 2): 30, (33, 1): 30, (33, 0): 28, (33, 3): 30,
-                                  (33, 2): 30, (34, 1): 30, (34, 0): 28, (34, 3): 30, (34, 2): 30, (35, 1): 30,
-                                  (35, 0): 28, (35, 3): 30, (35, 2): 30, (36, 1): 30, (36, 0): 28, (36, 3): 30,
-                                  (36, 2): 30, (37, 1): 30, (37, 0): 28, (37, 3): 30, (37, 2): 30, (38, 1): 30,
-                                  (38, 0): 28, (38, 3): 30, (38, 2): 30, (39, 1): 30, (39, 0): 28, (39, 3): 30,
-                                  (39, 2): 30, (40, 1): 30, (40, 0): 28, (40, 3): 30, (40, 2): 30}
-
-    CHARACTER_COUNT_INDICATORS = [
-        (1, 9, [10, 9, 8, 8]),
-        (10, 26, [12, 11, 16, 10]),
-        (27, 40, [14, 13, 16, 12]),
-    ]
+    SPECIFICATION = SpecificationTables.shared()
+
+    CAPACITIES = SPECIFICATION.capacities
+    TOTAL_CODEWORDS = SPECIFICATION.total_codewords
+    CODEWORD_BLOCK_GROUP_DISTRIBUTIONS = SPECIFICATION.codeword_block_group_distributions
+    ERROR_CORRECTION_CODEWORDS = SPECIFICATION.error_correction_codewords
+
+    CHARACTER_COUNT_INDICATORS = SpecificationTables.CHARACTER_COUNT_INDICATORS
+
+    @staticmethod
+    def _index_capacities(specification: SpecificationTables) -> dict[tuple[int, int], list[int]]:
+        """Build a sorted list of capacities by version for each error correction level and mode."""
+
+        return {(error_correction, mode): specification.table[1:, error_correction, 6 + mode_index].tolist()
+                for error_correction in range(4)
+                for mode, mode_index in specification.MODE_INDICES.items()}
 
     @staticmethod
-    def toBinary(data, length: int) -> str:
-        """Convert passed data to binary with a set length."""
-        return str(bin(data))[2:].zfill(length)
+    def _index_data_capacities(specification: SpecificationTables) -> dict[int, list[int]]:
+        """Build a version-ordered list of data bit capacities for each error correction level."""
+
+        return {error_correction: [8 * codewords for codewords in specification.table[1:, error_correction, 0].tolist()]
+                for error_correction in range(4)}
+
+    @staticmethod
+    def _index_character_count_indicators(indicators: list) -> dict[tuple[int, int], int]:
+        """Build a direct (version, mode) to character count indicator length lookup."""
+
+        return {(version, 1 << mode_index): lengths[mode_index]
+                for first, last, lengths in indicators
+                for version in range(first, last + 1)
+                for mode_index in range(len(lengths))}
+
+    @staticmethod
+    def _index_character_classes(alphanumeric_characters: list[str], modes: type[Enum]) -> tuple[bytes, bytes]:
+        """Build 256-entry byte tables of the modes each ASCII character can be encoded in, and of its value.
+
+        A character's class is the bitwise OR of the values of those modes (every byte can be
+        encoded in byte mode). Its value is its alphanumeric index, which for digits is also the
+        digit value, or 0xFF if it is not alphanumeric.
+        """
+
+        classes = bytearray([modes.BYTE.value] * 256)
+        values = bytearray([0xFF] * 256)
+
+        for index, char in enumerate(alphanumeric_characters):
+            classes[ord(char)] |= modes.ALPHANUMERIC.value
+            values[ord(char)] = index
+        for digit in b"0123456789":
+            classes[digit] |= modes.NUMERIC.value
+
+        return bytes(classes), bytes(values)
+
+    CAPACITY_INDEX = _index_capacities(SPECIFICATION)
+    DATA_BIT_CAPACITY_INDEX = _index_data_capacities(SPECIFICATION)
+    CHARACTER_COUNT_INDICATOR_LENGTHS = _index_character_count_indicators(CHARACTER_COUNT_INDICATORS)
+    CHARACTER_CLASSES, ALPHANUMERIC_VALUES = _index_character_classes(ALPHANUMERIC_CHARACTERS, MODES)
+
+    INTERLEAVE_PERMUTATIONS: dict[tuple[int, int], np.ndarray] = {}
+
+    alpha = 2
+    prime = 0x11D
+    galois_field_size = 0x100
 
-    def __init__(self, data: str | None = None, error_correction: ERROR_CORRECTIONS = ERROR_CORRECTIONS.M,
-                 version: int | None = None):
+    def __init__(self, data: str | bytes | bytearray | memoryview | None = None,
+                 error_correction: ERROR_CORRECTIONS = ERROR_CORRECTIONS.M, version: int | None = None,
+                 mask: int | None = None, structured_append: tuple[int, int, int] | None = None,
+                 profiler: Profiler | None = None, lazy: bool = False, eci: int | None = None):
         """Initialise a QR code.
 
+        Only the mode, segments and version are determined up front. Every later stage is a
+        cached property computed on first access, so a lazy QR code costs little more than a
+        capacity lookup until its codewords, matrix or image are asked for.
+
+        Text is segmented into the modes that encode it most compactly. Bytes-like data is
+        encoded as a single byte mode segment read from the buffer as is, without decoding it
+        to text or encoding it again.
+
         Args:
-            data: The data to encode in QR code
+            data: The text or binary data to encode in QR code
             error_correction: The error correction level to use
             version: The QR code version to use (optional)
+            mask: The mask pattern to apply, 0 to 7 (optional, lowest penalty if not given)
+            structured_append: Position, total symbol count and parity byte when this code is one
+                of a structured append sequence (optional)
+            profiler: Records the time and allocations of each stage (optional, no instrumentation if not given)
+            lazy: Defer every stage after version selection until it is first accessed
+            eci: Extended Channel Interpretation designator telling scanners how to decode byte mode
+                data, e.g. ECI_UTF8 for non-Latin text (optional, no ECI segment if not given)
+
+        Raises:
+            ValueError: If data None or empty, too large for the QR code version, or the mask, structured
+                append header or ECI designator is out of range
+        """
+
+        if mask is not None and not 0 <= mask <= 7:
+            raise ValueError("Mask patterns range from 0 to 7")
+
+        self.profiler = profiler or NULL_PROFILER
+        self.requested_mask = mask
+
+        with self.profiler.stage("mode_detection"):
+            self._plan(data, error_correction, version, structured_append, eci)
+
+        if not lazy:
+            self.modules
+
+    def __getstate__(self) -> dict:
+        """Pickle without the block views, which are rebuilt from codewords on demand, and with byte views copied."""
+
+        state = self.__dict__.copy()
+        state.pop("blocks", None)
+        for key in ("data", "character_values"):
+            if isinstance(state[key], memoryview):
+                state[key] = state[key].tobytes()
+        state["segments"] = [segment._replace(data=segment.data.tobytes()) if isinstance(segment.data, memoryview)
+                             else segment for segment in state["segments"]]
+        return state
+
+    @classmethod
+    def fits(cls, data: str | bytes | bytearray | memoryview, error_correction: ERROR_CORRECTIONS = ERROR_CORRECTIONS.M,
+             version: int | None = None, eci: int | None = None) -> bool:
+        """Determine whether data fits in a QR code version without encoding it.
+
+        Two bit counts bound the cost of the best segmentation and settle most cases without
+        segmenting: all the data as one byte segment from above, and every character in its
+        cheapest mode from below. Only data that falls between them is planned in full.
+
+        Args:
+            data: The data to encode
+            error_correction: The error correction level to use
+            version: The QR code version to test (optional, any version if not given)
+            eci: Extended Channel Interpretation designator (optional)
+
+        Returns:
+            bool: True if the data fits, False otherwise
+        """
+
+        if not data or (version is not None and not 1 <= version <= 40) or (
+                eci is not None and not 0 <= eci <= cls.ECI_MAX_DESIGNATOR):
+            return False
+
+        largest = version or 40
+        capacity = cls.DATA_BIT_CAPACITY_INDEX[error_correction.value][largest - 1]
+        capacity -= cls._eci_header_bit_length(eci)
+
+        byte_length = len(data.encode('utf-8')) if isinstance(data, str) else memoryview(data).nbytes
+        byte_indicator_length = cls.CHARACTER_COUNT_INDICATOR_LENGTHS[(largest, cls.MODES.BYTE.value)]
+        if byte_length < 1 << byte_indicator_length and 8 * byte_length + 4 + byte_indicator_length <= capacity:
+            return True
+        if not isinstance(data, str):
+            return False
+
+        indicator_lengths = (cls.CHARACTER_COUNT_INDICATOR_LENGTHS[(version, mode.value)] for mode in cls.MODES) \
+            if version else (length for _, _, lengths in cls.CHARACTER_COUNT_INDICATORS for length in lengths)
+        if cls._minimum_bit_length(data) + 4 + min(indicator_lengths) > capacity:
+            return False
+
+        try:
+            cls(data, error_correction, version, lazy=True, eci=eci)
+        except ValueError:
+            return False
+        return True
+
+    @classmethod
+    def _minimum_bit_length(cls, data: str) -> float:
+        """Determine the bits the data takes with every character in its cheapest mode and no segment headers.
+
+        Returns:
+            float: A lower bound on the data bits of any segmentation
+        """
+
+        classes = cls._character_classes(data)
+        numeric = classes.count(cls.MODES.NUMERIC.value | cls.MODES.ALPHANUMERIC.value | cls.MODES.BYTE.value)
+        alphanumeric = classes.count(cls.MODES.ALPHANUMERIC.value | cls.MODES.BYTE.value)
+        kanji = classes.count(cls.MODES.KANJI.value | cls.MODES.BYTE.value)
+        return 10 / 3 * numeric + 5.5 * alphanumeric + 13 * kanji + 8 * (len(classes) - numeric - alphanumeric - kanji)
+
+    @cached_property
+    def required_codewords(self) -> int:
+        return self.TOTAL_CODEWORDS[(self.version, self.error_correction.value)]
+
+    @property
+    def required_bit_count(self) -> int:
+        return self.required_codewords * 8
+
+    @cached_property
+    def codeword_block_distribution(self) -> list[int]:
+        return self.CODEWORD_BLOCK_GROUP_DISTRIBUTIONS[(self.version, self.error_correction.value)]
+
+    @cached_property
+    def error_correction_codewords(self) -> int:
+        return self.ERROR_CORRECTION_CODEWORDS[(self.version, self.error_correction.value)]
+
+    @cached_property
+    def alignment_positions(self) -> list[int]:
+        return self._get_alignment_positions()
+
+    @cached_property
+    def bit_buffer(self) -> BitBuffer:
+        with self.profiler.stage("codewords"):
+            return self._generate_bit_buffer()
+
+    @cached_property
+    def codewords(self) -> bytes:
+        return self.bit_buffer.to_bytes()
+
+    @cached_property
+    def blocks(self) -> list:
+        codewords = self.codewords
+        with self.profiler.stage("blocks"):
+            return self._generate_codeword_blocks(codewords)
+
+    @property
+    def codeword_blocks(self) -> list:
+        return self.blocks
+
+    @property
+    def galois_field(self) -> GaloisField:
+        return GaloisField.shared(self.prime, self.galois_field_size, self.alpha)
+
+    @cached_property
+    def reed_solomon(self) -> ReedSolomon:
+        return ReedSolomon(self.galois_field)
+
+    @cached_property
+    def generator_polynomial(self) -> bytes:
+        return self.create_generator_polynomial()
+
+    @property
+    def data_blocks(self) -> list[list[memoryview]]:
+        """The codewords of every data block, nested by group then block; the same views as blocks."""
+
+        return self.blocks
+
+    @cached_property
+    def error_correction_blocks(self) -> list[list[bytes]]:
+        """The error correction codewords of every data block, nested by group then block like blocks."""
+
+        data_blocks, reed_solomon = self.data_blocks, self.reed_solomon
+        with self.profiler.stage("reed_solomon"):
+            return [[reed_solomon.encode(block, self.error_correction_codewords) for block in group]
+                    for group in data_blocks]
+
+    @cached_property
+    def final_codewords(self) -> bytes:
+        error_correction_blocks = self.error_correction_blocks
+        with self.profiler.stage("interleaving"):
+            return self._interleave_codewords(self.codewords, error_correction_blocks)
+
+    @cached_property
+    def matrix(self) -> QRMatrix:
+        return QRMatrix(self.version, self.alignment_positions)
+
+    @cached_property
+    def placed_modules(self) -> np.ndarray:
+        final_codewords, matrix = self.final_codewords, self.matrix
+        with self.profiler.stage("placement"):
+            return matrix.place_data(final_codewords)
+
+    @cached_property
+    def _symbol(self) -> tuple[int, np.ndarray]:
+        placed_modules, matrix = self.placed_modules, self.matrix
+        with self.profiler.stage("masking"):
+            if self.requested_mask is None:
+                return matrix.choose_mask(placed_modules, self.error_correction.value)
+            return self.requested_mask, matrix.build(placed_modules, self.error_correction.value,
+                                                     self.requested_mask)
+
+    @property
+    def mask(self) -> int:
+        return self._symbol[0]
+
+    @property
+    def modules(self) -> np.ndarray:
+        return self._symbol[1]
+
+    def _plan(self, data: str | bytes | bytearray | memoryview | None, error_correction: ERROR_CORRECTIONS,
+              version: int | None = None, structured_append: tuple[int, int, int] | None = None,
+              eci: int | None = None) -> None:
+        """Determine the encoding mode, segments and version for the data without encoding it.
 
         Raises:
-            ValueError: If data None or empty
+            ValueError: If data None or empty, or too large for a QR code, or the structured append header or
+                ECI designator is out of range
         """
 
         if not data:
             raise ValueError("Data must be provided")
+        if structured_append is not None:
+            index, total, parity = structured_append
+            if not 0 <= index < total <= self.STRUCTURED_APPEND_MAX_SYMBOLS:
+                raise ValueError("Structured append positions range from 0 to one less than the total, at most 16")
+            if not 0 <= parity <= 0xFF:
+                raise ValueError("Structured append parity ranges from 0 to 255")
+        if eci is not None and not 0 <= eci <= self.ECI_MAX_DESIGNATOR:
+            raise ValueError("ECI designators range from 0 to 999999")
 
         self.data = data
-        self.mode = self._determine_encoding_mode()
+        self.mode, self.character_values = self._classify(data)
         self.error_correction = error_correction
+        self.structured_append = structured_append
+        self.eci = eci
 
         self.data_length = self._get_data_length()
 
-        self.version = version if version else self._determine_version()
+        self.version, self.segments = self._determine_version_and_segments(version)
 
-        self.alignment_positions = self._get_alignment_positions()
+    @classmethod
+    def structured_append_symbols(cls, data: str | bytes | bytearray | memoryview,
+                                  error_correction: ERROR_CORRECTIONS = ERROR_CORRECTIONS.M,
+                                  max_symbols: int = STRUCTURED_APPEND_MAX_SYMBOLS, workers: int | None = None,
+                                  eci: int | None = None) -> list[QRCode]:
+        """Split data across a structured append sequence of up to 16 linked QR codes.
 
-        self.required_codewords = self.TOTAL_CODEWORDS[(self.version, self.error_correction.value)]
-        self.required_bit_count = self.required_codewords * 8
+        Every way of splitting the data into 1 to max_symbols parts of balanced bit cost is
+        tried, and the one with the fewest modules in total is used. The symbols are then
+        encoded in parallel over a process pool.
 
-        self.bit_string = self._generate_bit_string()
-        self.codewords = self._convert_bit_string_to_codewords()
+        Args:
+            data: The data to encode
+            error_correction: The error correction level to use for every symbol
+            max_symbols: The most symbols to split the data across
+            workers: Number of worker processes (optional, defaults to the CPU count; 1 encodes in this process)
+            eci: Extended Channel Interpretation designator for every symbol (optional)
 
-        self.codeword_block_distribution = self.CODEWORD_BLOCK_GROUP_DISTRIBUTIONS[
-            (self.version, self.error_correction.value)]
-        self.error_correction_codewords = self.ERROR_CORRECTION_CODEWORDS[(self.version, self.error_correction.value)]
+        Returns:
+            list[QRCode]: The symbols, in sequence order.
+
+        Raises:
+            ValueError: If data None or empty, or too large for max_symbols QR codes
+        """
+
+        if not data:
+            raise ValueError("Data must be provided")
+        if not 1 <= max_symbols <= cls.STRUCTURED_APPEND_MAX_SYMBOLS:
+            raise ValueError("Structured append sequences have between 1 and 16 symbols")
 
-        self.blocks = self._generate_codeword_blocks()
-        self.codeword_blocks = self._generate_codeword_blocks()
+        if not isinstance(data, str):
+            data = bytes(data)
 
-        self.alpha = 2
-        self.prime = 0x11D
-        self.galois_field_size = 0x100
-        self.galois_field = GaloisField(self.prime, self.galois_field_size, self.alpha)
+        parity = 0
+        for byte in data.encode('utf-8') if isinstance(data, str) else data:
+            parity ^= byte
 
-        self._generate_polynomials()
+        chunks = cls._split_for_structured_append(data, error_correction, max_symbols, parity, eci)
+        arguments = [(chunk, error_correction, (index, len(chunks), parity), eci) for index, chunk in enumerate(chunks)]
 
-    def _generate_bit_string(self) -> str:
-        """Generate the bit string for the QR code.
+        workers = min(workers or os.cpu_count() or 1, len(chunks))
+        if workers == 1:
+            return [_encode_structured_append_symbol(argument) for argument in arguments]
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers) as executor:
+            return list(executor.map(_encode_structured_append_symbol, arguments))
+
+    @classmethod
+    def _split_for_structured_append(cls, data: str | bytes, error_correction: ERROR_CORRECTIONS, max_symbols: int,
+                                     parity: int, eci: int | None = None) -> list[str | bytes]:
+        """Choose how to split data into structured append symbols with the fewest modules in total.
+
+        Text is segmented once as a whole, and each character is costed in the mode of its
+        segment, with segment headers charged to their first character. Every symbol count is
+        then scored without segmenting anything again: the parts are balanced on those costs and
+        each part is given the smallest version its cost fits. The splits are planned for real in
+        order of estimated modules, and the first whose parts all fit is used, which is usually
+        the first one tried.
+
+        Returns:
+            list[str | bytes]: The data of each symbol.
+
+        Raises:
+            ValueError: If data is too large for max_symbols QR codes
+        """
+
+        # Bit cost of every prefix of the data, to balance the parts.
+
+        if isinstance(data, str):
+            version = cls.CHARACTER_COUNT_INDICATORS[-1][0]
+            boundaries = [0.0]
+            for segment in cls._segment_data(data, version):
+                header = 4 + cls.CHARACTER_COUNT_INDICATOR_LENGTHS[(version, segment.mode.value)]
+                for char in segment.data:
+                    match segment.mode:
+                        case cls.MODES.NUMERIC:
+                            cost = 10 / 3
+                        case cls.MODES.ALPHANUMERIC:
+                            cost = 5.5
+                        case cls.MODES.BYTE:
+                            cost = 8 * len(char.encode('utf-8'))
+                        case cls.MODES.KANJI:
+                            cost = 13
+                    boundaries.append(boundaries[-1] + cost + header)
+                    header = 0
+        else:
+            boundaries = [8.0 * length for length in range(len(data) + 1)]
+
+        header_length = cls.STRUCTURED_APPEND_HEADER_LENGTH + cls._eci_header_bit_length(eci)
+        capacities = cls.DATA_BIT_CAPACITY_INDEX[error_correction.value]
+
+        estimates = []
+        for count in range(1, min(max_symbols, len(data)) + 1):
+            cuts = [0] + [bisect_left(boundaries, boundaries[-1] * part / count) for part in range(1, count)] + [len(data)]
+            if any(start >= end for start, end in zip(cuts, cuts[1:])):
+                continue
+
+            modules = 0
+            for start, end in zip(cuts, cuts[1:]):
+                version = cls._estimate_version(math.ceil(boundaries[end] - boundaries[start]) + header_length,
+                                                capacities)
+                if version is None:
+                    modules = math.inf
+                    break
+                modules += (4 * version + 17) ** 2
+            estimates.append((modules, count, cuts))
+
+        for _, count, cuts in sorted(estimates):
+            chunks = [data[start:end] for start, end in zip(cuts, cuts[1:])]
+            try:
+                for index, chunk in enumerate(chunks):
+                    cls(chunk, error_correction, structured_append=(index, count, parity), lazy=True, eci=eci)
+            except ValueError:
+                continue
+            return chunks
+
+        raise ValueError("Data too large for a structured append sequence")
+
+    @classmethod
+    def _estimate_version(cls, bit_length: int, capacities: list[int]) -> int | None:
+        """Find the smallest version whose data capacity fits some bits plus the shortest segment header,
+        which a part that starts within a segment needs.
 
         Returns:
-            str: The bit string for the QR code.
+            int | None: The version, or None if no version fits
         """
 
-        self.mode_indicator = self.toBinary(self.mode.value, 4)
+        for first, last, lengths in cls.CHARACTER_COUNT_INDICATORS:
+            index = bisect_left(capacities, bit_length + 4 + min(lengths), first - 1)
+            if index < last:
+                return index + 1
+        return None
+
+    def _generate_bit_buffer(self) -> BitBuffer:
+        """Generate the data bits for the QR code, packed into whole codewords.
 
-        self.character_count_indicator_length = self._determine_character_count_indicator_length()
-        self.character_count_indicator = self.toBinary(self.data_length, self.character_count_indicator_length)
+        Returns:
+            BitBuffer: Mode indicator, character count, encoded data, terminator and pad bytes.
+        """
 
-        self.encoded_data = self._encode_data()
+        buffer = BitBuffer()
+
+        if self.structured_append:
+            index, total, parity = self.structured_append
+            buffer.append(self.STRUCTURED_APPEND_INDICATOR, 4)
+            buffer.append(index, 4)
+            buffer.append(total - 1, 4)
+            buffer.append(parity, 8)
+
+        if self.eci is not None:
+            buffer.append(self.ECI_INDICATOR, 4)
+            if self.eci < 1 << 7:
+                buffer.append(self.eci, 8)
+            elif self.eci < 1 << 14:
+                buffer.append(0b10 << 14 | self.eci, 16)
+            else:
+                buffer.append(0b110 << 21 | self.eci, 24)
 
-        bit_string = (self.mode_indicator
-                      + self.character_count_indicator
-                      + self.encoded_data)
+        for segment in self.segments:
+            buffer.append(segment.mode.value, 4)
+            buffer.append(self._get_segment_length(segment),
+                          self._determine_character_count_indicator_length(segment.mode))
+            self._encode_data(buffer, segment)
 
         # Terminate bit string.
 
-        if len(bit_string) < self.required_bit_count:
-            bit_string += "0" * min((self.required_bit_count - len(bit_string)), 4)
+        buffer.append(0, min(self.required_bit_count - len(buffer), 4))
 
         # Ensure a multiple of 8.
 
-        if (len(bit_string) % 8) != 0:
-            bit_string += "0" * (8 - (len(bit_string) % 8))
+        buffer.pad_to_byte()
 
         # Add Pad Bytes
 
-        bits_left = self.required_bit_count - len(bit_string)
-        bytes_left = bits_left // 8
+        bytes_left = (self.required_bit_count - len(buffer)) // 8
+        buffer.append_bytes(b"\xEC\x11" * (bytes_left // 2) + b"\xEC" * (bytes_left % 2))
 
-        bit_string += "1110110000010001" * (bytes_left // 2)
-        if bytes_left % 2 != 0:
-            bit_string += "11101100"
+        return buffer
 
-        return bit_string
+    def _generate_codeword_blocks(self, codewords: bytes) -> list[list[memoryview]]:
+        """Split the data codewords into blocks without copying them.
 
-    def _convert_bit_string_to_codewords(self) -> list:
-        """Convert the bit string into a list of codewords.
+        Args:
+            codewords: The data codewords to split
 
         Returns:
-            list: A list of codewords.
+            list[list[memoryview]]: Slices of codewords for every block, nested by group then block.
         """
 
-        return list(map(''.join, zip(*[iter(self.bit_string)] * 8)))
+        view = memoryview(codewords)
+        blocks, start = [], 0
 
-    def _generate_codeword_blocks(self) -> list:
-        """Generate a list of codeword blocks.
+        distribution = self.codeword_block_distribution
+        for block_count, block_length in zip(distribution[::2], distribution[1::2]):
+            if block_count:
+                blocks.append([view[start + block_length * i:start + block_length * (i + 1)]
+                               for i in range(block_count)])
+                start += block_count * block_length
+
+        return blocks
+
+    def create_generator_polynomial(self) -> bytes:
+        """Return the generator polynomial for Reed-Solomon error correction.
+
+        The generator polynomial g(x) = (x - α⁰)(x - α¹)(x - α²)...(x - α^(n-1))
+        where n is the number of error correction codewords needed. Only one generator
+        exists per distinct n, so they are shared between all QR codes through the
+        ReedSolomon cache rather than rebuilt per instance.
 
         Returns:
-            list: A list of codeword blocks.
+            bytes: Monic generator coefficients, lowest degree first.
         """
 
-        blocks = []
-        codewords_copy = self.codewords.copy()
+        return self.reed_solomon.generator_polynomial(self.error_correction_codewords)
 
-        for block_index in range(0, len(self.codeword_block_distribution), 2):
-            block = []
-            for _ in range(self.codeword_block_distribution[block_index]):
-                group = []
-                for _ in range(self.codeword_block_distribution[block_index + 1]):
-                    if len(codewords_copy) > 0:
-                        group.append(codewords_copy.pop(0))
-                if group:
-                    block.append(group)
-            if block:
-                blocks.append(block)
+    @classmethod
+    def _interleave_permutation(cls, version: int, error_correction: int) -> np.ndarray:
+        """Return the interleaving order for a version and error correction level.
 
-        return blocks
+        Index i of the result is the position, in the data codewords followed by every block's
+        error correction codewords, of final codeword i. Each order is computed once per process.
 
-    def _read_codeword_groups(self):
-        """Read codeword groups."""
+        Returns:
+            np.ndarray: Permutation of all the codeword positions.
+        """
 
-        _blocks = []
+        key = (version, error_correction)
+        permutation = cls.INTERLEAVE_PERMUTATIONS.get(key)
+        if permutation is not None:
+            return permutation
 
-        for block in self.codeword_blocks:
-            _block = []
-            for group in block:
-                _block.append(len(group))
-            _blocks.append(_block)
+        distribution = cls.CODEWORD_BLOCK_GROUP_DISTRIBUTIONS[key]
+        error_correction_length = cls.ERROR_CORRECTION_CODEWORDS[key]
+        lengths = np.repeat(distribution[1::2], distribution[::2])
 
-        print(self.codeword_block_distribution, _blocks)
+        # Column-major walk over the blocks laid out as rows; shorter rows are skipped.
 
-    def create_generator_polynomial(self) -> Polynomial:
-        """
-        Create the generator polynomial for Reed-Solomon error correction.
-        The generator polynomial g(x) = (x - α⁰)(x - α¹)(x - α²)...(x - α^(n-1))
-        where n is the number of error correction codewords needed.
+        data_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        columns = np.arange(lengths.max())
+        data_order = (data_starts[None, :] + columns[:, None])[columns[:, None] < lengths[None, :]]
+
+        error_correction_starts = lengths.sum() + error_correction_length * np.arange(len(lengths))
+        error_correction_order = (error_correction_starts[None, :] +
+                                  np.arange(error_correction_length)[:, None]).ravel()
+
+        permutation = np.concatenate((data_order, error_correction_order))
+        permutation.flags.writeable = False
+        return cls.INTERLEAVE_PERMUTATIONS.setdefault(key, permutation)
+
+    def _interleave_codewords(self, codewords: bytes, error_correction_blocks: list[list[bytes]]) -> bytes:
+        """Interleave the data codewords of every block, followed by their error correction codewords.
+
+        Args:
+            codewords: The data codewords, block after block
+            error_correction_blocks: The error correction codewords of every block, nested by group then block
+
+        Returns:
+            bytes: The final codeword sequence to place in the matrix.
         """
-        # Start with the first factor (x - α⁰)
-        # current = Polynomial([
-        #     GaloisFieldElement(1, self.galois_field),  # a⁰ constant term
-        #     GaloisFieldElement(1, self.galois_field)  # a¹x coefficient
-        # ])
-        #
-        # print(current)
-        #
-        # for power in range(2, self.error_correction_codewords + 1):
-        #     next_term = Polynomial([
-        #         GaloisFieldElement(power, self.galois_field),  # a⁰
-        #         GaloisFieldElement(1, self.galois_field)  # a^power
-        #     ])
-        #     print(next_term)
-        #     current = current * next_term
-        #
-        # return current
 
-        alpha_0 = self.galois_field.log_table[2]
+        stream = np.frombuffer(codewords + b"".join(block for group in error_correction_blocks for block in group),
+                               dtype=np.uint8)
+        return stream[self._interleave_permutation(self.version, self.error_correction.value)].tobytes()
+
+    def _deinterleave_codewords(self, final_codewords: bytes) -> list[bytes]:
+        """Split a final codeword sequence back into its blocks, undoing the interleaving.
 
-        print(alpha_0)
+        Args:
+            final_codewords: The codewords as placed in the matrix
 
+        Returns:
+            list[bytes]: The data codewords followed by the error correction codewords of every block.
+        """
 
-    def _generate_polynomials(self) -> None:
-        generatorPolynomial = self.create_generator_polynomial()
-        #print(generatorPolynomial)
-        messagePolynomial = Polynomial([int(codeword, 2) for codeword in self.codewords][::-1])
+        permutation = self._interleave_permutation(self.version, self.error_correction.value)
+        stream = np.empty(len(permutation), dtype=np.uint8)
+        stream[permutation] = np.frombuffer(final_codewords, dtype=np.uint8)
+        stream = stream.tobytes()
 
+        distribution = self.codeword_block_distribution
+        error_correction_length = self.error_correction_codewords
+        error_correction_start = self.required_codewords
 
+        blocks, start = [], 0
+        for length in np.repeat(distribution[1::2], distribution[::2]).tolist():
+            blocks.append(stream[start:start + length] +
+                          stream[error_correction_start:error_correction_start + error_correction_length])
+            start += length
+            error_correction_start += error_correction_length
 
-    def _encode_data(self) -> str:
-        """Encode the data according to the encoding mode.
+        return blocks
+
+    def verify(self, modules: np.ndarray | None = None) -> int:
+        """Read the codewords back out of a symbol and check them with the Reed-Solomon decoder.
+
+        Args:
+            modules: A module matrix of this QR code, e.g. from a scan of the printed code
+                (optional, this code's own modules if not given)
 
         Returns:
-            str: The encoded data in binary format.
+            int: The number of codewords that had to be corrected
+
+        Raises:
+            ValueError: If the symbol is too damaged to correct, or does not hold this code's data
         """
 
-        encoded_data = ""
+        if modules is None:
+            modules = self.modules
+
+        with self.profiler.stage("verification"):
+            length = len(self._interleave_permutation(self.version, self.error_correction.value))
+            final_codewords = self.matrix.read_data(modules, self.mask, length)
+            results = self.reed_solomon.decode_blocks(self._deinterleave_codewords(final_codewords),
+                                                      self.error_correction_codewords)
+
+            if b"".join(data for data, _ in results) != self.codewords:
+                raise ValueError("Symbol does not hold the data of this QR code")
+            return sum(errors for _, errors in results)
 
-        match self.mode:
+    def _encode_data(self, buffer: BitBuffer, segment: Segment) -> None:
+        """Encode a segment of the data according to its encoding mode.
+
+        Args:
+            buffer: The bit buffer to write the encoded data to.
+            segment: The segment to encode.
+        """
+
+        values = self._get_segment_values(segment)
+
+        match segment.mode:
             case self.MODES.NUMERIC:
-                encoded_data = self._encode_numeric()
+                self._encode_numeric(buffer, values)
             case self.MODES.ALPHANUMERIC:
-                encoded_data = self._encode_alphanumeric()
+                self._encode_alphanumeric(buffer, values)
             case self.MODES.BYTE:
-                encoded_data = self._encode_byte()
+                self._encode_byte(buffer, values)
             case self.MODES.KANJI:
-                encoded_data = self._encode_kanji()
-
-        return encoded_data
+                self._encode_kanji(buffer, values)
 
-    def _encode_numeric(self) -> str:
-        """Encode numeric data into binary string.
+    def _get_segment_values(self, segment: Segment) -> bytes:
+        """Determine the per-character values of a segment in its mode.
 
-        Splits into groups of 3 digits, then encodes each group into binary.
+        A segment covering all the data in the classified mode reuses the classifier's values.
 
         Returns:
-            str: The encoded data in binary format.
+            bytes: Digit or alphanumeric values, UTF-8 bytes or Shift JIS bytes
         """
 
-        encoded_data = ""
+        if segment.mode == self.mode and segment.data is self.data:
+            return self.character_values
+        if not isinstance(segment.data, str):
+            return segment.data
 
-        for i in range(0, len(self.data), 3):
-            chunk = self.data[i:i + 3]
-            encoded_data += self.toBinary(int(chunk), (1 + (3 * len(chunk))))
-
-        return encoded_data
+        match segment.mode:
+            case self.MODES.NUMERIC | self.MODES.ALPHANUMERIC:
+                return segment.data.encode('ascii').translate(self.ALPHANUMERIC_VALUES)
+            case self.MODES.BYTE:
+                return segment.data.encode('utf-8')
+            case self.MODES.KANJI:
+                values = self._kanji_values(segment.data)
+                if values is None:
+                    raise ValueError("Segment contains characters that cannot be encoded in Kanji mode")
+                return values
 
-    def _encode_alphanumeric(self) -> str:
-        """Encode alphanumeric data into binary string.
+    def _encode_numeric(self, buffer: BitBuffer, values: bytes) -> None:
+        """Encode numeric data.
 
-        Splits into pairs of 2 characters, then encodes each pair into binary using an alphanumeric lookup table.
+        Splits into groups of 3 digits, then encodes each group into 10 bits (or 4/7 bits for a shorter final group).
+        Whole groups are computed as one array and packed into the buffer in bulk.
 
-        Returns:
-            str: The encoded data in binary format.
+        Args:
+            buffer: The bit buffer to write the encoded data to.
+            values: The value of each digit.
         """
 
-        encoded_data = ""
+        digits = np.frombuffer(values, dtype=np.uint8)
+        whole = len(digits) - len(digits) % 3
 
-        for i in range(0, len(self.data), 2):
-            if i + 1 < len(self.data):
-                first_char = self.ALPHANUMERIC_CHARACTERS.index(self.data[i])
-                second_char = self.ALPHANUMERIC_CHARACTERS.index(self.data[i + 1])
-                value = first_char * 45 + second_char
-                encoded_data += self.toBinary(value, 11)
-            else:
-                value = self.ALPHANUMERIC_CHARACTERS.index(self.data[i])
-                encoded_data += self.toBinary(value, 6)
+        buffer.append_array(digits[:whole].reshape(-1, 3).astype(np.uint16) @ np.array([100, 10, 1], dtype=np.uint16),
+                            10)
 
-        return encoded_data
+        value = 0
+        for digit in values[whole:]:
+            value = value * 10 + digit
+        if whole < len(values):
+            buffer.append(value, 1 + 3 * (len(values) - whole))
 
-    def _encode_byte(self) -> str:
-        """Encode byte data into binary string.
+    def _encode_alphanumeric(self, buffer: BitBuffer, values: bytes) -> None:
+        """Encode alphanumeric data.
 
-        Returns:
-            str: The encoded data in binary format.
+        Splits into pairs of 2 characters, then encodes each pair into 11 bits (or 6 bits for a final single character).
+        Whole pairs are computed as one array and packed into the buffer in bulk.
+
+        Args:
+            buffer: The bit buffer to write the encoded data to.
+            values: The alphanumeric value of each character.
         """
 
-        return ''.join(self.toBinary(byte, 8) for byte in self.data.encode('utf-8'))
+        characters = np.frombuffer(values, dtype=np.uint8)
+        pairs = characters[:len(characters) & ~1].reshape(-1, 2).astype(np.uint16)
 
-    def _encode_kanji(self) -> str:
-        """Encode Kanji data into binary string.
+        buffer.append_array(pairs[:, 0] * 45 + pairs[:, 1], 11)
+        if len(values) % 2:
+            buffer.append(values[-1], 6)
 
-        Returns:
-            str: The encoded data in binary format.
+    def _encode_byte(self, buffer: BitBuffer, data: bytes) -> None:
+        """Encode byte data.
+
+        Args:
+            buffer: The bit buffer to write the encoded data to.
+            data: The UTF-8 bytes to encode.
         """
 
-        encoded_data = ""
-        shift_jis_bytes = self.data.encode('shift-jis')
+        buffer.append_bytes(data)
 
-        for i in range(0, len(shift_jis_bytes), 2):
-            byte_pair = shift_jis_bytes[i:i + 2]
-            value = byte_pair[0] << 8 | byte_pair[1]
+    def _encode_kanji(self, buffer: BitBuffer, values: np.ndarray) -> None:
+        """Encode Kanji data as 13 bits per character.
 
-            if 0x8140 <= value <= 0x9FFC:
-                value -= 0x8140
-            elif 0xE040 <= value <= 0xEBBF:
-                value -= 0xC140
+        Args:
+            buffer: The bit buffer to write the encoded data to.
+            values: The 13-bit Kanji mode value of each character.
+        """
 
-            msb = value >> 8
-            lsb = value & 0xFF
-            value = msb * 0xC0 + lsb
-            encoded_data += self.toBinary(value, 13)
+        buffer.append_array(values, 13)
 
-        return encoded_data
+    def _determine_character_count_indicator_length(self, mode: MODES, version: int | None = None) -> int:
+        """Determine the appropriate length of the character count indicator for a mode.
 
-    def _determine_character_count_indicator_length(self) -> int:
-        """Determine the appropriate length of the character count indicator for the data.
+        Args:
+            mode: The encoding mode of the segment
+            version: The QR code version (optional, defaults to this code's version)
 
         Returns:
             int: The length of the character count indicator
         """
 
-        for indicator in self.CHARACTER_COUNT_INDICATORS:
-            if indicator[0] <= self.version <= indicator[1]:
-                return indicator[2][int(math.log(self.mode.value, 2))]
-        raise ValueError("Data length is out of range")
+        try:
+            return self.CHARACTER_COUNT_INDICATOR_LENGTHS[(version or self.version, mode.value)]
+        except KeyError:
+            raise ValueError("Data length is out of range") from None
 
-    def _determine_encoding_mode(self) -> MODES:
-        """Determine the appropriate encoding mode for the data.
+    @classmethod
+    def _classify(cls, data: str | bytes | bytearray | memoryview) -> tuple[MODES, bytes | memoryview | np.ndarray]:
+        """Determine the single mode that can encode all the data, with the value of every character in it.
 
-        Returns:
-            MODES: Either numeric, alphanumeric, byte, or kanji mode
-        """
-        if self.data.isascii():
-            return self._get_ascii_mode()
-        return self._get_non_ascii_mode()
+        ASCII data is classified with one pass over its bytes through the alphanumeric value
+        table; other data is Kanji if every character is a double byte Shift JIS Kanji character.
+        Bytes-like data is always byte mode, and is returned without copying unless it is a
+        non-contiguous view.
 
-    def _is_alphanumeric(self) -> bool:
-        """Determine if the data is alphanumeric.
+        Args:
+            data: The data to classify
 
         Returns:
-            bool: True if all characters in the string are alphanumeric, False otherwise
+            MODES: Numeric, alphanumeric, Kanji or otherwise byte mode
+            bytes | memoryview | np.ndarray: Digit or alphanumeric values, Kanji values or the bytes to encode respectively
         """
 
-        return all(char in self.ALPHANUMERIC_CHARACTERS for char in self.data)
+        if not isinstance(data, str):
+            if isinstance(data, memoryview):
+                return cls.MODES.BYTE, data.cast('B') if data.c_contiguous else data.tobytes()
+            return cls.MODES.BYTE, data
 
-    def _get_ascii_mode(self) -> MODES:
-        """Determine mode for ASCII characters.
+        if data.isascii():
+            encoded = data.encode('ascii')
+            values = encoded.translate(cls.ALPHANUMERIC_VALUES)
+            if encoded.isdigit():
+                return cls.MODES.NUMERIC, values
+            if b"\xff" not in values:
+                return cls.MODES.ALPHANUMERIC, values
+            return cls.MODES.BYTE, encoded
+
+        values = cls._kanji_values(data)
+        if values is not None:
+            return cls.MODES.KANJI, values
+
+        return cls.MODES.BYTE, data.encode('utf-8')
+
+    @staticmethod
+    def _code_points(data: str) -> np.ndarray:
+        return np.frombuffer(data.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+    @classmethod
+    def _kanji_values(cls, data: str) -> np.ndarray | None:
+        """Look up the 13-bit Kanji mode value of every character.
 
         Returns:
-            MODES: Either numeric, alphanumeric, or byte  mode
+            np.ndarray | None: The values, or None if any character cannot be encoded in Kanji mode
         """
 
-        if self.data.isnumeric():
-            return self.MODES.NUMERIC
-        elif self._is_alphanumeric():
-            return self.MODES.ALPHANUMERIC
-        return self.MODES.BYTE
+        code_points = cls._code_points(data)
+        if code_points.max() >= 0x10000:
+            return None
+
+        values = _kanji_table()[code_points]
+        if (values == NOT_KANJI).any():
+            return None
+        return values
 
-    def _get_non_ascii_mode(self) -> MODES:
-        """Determine mode for non-ASCII characters.
+    @classmethod
+    def _character_classes(cls, data: str) -> bytes:
+        """Determine the modes each character can be encoded in.
 
         Returns:
-            MODES: Either byte or kanji mode
+            bytes: For every character, the bitwise OR of the values of the modes that can encode it
         """
 
-        try:
-            self.data.encode('shift-jis').decode('shift-jis')
-            return self.MODES.KANJI
-        except UnicodeError:
-            return self.MODES.BYTE
+        if data.isascii():
+            return data.encode('ascii').translate(cls.CHARACTER_CLASSES)
+
+        code_points = cls._code_points(data)
+        classes = np.full(len(code_points), cls.MODES.BYTE.value, dtype=np.uint8)
+
+        ascii_characters = code_points < 0x80
+        classes[ascii_characters] = np.frombuffer(cls.CHARACTER_CLASSES, dtype=np.uint8)[code_points[ascii_characters]]
+
+        basic = np.flatnonzero(code_points < 0x10000)
+        classes[basic[_kanji_table()[code_points[basic]] != NOT_KANJI]] |= cls.MODES.KANJI.value
+
+        return classes.tobytes()
 
     def _get_data_length(self) -> int:
         """Determine the length of the data to encode in the QR code.
@@ -716,7 +1067,7 @@ class QRCode:
         """
 
         if self.mode == self.MODES.BYTE:
-            return len(self.data.encode('utf-8'))
+            return len(self.character_values)
         return len(self.data)
 
     def _determine_version(self) -> int:
@@ -726,13 +1077,202 @@ class QRCode:
             int: The QR code version to use
         """
 
-        for version in range(1, 41):
-            versionCapacity = self.CAPACITIES[(version, self.error_correction.value, self.mode.value)]
-            if versionCapacity >= self.data_length:
-                return version
+        capacities = self.CAPACITY_INDEX[(self.error_correction.value, self.mode.value)]
+        index = bisect_left(capacities, self.data_length)
+
+        if index == len(capacities):
+            raise ValueError("Data too large for QR code")
+        return index + 1
+
+    def _determine_version_and_segments(self, version: int | None = None) -> tuple[int, list[Segment]]:
+        """Determine the QR code version and the segmentation of the data that needs the fewest bits.
+
+        Data that is all numeric, all Kanji, alphanumeric without digits, or made only of characters
+        that byte mode alone can encode is always best as one segment, so only the capacity lookup is
+        needed (unless a structured append or ECI header takes up part of the capacity). Otherwise the
+        data is segmented for the smallest character count indicator range first. Segments only get
+        longer in later ranges, so it is segmented again only for the range of the smallest version
+        that could still fit, until the segments fit a version in the range they were made for.
+
+        Args:
+            version: The QR code version to use (optional)
+
+        Returns:
+            int: The QR code version to use
+            list[Segment]: The segments to encode
+        """
+
+        single_segment = (not isinstance(self.data, str) or self.mode in (self.MODES.NUMERIC, self.MODES.KANJI) or
+                          (self.mode == self.MODES.ALPHANUMERIC and min(self.character_values) >= 10) or
+                          (self.mode == self.MODES.BYTE and
+                           not self._character_classes(self.data).strip(bytes([self.MODES.BYTE.value]))))
+
+        if single_segment and not self.structured_append and self.eci is None:
+            segments = [self.Segment(self.mode, self.data)]
+            if not version:
+                return self._determine_version(), segments
+        elif single_segment:
+            segments = [self.Segment(self.mode, self.data)]
+        elif version:
+            segments = self._segment_data(self.data, version)
+
+        if version:
+            bit_length = self._get_segments_bit_length(segments, version)
+            if bit_length is None or (bit_length + self._get_header_bit_length() >
+                                      self.DATA_BIT_CAPACITY_INDEX[self.error_correction.value][version - 1]):
+                raise ValueError("Data too large for QR code version")
+            return version, segments
+
+        capacities = self.DATA_BIT_CAPACITY_INDEX[self.error_correction.value]
+        header_length = self._get_header_bit_length()
+        ranges = self.CHARACTER_COUNT_INDICATORS
+        range_index = 0
+
+        while range_index < len(ranges):
+            first, last, _ = ranges[range_index]
+            if not single_segment:
+                segments = self._segment_data(self.data, first)
+            bit_length = self._get_segments_bit_length(segments, first)
+            if bit_length is None:
+                range_index += 1
+                continue
+
+            index = bisect_left(capacities, bit_length + header_length, first - 1)
+            if index < last:
+                return index + 1, segments
+            range_index = next((i for i, (_, later_last, _) in enumerate(ranges) if index < later_last), len(ranges))
 
         raise ValueError("Data too large for QR code")
 
+    @classmethod
+    def _eci_header_bit_length(cls, eci: int | None) -> int:
+        """Determine the number of bits taken by an ECI header: the mode indicator and a 1 to 3 byte designator.
+
+        Returns:
+            int: The header length in bits, 0 if there is no ECI designator
+        """
+
+        if eci is None:
+            return 0
+        return 4 + (8 if eci < 1 << 7 else 16 if eci < 1 << 14 else 24)
+
+    def _get_header_bit_length(self) -> int:
+        """Determine the number of bits taken by the structured append and ECI headers.
+
+        Returns:
+            int: The header length in bits, 0 if there are none
+        """
+
+        bit_length = self.STRUCTURED_APPEND_HEADER_LENGTH if self.structured_append else 0
+        return bit_length + self._eci_header_bit_length(self.eci)
+
+    @classmethod
+    def _segment_data(cls, data: str, version: int) -> list[Segment]:
+        """Split the data into the mode segments that encode it in the fewest bits for a version.
+
+        Dynamic programming over the characters: for every prefix and every mode it is in at
+        the end, keep the cheapest cost (in sixths of a bit, so numeric and alphanumeric
+        characters cost whole units) and the mode the previous character was in. Switching
+        mode costs a segment header; segments always end on a whole bit.
+
+        Args:
+            data: The text to segment
+            version: The QR code version that sets the character count indicator lengths
+
+        Returns:
+            list[Segment]: The optimal segments, in order.
+        """
+
+        is_ascii = data.isascii()
+        modes = [cls.MODES.BYTE, cls.MODES.ALPHANUMERIC, cls.MODES.NUMERIC]
+        if not is_ascii:
+            modes.append(cls.MODES.KANJI)
+
+        numeric, alphanumeric, kanji = (cls.MODES.NUMERIC.value, cls.MODES.ALPHANUMERIC.value,
+                                        cls.MODES.KANJI.value)
+        unreachable = 1 << 62
+        head_costs = [(4 + cls.CHARACTER_COUNT_INDICATOR_LENGTHS[(version, mode.value)]) * 6 for mode in modes]
+        previous_costs = head_costs.copy()
+        character_modes = []
+        mode_indices = list(range(len(modes)))
+
+        for char, character_class in zip(data, cls._character_classes(data)):
+            costs = [previous_costs[0] + (48 if is_ascii or char.isascii() else len(char.encode('utf-8')) * 48),
+                     previous_costs[1] + 33 if character_class & alphanumeric else unreachable,
+                     previous_costs[2] + 20 if character_class & numeric else unreachable]
+            if not is_ascii:
+                costs.append(previous_costs[3] + 78 if character_class & kanji else unreachable)
+
+            # from_modes[j] is the mode this character is encoded in when the data so far ends in modes[j].
+            # Switching into any mode is cheapest from the mode whose segment ends on the fewest whole bits.
+            from_modes = mode_indices.copy()
+            rounded = [(cost + 5) // 6 * 6 for cost in costs]
+            switched = min(rounded)
+            source = rounded.index(switched)
+            for j, head_cost in enumerate(head_costs):
+                if switched + head_cost < costs[j]:
+                    costs[j], from_modes[j] = switched + head_cost, source
+
+            character_modes.append(from_modes)
+            previous_costs = costs
+
+        current = min(range(len(modes)), key=lambda j: previous_costs[j])
+        segment_modes = [0] * len(data)
+        for i in range(len(data) - 1, -1, -1):
+            current = character_modes[i][current]
+            segment_modes[i] = current
+
+        segments = []
+        start = 0
+        for i in range(1, len(data) + 1):
+            if i == len(data) or segment_modes[i] != segment_modes[start]:
+                segments.append(cls.Segment(modes[segment_modes[start]], data[start:i]))
+                start = i
+
+        return segments
+
+    def _get_segment_length(self, segment: Segment) -> int:
+        """Determine the character count of a segment.
+
+        Returns:
+            int: The number of bytes in a byte segment, otherwise the number of characters
+        """
+
+        if segment.mode == self.MODES.BYTE:
+            if isinstance(segment.data, str):
+                return len(segment.data.encode('utf-8'))
+            return memoryview(segment.data).nbytes
+        return len(segment.data)
+
+    def _get_segments_bit_length(self, segments: list[Segment], version: int) -> int | None:
+        """Determine the number of data bits needed to encode some segments in a version.
+
+        Returns:
+            int | None: The number of bits, or None if a segment is too long for its character count indicator
+        """
+
+        bit_length = 0
+
+        for segment in segments:
+            indicator_length = self._determine_character_count_indicator_length(segment.mode, version)
+            length = self._get_segment_length(segment)
+            if length >= 1 << indicator_length:
+                return None
+
+            match segment.mode:
+                case self.MODES.NUMERIC:
+                    bit_length += 10 * (length // 3) + (0, 4, 7)[length % 3]
+                case self.MODES.ALPHANUMERIC:
+                    bit_length += 11 * (length // 2) + 6 * (length % 2)
+                case self.MODES.BYTE:
+                    bit_length += 8 * length
+                case self.MODES.KANJI:
+                    bit_length += 13 * length
+
+            bit_length += 4 + indicator_length
+
+        return bit_length
+
     def _get_alignment_positions(self) -> list[int]:
         """Determine the alignment positions for the data based on the encoding mode.
 
@@ -740,4 +1280,301 @@ class QRCode:
             list[int]: A list of alignment positions
         """
 
-        return self.ALIGNMENT_POSITIONS[self.version]
+        return self.ALIGNMENT_POSITIONS[self.version - 1]
+
+    def render(self, file_format: str = "svg", border: int = 4, scale: int = 1) -> bytes:
+        """Render the QR code as a PBM, PNG or SVG image.
+
+        Args:
+            file_format: One of "pbm", "png" or "svg"
+            border: Width of the quiet zone in modules
+            scale: Pixels per module for raster formats
+
+        Returns:
+            bytes: The encoded image.
+        """
+
+        with self.profiler.stage("rendering"):
+            return Renderer(self.modules, border, scale).render(file_format)
+
+    def save(self, path: str | os.PathLike, border: int = 4, scale: int = 1) -> None:
+        """Save the QR code as an image, choosing the format from the file extension.
+
+        Args:
+            path: The .pbm, .png or .svg file to write
+            border: Width of the quiet zone in modules
+            scale: Pixels per module for raster formats
+        """
+
+        with self.profiler.stage("rendering"):
+            Renderer(self.modules, border, scale).save(path)
+
+# WORKER FUNCTIONS #
+
+def _encode_structured_append_symbol(arguments: tuple[str | bytes, QRCode.ERROR_CORRECTIONS, tuple[int, int, int],
+                                                     int | None]) -> QRCode:
+    """Encode one symbol of a structured append sequence in a worker process."""
+
+    data, error_correction, structured_append, eci = arguments
+    return QRCode(data, error_correction, structured_append=structured_append, eci=eci)
+
+# QR CODE CLASS TESTS #
+
+class TestQRCode(unittest.TestCase):
+
+    def test_single_mode_segments(self):
+        for data, mode in (("8675309", QRCode.MODES.NUMERIC), ("HELLO WORLD", QRCode.MODES.ALPHANUMERIC),
+                           ("Hello, world!", QRCode.MODES.BYTE), ("茗荷", QRCode.MODES.KANJI)):
+            self.assertEqual(QRCode(data).segments, [QRCode.Segment(mode, data)])
+
+    def test_classify(self):
+        self.assertEqual(QRCode._classify("8675309"), (QRCode.MODES.NUMERIC, bytes([8, 6, 7, 5, 3, 0, 9])))
+        self.assertEqual(QRCode._classify("AC-42"), (QRCode.MODES.ALPHANUMERIC, bytes([10, 12, 41, 4, 2])))
+        self.assertEqual(QRCode._classify("ac-42"), (QRCode.MODES.BYTE, b"ac-42"))
+        mode, values = QRCode._classify("茗荷")
+        self.assertEqual((mode, values.tolist()), (QRCode.MODES.KANJI, [0x1AAA, 0x0697]))
+        self.assertEqual(QRCode._classify("茗a"), (QRCode.MODES.BYTE, "茗a".encode("utf-8")))
+        self.assertEqual(QRCode._classify("é"), (QRCode.MODES.BYTE, "é".encode("utf-8")))
+        self.assertEqual(QRCode._classify("ｱ"), (QRCode.MODES.BYTE, "ｱ".encode("utf-8")))
+
+        self.assertEqual(QRCode._character_classes("1Aa茗éｱ"), bytes([7, 6, 4, 12, 4, 4]))
+
+    def test_kanji_table(self):
+        table = _build_kanji_table()
+        self.assertTrue(np.array_equal(_kanji_table(), np.frombuffer(table, dtype=np.uint16)))
+
+        for char in "茗荷点亜熙":
+            code = int.from_bytes(char.encode("shift-jis"), "big")
+            value = code - (0x8140 if code <= 0x9FFC else 0xC140)
+            self.assertEqual(table[ord(char)], (value >> 8) * 0xC0 + (value & 0xFF))
+        self.assertEqual(table[ord("ｱ")], NOT_KANJI)
+        self.assertEqual(table[ord("A")], NOT_KANJI)
+
+    def test_kanji_sidecar(self):
+        expected = np.frombuffer(_build_kanji_table(), dtype=np.uint16)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache", "kanji.bin")
+            self.assertTrue(np.array_equal(_load_kanji_table(path), expected))
+            self.assertTrue(np.array_equal(_load_kanji_table(path), expected))
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["kanji.bin"])
+
+            # A foreign file of the right size is rebuilt rather than trusted.
+            with open(path, "wb") as file:
+                file.write(b"\0" * (KANJI_SIDECAR_HEADER.size + 2 * 0x10000))
+            self.assertTrue(np.array_equal(_load_kanji_table(path), expected))
+            with open(path, "rb") as file:
+                self.assertTrue(file.read().startswith(KANJI_SIDECAR_MAGIC))
+
+    def test_encode_numeric_and_alphanumeric(self):
+        code = QRCode("8675309", lazy=True)
+        for data, encode, expected in (("8675309", code._encode_numeric, "1101100011" "1000010010" "1001"),
+                                       ("86753", code._encode_numeric, "1101100011" "0110101"),
+                                       ("HELLO WORLD", code._encode_alphanumeric,
+                                        "01100001011" "01111000110" "10001011100" "10110111000" "10011010100" "001101")):
+            buffer = BitBuffer()
+            encode(buffer, QRCode._classify(data)[1])
+            self.assertEqual(len(buffer), len(expected))
+            padded = expected + "0" * (-len(expected) % 8)
+            self.assertEqual(buffer.to_bytes(), int(padded, 2).to_bytes(len(padded) // 8, "big"))
+
+    def test_eci(self):
+        code = QRCode("héllo", eci=QRCode.ECI_UTF8)
+        self.assertEqual(code.codewords[:3], bytes([0b01110001, 0b10100100, 0b00000110]))
+        self.assertEqual(code._get_header_bit_length(), 12)
+
+        for eci, length in ((127, 12), (128, 20), (16383, 20), (16384, 28), (999999, 28)):
+            self.assertEqual(QRCode("A", eci=eci, lazy=True)._get_header_bit_length(), length)
+            self.assertEqual(QRCode._eci_header_bit_length(eci), length)
+        self.assertEqual(QRCode._eci_header_bit_length(None), 0)
+        self.assertRaises(ValueError, QRCode, "A", eci=1000000)
+
+        self.assertTrue(QRCode.fits("1" * 41, QRCode.ERROR_CORRECTIONS.L, 1))
+        self.assertFalse(QRCode.fits("1" * 41, QRCode.ERROR_CORRECTIONS.L, 1, eci=3))
+
+    def test_bytes_data(self):
+        import pickle
+
+        data = bytes(range(256)) * 4
+        code = QRCode(data, QRCode.ERROR_CORRECTIONS.L)
+        self.assertIs(code.character_values, data)
+        self.assertEqual(code.segments, [QRCode.Segment(QRCode.MODES.BYTE, data)])
+        payload_bits = 8 * len(data)
+        codeword_bits = 8 * len(code.codewords)
+        self.assertEqual(int.from_bytes(code.codewords, "big") >> (codeword_bits - 20 - payload_bits) &
+                         ((1 << payload_bits) - 1), int.from_bytes(data, "big"))
+
+        view = memoryview(bytearray(data))
+        self.assertTrue(np.array_equal(QRCode(view, QRCode.ERROR_CORRECTIONS.L).modules, code.modules))
+        self.assertEqual(QRCode(b"HELLO").segments, [QRCode.Segment(QRCode.MODES.BYTE, b"HELLO")])
+
+        strided = memoryview(bytearray(data * 2))[::2]
+        self.assertTrue(np.array_equal(QRCode(strided, QRCode.ERROR_CORRECTIONS.L).modules,
+                                       QRCode(bytes(strided), QRCode.ERROR_CORRECTIONS.L).modules))
+
+        restored = pickle.loads(pickle.dumps(QRCode(view, QRCode.ERROR_CORRECTIONS.L, lazy=True)))
+        self.assertTrue(np.array_equal(restored.modules, code.modules))
+
+    def test_mixed_mode_segments(self):
+        code = QRCode("123456789012345678901234567890a", QRCode.ERROR_CORRECTIONS.M)
+        self.assertEqual(code.segments, [QRCode.Segment(QRCode.MODES.NUMERIC, "123456789012345678901234567890"),
+                                         QRCode.Segment(QRCode.MODES.BYTE, "a")])
+        self.assertEqual(code.version, 2)
+        self.assertEqual(code._determine_version(), 3)
+
+    def test_segmentation_ranges(self):
+        self.assertEqual(QRCode("a" * 2900, QRCode.ERROR_CORRECTIONS.L, lazy=True).segments,
+                         [QRCode.Segment(QRCode.MODES.BYTE, "a" * 2900)])
+        self.assertEqual(QRCode("é" * 100, lazy=True).segments, [QRCode.Segment(QRCode.MODES.BYTE, "é" * 100)])
+
+        # Versions in every character count indicator range, reached from the smallest range.
+        for data, version in (("1a" * 30, 4), ("1a" * 100, 10), ("1a" * 1000, 38)):
+            qr_code = QRCode(data, QRCode.ERROR_CORRECTIONS.M, lazy=True)
+            self.assertEqual(qr_code.version, version)
+            for earlier in range(1, version):
+                self.assertFalse(QRCode.fits(data, QRCode.ERROR_CORRECTIONS.M, earlier))
+            self.assertTrue(QRCode.fits(data, QRCode.ERROR_CORRECTIONS.M, version))
+
+    def test_segments_are_optimal(self):
+        from itertools import product
+
+        code = QRCode("A1b", QRCode.ERROR_CORRECTIONS.M)
+        for data in ("".join(chars) for length in range(1, 6) for chars in product("0A:a", repeat=length)):
+            segments = QRCode._segment_data(data, 1)
+            self.assertEqual("".join(segment.data for segment in segments), data)
+
+            best = code._get_segments_bit_length([QRCode.Segment(QRCode.MODES.BYTE, data)], 1)
+            modes_to_try = (QRCode.MODES.NUMERIC, QRCode.MODES.ALPHANUMERIC, QRCode.MODES.BYTE)
+            for modes in product(modes_to_try, repeat=len(data)):
+                candidate = [QRCode.Segment(mode, char) for mode, char in zip(modes, data)]
+                if all(self._can_encode(segment) for segment in candidate):
+                    merged = []
+                    for segment in candidate:
+                        if merged and merged[-1].mode == segment.mode:
+                            merged[-1] = QRCode.Segment(segment.mode, merged[-1].data + segment.data)
+                        else:
+                            merged.append(segment)
+                    best = min(best, code._get_segments_bit_length(merged, 1))
+
+            self.assertEqual(code._get_segments_bit_length(segments, 1), best)
+
+    def test_mask(self):
+        self.assertEqual(QRCode("HELLO WORLD", mask=0).mask, 0)
+        self.assertEqual(QRCode("HELLO WORLD", mask=7).mask, 7)
+        self.assertRaises(ValueError, QRCode, "HELLO WORLD", mask=-1)
+        self.assertRaises(ValueError, QRCode, "HELLO WORLD", mask=8)
+
+    def test_lazy(self):
+        qr_code = QRCode("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q, lazy=True)
+        self.assertEqual(qr_code.version, 1)
+        self.assertNotIn("codewords", vars(qr_code))
+
+        self.assertEqual(qr_code.mask, 6)
+        self.assertIs(qr_code.codeword_blocks, qr_code.blocks)
+        self.assertTrue(np.array_equal(qr_code.modules, QRCode("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q).modules))
+
+    def test_blocks_and_interleaving(self):
+        qr_code = QRCode("A" * 1000, QRCode.ERROR_CORRECTIONS.Q)
+        blocks = [block for group in qr_code.blocks for block in group]
+        self.assertEqual(qr_code.codeword_block_distribution, [7, 24, 22, 25])
+        self.assertEqual([len(block) for block in blocks], [24] * 7 + [25] * 22)
+        self.assertTrue(all(block.obj is qr_code.codewords for block in blocks))
+
+        error_correction_blocks = [block for group in qr_code.error_correction_blocks for block in group]
+        expected = bytearray()
+        for column in range(25):
+            expected += bytes(block[column] for block in blocks if column < len(block))
+        for column in range(qr_code.error_correction_codewords):
+            expected += bytes(block[column] for block in error_correction_blocks)
+        self.assertEqual(qr_code.final_codewords, bytes(expected))
+
+    def test_verify(self):
+        qr_code = QRCode("HELLO WORLD" * 20, QRCode.ERROR_CORRECTIONS.Q)
+        blocks = qr_code._deinterleave_codewords(qr_code.final_codewords)
+        self.assertEqual(blocks, [bytes(data) + error_correction for data, error_correction in
+                                  zip((block for group in qr_code.blocks for block in group),
+                                      (block for group in qr_code.error_correction_blocks for block in group))])
+        self.assertEqual(qr_code.verify(), 0)
+
+        damaged = qr_code.modules.copy()
+        damaged[-8:, -8:] ^= 1
+        self.assertGreater(qr_code.verify(damaged), 0)
+
+        self.assertRaises(ValueError, qr_code.verify, 1 - qr_code.modules)
+        self.assertRaises(ValueError, qr_code.verify, QRCode("HELLO EARTH" * 20, QRCode.ERROR_CORRECTIONS.Q,
+                                                              mask=qr_code.mask).modules)
+
+    def test_fits(self):
+        self.assertTrue(QRCode.fits("1" * 41, QRCode.ERROR_CORRECTIONS.L, 1))
+        self.assertFalse(QRCode.fits("1" * 42, QRCode.ERROR_CORRECTIONS.L, 1))
+        self.assertTrue(QRCode.fits("HELLO WORLD" * 2, QRCode.ERROR_CORRECTIONS.L, 2))
+        self.assertFalse(QRCode.fits("HELLO WORLD" * 2, QRCode.ERROR_CORRECTIONS.H, 2))
+        self.assertFalse(QRCode.fits("1" * 8000))
+        self.assertFalse(QRCode.fits("HELLO WORLD", version=41))
+        self.assertFalse(QRCode.fits(b""))
+
+        # Settled by the bounds, between them, and just either side of a version's capacity.
+        text = "".join(f"item {i}: 1234567890 ABC {i * 37 % 1000}\n" for i in range(50))
+        version = QRCode(text, QRCode.ERROR_CORRECTIONS.M, lazy=True).version
+        for data in ("a" * 2000, "1" * 2000, "茗" * 1000, text, text[:-1] + "1", b"\xff" * 1000):
+            for candidate in (None, version - 1, version, version + 1):
+                try:
+                    expected = bool(QRCode(data, QRCode.ERROR_CORRECTIONS.M, candidate, lazy=True))
+                except ValueError:
+                    expected = False
+                self.assertEqual(QRCode.fits(data, QRCode.ERROR_CORRECTIONS.M, candidate), expected)
+
+    def test_profiler(self):
+        profiler = Profiler()
+        for data in ("HELLO WORLD", "8675309"):
+            QRCode(data, profiler=profiler).render("svg")
+        self.assertEqual(set(profiler.stages), {"mode_detection", "codewords", "blocks", "reed_solomon",
+                                                "interleaving", "placement", "masking", "rendering"})
+        self.assertTrue(all(statistics.calls == 2 for statistics in profiler.stages.values()))
+
+    def test_structured_append(self):
+        data = "SHIPMENT-0123456789:" * 200 + "config=on"
+        self.assertRaises(ValueError, QRCode, data, QRCode.ERROR_CORRECTIONS.H)
+        for header in ((16, 16, 0), (0, 17, 0), (3, 3, 0), (-1, 2, 0), (0, 2, 256), (0, 2, -1)):
+            self.assertRaises(ValueError, QRCode, "A", structured_append=header, lazy=True)
+        self.assertEqual(QRCode("A", structured_append=(15, 16, 255), lazy=True).structured_append, (15, 16, 255))
+
+        symbols = QRCode.structured_append_symbols(data, QRCode.ERROR_CORRECTIONS.H, workers=2)
+        self.assertGreater(len(symbols), 1)
+        self.assertEqual("".join(symbol.data for symbol in symbols), data)
+
+        parity = 0
+        for byte in data.encode('utf-8'):
+            parity ^= byte
+
+        for index, symbol in enumerate(symbols):
+            self.assertEqual(symbol.structured_append, (index, len(symbols), parity))
+            self.assertEqual(symbol.codewords[:3], bytes([0x30 | index, (len(symbols) - 1) << 4 | parity >> 4,
+                                                          (parity & 0xF) << 4 | symbol.codewords[2] & 0xF]))
+
+        config = "".join(f"option_{i}=value-{i * 7919 % 10007}\n" for i in range(1000))
+        for data in (config, config.encode("utf-8")):
+            chunks = QRCode._split_for_structured_append(data, QRCode.ERROR_CORRECTIONS.M, 16, 0)
+            self.assertEqual(len(chunks), 10)
+            self.assertEqual(chunks[0][:0].join(chunks), data)
+            for index, chunk in enumerate(chunks):
+                self.assertTrue(QRCode(chunk, QRCode.ERROR_CORRECTIONS.M, structured_append=(index, 10, 0), lazy=True))
+
+        single = QRCode.structured_append_symbols("HELLO WORLD", workers=1)
+        self.assertEqual(len(single), 1)
+        self.assertEqual(single[0].structured_append[:2], (0, 1))
+
+    @staticmethod
+    def _can_encode(segment) -> bool:
+        match segment.mode:
+            case QRCode.MODES.NUMERIC:
+                return segment.data.isdigit()
+            case QRCode.MODES.ALPHANUMERIC:
+                return all(char in QRCode.ALPHANUMERIC_CHARACTERS for char in segment.data)
+            case QRCode.MODES.BYTE:
+                return True
+        return False
+
+
+if __name__ == '__main__':
+    unittest.main()
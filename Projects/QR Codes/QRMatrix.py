@@ -0,0 +1,472 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+# QR MATRIX CLASS #
+
+class QRMatrix:
+
+    FORMAT_GENERATOR = 0x537
+    FORMAT_MASK = 0x5412
+    VERSION_GENERATOR = 0x1F25
+
+    FINDER_LIKE_PATTERNS = (0b10111010000, 0b00001011101)
+
+    TEMPLATES: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+    DATA_INDICES: dict[int, np.ndarray] = {}
+    MASK_PATTERNS: dict[int, np.ndarray] = {}
+
+    def __init__(self, version: int, alignment_positions: list[int]):
+        """Initialise the module matrix for a QR code version.
+
+        The function patterns and the zig-zag data placement order only depend on the
+        version, so both are built once per version and shared by every QRMatrix.
+
+        Args:
+            version (int): QR code version, 1 to 40.
+            alignment_positions (list[int]): Alignment pattern centre coordinates for the version.
+        """
+
+        self.version = version
+        self.size = 4 * version + 17
+        self.alignment_positions = alignment_positions
+
+        self.template, self.reserved = self._get_template()
+        self.data_indices = self._get_data_indices()
+        self.mask_patterns = self._get_mask_patterns()
+
+    def _get_template(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the function pattern modules and the mask of reserved (non-data) modules.
+
+        Returns:
+            np.ndarray: uint8 modules with finder, separator, timing, alignment, dark module and version information drawn.
+            np.ndarray: bool mask of every function module, including the format information area.
+        """
+
+        cached = self.TEMPLATES.get(self.version)
+        if cached is not None:
+            return cached
+
+        size = self.size
+        modules = np.zeros((size, size), dtype=np.uint8)
+        reserved = np.zeros((size, size), dtype=bool)
+
+        # Timing patterns.
+
+        modules[6, :] = modules[:, 6] = (np.arange(size) + 1) % 2
+        reserved[6, :] = reserved[:, 6] = True
+
+        # Finder patterns with their separators.
+
+        finder = np.ones((7, 7), dtype=np.uint8)
+        finder[1:6, 1:6] = 0
+        finder[2:5, 2:5] = 1
+
+        for row, column in ((0, 0), (0, size - 7), (size - 7, 0)):
+            modules[max(row - 1, 0):row + 8, max(column - 1, 0):column + 8] = 0
+            reserved[max(row - 1, 0):row + 8, max(column - 1, 0):column + 8] = True
+            modules[row:row + 7, column:column + 7] = finder
+
+        # Alignment patterns, skipping the three that would overlap finder patterns.
+
+        alignment = np.ones((5, 5), dtype=np.uint8)
+        alignment[1:4, 1:4] = 0
+        alignment[2, 2] = 1
+
+        last = len(self.alignment_positions) - 1
+        for i, row in enumerate(self.alignment_positions):
+            for j, column in enumerate(self.alignment_positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                modules[row - 2:row + 3, column - 2:column + 3] = alignment
+                reserved[row - 2:row + 3, column - 2:column + 3] = True
+
+        # Format information area (filled per mask) and the dark module.
+
+        reserved[8, :9] = reserved[:9, 8] = True
+        reserved[8, size - 8:] = reserved[size - 8:, 8] = True
+        modules[size - 8, 8] = 1
+
+        # Version information.
+
+        if self.version >= 7:
+            bits = self.version << 12 | self._bch_remainder(self.version, self.VERSION_GENERATOR, 12)
+            block = np.array([(bits >> i) & 1 for i in range(18)], dtype=np.uint8).reshape(6, 3)
+            modules[:6, size - 11:size - 8] = block
+            modules[size - 11:size - 8, :6] = block.T
+            reserved[:6, size - 11:size - 8] = reserved[size - 11:size - 8, :6] = True
+
+        modules.flags.writeable = reserved.flags.writeable = False
+        self.TEMPLATES[self.version] = (modules, reserved)
+
+        return modules, reserved
+
+    def _get_data_indices(self) -> np.ndarray:
+        """Return the flat index of every data module in placement order.
+
+        Data is placed in two-module-wide columns from the right edge, alternating upwards
+        and downwards and skipping the vertical timing pattern.
+
+        Returns:
+            np.ndarray: intp indices into the raveled matrix.
+        """
+
+        cached = self.DATA_INDICES.get(self.version)
+        if cached is not None:
+            return cached
+
+        size = self.size
+        indices = []
+
+        for right in range(size - 1, 0, -2):
+            if right <= 6:
+                right -= 1
+            upward = ((right + 1) & 2) == 0
+            for vertical in range(size):
+                row = size - 1 - vertical if upward else vertical
+                for column in (right, right - 1):
+                    if not self.reserved[row, column]:
+                        indices.append(row * size + column)
+
+        data_indices = np.array(indices, dtype=np.intp)
+        data_indices.flags.writeable = False
+        self.DATA_INDICES[self.version] = data_indices
+
+        return data_indices
+
+    @staticmethod
+    def _bch_remainder(value: int, generator: int, length: int) -> int:
+        """Return the BCH error correction bits of value for a generator of the given length."""
+
+        remainder = value << length
+        for shift in range(remainder.bit_length() - generator.bit_length(), -1, -1):
+            if remainder & (1 << (shift + generator.bit_length() - 1)):
+                remainder ^= generator << shift
+        return remainder
+
+    @staticmethod
+    def mask_pattern(mask: int, size: int) -> np.ndarray:
+        """Return where a mask pattern flips modules, over the whole matrix.
+
+        Args:
+            mask (int): Mask pattern reference, 0 to 7.
+            size (int): Width of the matrix in modules.
+
+        Returns:
+            np.ndarray: bool matrix, True where the mask condition holds.
+        """
+
+        row, column = np.indices((size, size))
+
+        match mask:
+            case 0:
+                return (row + column) % 2 == 0
+            case 1:
+                return row % 2 == 0
+            case 2:
+                return column % 3 == 0
+            case 3:
+                return (row + column) % 3 == 0
+            case 4:
+                return (row // 2 + column // 3) % 2 == 0
+            case 5:
+                return (row * column) % 2 + (row * column) % 3 == 0
+            case 6:
+                return ((row * column) % 2 + (row * column) % 3) % 2 == 0
+            case 7:
+                return ((row + column) % 2 + (row * column) % 3) % 2 == 0
+
+        raise ValueError("Mask must be between 0 and 7")
+
+    def _get_mask_patterns(self) -> np.ndarray:
+        """Return all eight mask patterns restricted to the data modules, stacked.
+
+        Returns:
+            np.ndarray: uint8 array of shape (8, size, size), 1 where a mask flips a module.
+        """
+
+        cached = self.MASK_PATTERNS.get(self.version)
+        if cached is not None:
+            return cached
+
+        patterns = np.stack([self.mask_pattern(mask, self.size) & ~self.reserved for mask in range(8)])
+        patterns = patterns.astype(np.uint8)
+        patterns.flags.writeable = False
+        self.MASK_PATTERNS[self.version] = patterns
+
+        return patterns
+
+    def format_bits(self, error_correction: int, mask: int) -> int:
+        """Return the 15 format information bits for an error correction level and mask.
+
+        Args:
+            error_correction (int): Error correction level indicator (QRCode.ERROR_CORRECTIONS value).
+            mask (int): Mask pattern reference, 0 to 7.
+
+        Returns:
+            int: Masked format information bits.
+        """
+
+        data = error_correction << 3 | mask
+        return (data << 10 | self._bch_remainder(data, self.FORMAT_GENERATOR, 10)) ^ self.FORMAT_MASK
+
+    def draw_format_information(self, modules: np.ndarray, error_correction: int, mask: int | list[int]) -> None:
+        """Draw both copies of the format information into one or more matrices.
+
+        Args:
+            modules (np.ndarray): Matrix, or stack of matrices along the first axis, to draw into.
+            error_correction (int): Error correction level indicator.
+            mask (int | list[int]): Mask pattern reference, or one per matrix in the stack.
+        """
+
+        size = self.size
+        masks = np.atleast_1d(mask)
+        bits = np.array([self.format_bits(error_correction, int(m)) for m in masks])
+        bit = ((bits[:, None] >> np.arange(15)) & 1).astype(np.uint8)
+        if np.ndim(mask) == 0:
+            bit = bit[0]
+
+        # First copy, around the top-left finder pattern.
+
+        modules[..., [0, 1, 2, 3, 4, 5, 7, 8], 8] = bit[..., 0:8]
+        modules[..., 8, [7, 5, 4, 3, 2, 1, 0]] = bit[..., 8:15]
+
+        # Second copy, split between the other two finder patterns.
+
+        modules[..., 8, [size - 1 - i for i in range(8)]] = bit[..., 0:8]
+        modules[..., [size - 7 + i for i in range(7)], 8] = bit[..., 8:15]
+
+    def place_data(self, codewords: bytes) -> np.ndarray:
+        """Place the final codeword sequence into the data modules, unmasked.
+
+        Remaining modules after the last codeword (remainder bits) are left light.
+
+        Args:
+            codewords (bytes): Interleaved data and error correction codewords.
+
+        Returns:
+            np.ndarray: uint8 matrix of modules, 1 for dark.
+        """
+
+        bits = np.unpackbits(np.frombuffer(codewords, dtype=np.uint8))
+        if len(bits) > len(self.data_indices):
+            raise ValueError("Too many codewords for QR code version")
+
+        modules = self.template.copy()
+        modules.ravel()[self.data_indices[:len(bits)]] = bits
+
+        return modules
+
+    def read_data(self, modules: np.ndarray, mask: int, length: int) -> bytes:
+        """Read the final codeword sequence back out of a finished symbol.
+
+        Args:
+            modules (np.ndarray): Symbol built with the mask pattern, 1 for dark.
+            mask (int): Mask pattern reference, 0 to 7.
+            length (int): Number of codewords to read.
+
+        Returns:
+            bytes: Interleaved data and error correction codewords.
+        """
+
+        bits = (modules ^ self.mask_patterns[mask]).ravel()[self.data_indices[:8 * length]]
+        return np.packbits(bits).tobytes()
+
+    def build(self, modules: np.ndarray, error_correction: int, mask: int) -> np.ndarray:
+        """Build the finished symbol with a given mask pattern.
+
+        Args:
+            modules (np.ndarray): Unmasked symbol from place_data, left unchanged.
+            error_correction (int): Error correction level indicator.
+            mask (int): Mask pattern reference, 0 to 7.
+
+        Returns:
+            np.ndarray: uint8 matrix of modules, 1 for dark.
+        """
+
+        modules = modules ^ self.mask_patterns[mask]
+        self.draw_format_information(modules, error_correction, mask)
+
+        return modules
+
+    def build_all(self, modules: np.ndarray, error_correction: int) -> np.ndarray:
+        """Build the finished symbol under every mask pattern at once.
+
+        Args:
+            modules (np.ndarray): Unmasked symbol from place_data, left unchanged.
+            error_correction (int): Error correction level indicator.
+
+        Returns:
+            np.ndarray: uint8 array of shape (8, size, size), one symbol per mask pattern.
+        """
+
+        stack = modules[None] ^ self.mask_patterns
+        self.draw_format_information(stack, error_correction, list(range(8)))
+
+        return stack
+
+    @classmethod
+    def penalty_scores(cls, stack: np.ndarray) -> np.ndarray:
+        """Score a stack of symbols on the four mask penalty rules.
+
+        N1: 3 + (length - 5) for each row or column run of five or more same-coloured modules.
+        N2: 3 for each 2x2 block of one colour (blocks may overlap).
+        N3: 40 for each 1:1:3:1:1 finder-like pattern with four light modules to one side.
+        N4: 10 for each full 5% step the proportion of dark modules is away from 50%.
+
+        Args:
+            stack (np.ndarray): uint8 array of shape (count, size, size).
+
+        Returns:
+            np.ndarray: Total penalty of each symbol.
+        """
+
+        count, size = stack.shape[0], stack.shape[-1]
+        lines = np.concatenate([stack, stack.transpose(0, 2, 1)], axis=1).astype(np.int8)
+
+        # N1: run lengths of every row and column, with a sentinel at both ends of each line
+        # so that runs never cross from one line into the next.
+
+        padded = np.pad(lines, ((0, 0), (0, 0), (1, 1)), constant_values=2).ravel()
+        boundaries = np.flatnonzero(np.diff(padded)) + 1
+        lengths = np.diff(boundaries)
+        owners = boundaries[:-1] // (2 * size * (size + 2))
+        long_runs = lengths >= 5
+        scores = np.bincount(owners[long_runs], weights=lengths[long_runs] - 2, minlength=count)
+
+        # N2: 2x2 blocks.
+
+        top, bottom = stack[:, :-1], stack[:, 1:]
+        blocks = (top[:, :, :-1] == top[:, :, 1:]) & (top[:, :, :-1] == bottom[:, :, :-1]) & \
+                 (top[:, :, :-1] == bottom[:, :, 1:])
+        scores += 3 * blocks.sum(axis=(1, 2))
+
+        # N3: every 11-module window read as an integer, compared with both finder-like patterns.
+
+        windows = np.lib.stride_tricks.sliding_window_view(lines, 11, axis=2)
+        values = windows.astype(np.int32) @ (1 << np.arange(10, -1, -1, dtype=np.int32))
+        scores += 40 * np.isin(values, cls.FINDER_LIKE_PATTERNS).sum(axis=(1, 2))
+
+        # N4: proportion of dark modules.
+
+        total = size * size
+        dark = stack.sum(axis=(1, 2), dtype=np.int64)
+        scores += 10 * ((np.abs(20 * dark - 10 * total) + total - 1) // total - 1).clip(0)
+
+        return scores.astype(np.int64)
+
+    def choose_mask(self, modules: np.ndarray, error_correction: int) -> tuple[int, np.ndarray]:
+        """Build every masked symbol and pick the one with the lowest penalty.
+
+        Args:
+            modules (np.ndarray): Unmasked symbol from place_data, left unchanged.
+            error_correction (int): Error correction level indicator.
+
+        Returns:
+            int: The chosen mask pattern reference.
+            np.ndarray: The finished symbol using that mask.
+        """
+
+        stack = self.build_all(modules, error_correction)
+        mask = int(np.argmin(self.penalty_scores(stack)))
+
+        return mask, stack[mask]
+
+# QR MATRIX CLASS TESTS #
+
+class TestQRMatrix(unittest.TestCase):
+
+    def test_data_module_counts(self):
+        from QRCode import QRCode
+
+        for version in range(1, 41):
+            matrix = QRMatrix(version, QRCode.ALIGNMENT_POSITIONS[version - 1])
+            codewords = max(QRCode.TOTAL_CODEWORDS[(version, ec.value)]
+                            + QRCode.ERROR_CORRECTION_CODEWORDS[(version, ec.value)]
+                            * sum(QRCode.CODEWORD_BLOCK_GROUP_DISTRIBUTIONS[(version, ec.value)][::2])
+                            for ec in QRCode.ERROR_CORRECTIONS)
+            self.assertEqual(len(matrix.data_indices) // 8, codewords)
+            self.assertEqual(len(np.unique(matrix.data_indices)), len(matrix.data_indices))
+
+    def _reference_penalty(self, modules):
+        size = len(modules)
+        lines = [list(row) for row in modules] + [list(column) for column in zip(*modules)]
+        score = 0
+        for line in lines:
+            run = 1
+            for a, b in zip(line, line[1:] + [None]):
+                if a == b:
+                    run += 1
+                    continue
+                if run >= 5:
+                    score += run - 2
+                run = 1
+            text = "".join(map(str, line))
+            score += 40 * sum(text.startswith(p, i) for i in range(size) for p in ("10111010000", "00001011101"))
+        for r in range(size - 1):
+            for c in range(size - 1):
+                score += 3 * (modules[r][c] == modules[r][c + 1] == modules[r + 1][c] == modules[r + 1][c + 1])
+        percent = 100 * sum(map(sum, modules)) / size ** 2
+        previous = int(percent // 5 * 5)
+        score += 10 * min(abs(previous - 50) // 5, abs(previous + 5 - 50) // 5)
+        return score
+
+    def test_penalty_scores(self):
+        from QRCode import QRCode
+
+        for data, version in (("HELLO WORLD", 1), ("0123456789" * 20, 8)):
+            code = QRCode(data, QRCode.ERROR_CORRECTIONS.M, version)
+            placed = code.matrix.place_data(code.final_codewords)
+            stack = code.matrix.build_all(placed, code.error_correction.value)
+            for mask in range(8):
+                self.assertTrue(np.array_equal(stack[mask], code.matrix.build(placed, 0, mask)))
+            expected = [self._reference_penalty(stack[mask].tolist()) for mask in range(8)]
+            self.assertEqual(QRMatrix.penalty_scores(stack).tolist(), expected)
+            self.assertEqual(code.mask, expected.index(min(expected)))
+
+    def test_format_bits(self):
+        matrix = QRMatrix(1, [])
+        self.assertEqual(matrix.format_bits(1, 4), 0b110011000101111)
+        self.assertEqual(matrix.format_bits(0, 0), 0b101010000010010)
+
+    def test_version_information(self):
+        matrix = QRMatrix(7, [6, 22, 38])
+        bits = int("".join(str(b) for b in matrix.template[:6, matrix.size - 11:matrix.size - 8].ravel()[::-1]), 2)
+        self.assertEqual(bits, 0b000111110010010100)
+
+    def test_hello_world(self):
+        from QRCode import QRCode
+
+        code = QRCode("HELLO WORLD", QRCode.ERROR_CORRECTIONS.Q, mask=6)
+        expected = [
+            "111111100001001111111",
+            "100000101100101000001",
+            "101110100101101011101",
+            "101110101111101011101",
+            "101110101101001011101",
+            "100000100100101000001",
+            "111111101010101111111",
+            "000000001101100000000",
+            "010111101100111011010",
+            "101111010000111101110",
+            "001010110001001100000",
+            "101101000101100011000",
+            "110111111110111011111",
+            "000000001000100101000",
+            "111111100110011001111",
+            "100000101010010010111",
+            "101110101101001000111",
+            "101110101011100010100",
+            "101110100100001000011",
+            "100000101110011100110",
+            "111111100101000000010",
+        ]
+        self.assertEqual(["".join(map(str, row)) for row in code.modules], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,371 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from GaloisField import GaloisField
+from Polynomial import GaloisPolynomial
+
+# REED SOLOMON CLASS #
+
+class ReedSolomon:
+
+    GENERATOR_POLYNOMIALS: dict[tuple[int, int, int, int], bytes] = {}
+    REMAINDER_TABLES: dict[tuple[int, int, int, int], tuple[int, ...]] = {}
+
+    def __init__(self, galois_field: GaloisField):
+        """Initialise a Reed-Solomon codec over a given Galois Field.
+
+        Args:
+            galois_field (GaloisField): Field the codewords belong to.
+        """
+
+        self.galois_field = galois_field
+        self._field_key = (galois_field.prime, galois_field.size, galois_field.generator)
+
+    def generator_polynomial(self, degree: int) -> bytes:
+        """Return the generator polynomial g(x) = (x - α⁰)(x - α¹)...(x - α^(degree-1)).
+
+        Generators are cached per field and degree for the lifetime of the process. A new
+        generator is built on from the largest cached lower-degree one.
+
+        Args:
+            degree (int): Number of error correction codewords.
+
+        Returns:
+            bytes: Monic coefficients, lowest degree first, of length degree + 1.
+        """
+
+        key = self._field_key + (degree,)
+        cached = self.GENERATOR_POLYNOMIALS.get(key)
+        if cached is not None:
+            return cached
+
+        start = max((d for d in range(degree) if self._field_key + (d,) in self.GENERATOR_POLYNOMIALS), default=0)
+        current = list(self.GENERATOR_POLYNOMIALS.get(self._field_key + (start,), b"\x01"))
+
+        mul, exp = self.galois_field.mul, self.galois_field.exp
+
+        for power in range(start, degree):
+            root = exp[power]
+            # Multiply by (x + αⁱ): shift up one degree, then add αⁱ times the old coefficients.
+            shifted = [0] + current
+            for i, coefficient in enumerate(current):
+                shifted[i] ^= mul(coefficient, root)
+            current = shifted
+            self.GENERATOR_POLYNOMIALS[self._field_key + (power + 1,)] = bytes(current)
+
+        return self.GENERATOR_POLYNOMIALS[key]
+
+    def remainder_table(self, degree: int) -> tuple[int, ...]:
+        """Return the feedback table for the shift-register encoder of a given degree.
+
+        Entry f is the generator (without its leading 1, highest degree first) multiplied by
+        the field element f, packed big-endian into a single int so that one XOR updates the
+        whole register.
+
+        Args:
+            degree (int): Number of error correction codewords.
+
+        Returns:
+            tuple[int, ...]: One packed register value per field element.
+        """
+
+        key = self._field_key + (degree,)
+        cached = self.REMAINDER_TABLES.get(key)
+        if cached is not None:
+            return cached
+
+        feedback = self.generator_polynomial(degree)[-2::-1]
+        table = tuple(int.from_bytes(self.galois_field.scale(feedback, factor), "big")
+                      for factor in range(self.galois_field.size))
+
+        self.REMAINDER_TABLES[key] = table
+        return table
+
+    def precompute(self, degrees) -> None:
+        """Build the generator polynomials and encoder tables for several degrees up front.
+
+        Args:
+            degrees (Iterable[int]): Degrees to build, e.g. QRCode.ERROR_CORRECTION_CODEWORDS.values().
+        """
+
+        for degree in sorted(set(degrees)):
+            self.remainder_table(degree)
+
+    def encode(self, data: bytes, degree: int) -> bytes:
+        """Compute the error correction codewords for a block of data codewords.
+
+        This is the systematic encoding remainder of data(x) * x^degree divided by g(x),
+        computed as a linear-feedback shift register held in a single int: each data byte
+        shifts the register up one codeword and XORs in a precomputed feedback row.
+
+        Args:
+            data (bytes): Data codewords of the block, first codeword first.
+            degree (int): Number of error correction codewords.
+
+        Returns:
+            bytes: The degree error correction codewords.
+        """
+
+        table = self.remainder_table(degree)
+        shift = 8 * (degree - 1)
+        mask = (1 << (8 * degree)) - 1
+
+        register = 0
+        for byte in data:
+            register = ((register << 8) & mask) ^ table[byte ^ (register >> shift)]
+
+        return register.to_bytes(degree, "big")
+
+    def syndromes(self, codewords: list[bytes], degree: int) -> np.ndarray:
+        """Compute the syndromes of several codewords (data followed by EC codewords) at once.
+
+        Shorter codewords are padded with leading zeros, which does not change their value,
+        so every block of a QR code is evaluated at α⁰...α^(degree-1) in a single batch.
+
+        Args:
+            codewords (list[bytes]): Received codewords, first codeword first.
+            degree (int): Number of error correction codewords in each.
+
+        Returns:
+            np.ndarray: Syndromes with shape (len(codewords), degree); all zero for a clean codeword.
+        """
+
+        length = max(len(codeword) for codeword in codewords)
+        padded = np.zeros((len(codewords), length), dtype=np.uint8)
+        for row, codeword in zip(padded, codewords):
+            row[length - len(codeword):] = np.frombuffer(codeword, dtype=np.uint8)
+
+        points = np.frombuffer(bytes(self.galois_field.exp[:degree]), dtype=np.uint8)
+        return GaloisPolynomial(padded[:, ::-1], self.galois_field).evaluate(points)
+
+    def _berlekamp_massey(self, syndromes: list[int]) -> list[int]:
+        """Find the error locator polynomial Λ(x) from the syndromes.
+
+        Returns:
+            list[int]: Coefficients of Λ(x), lowest degree first, with Λ(0) = 1.
+        """
+
+        mul, div = self.galois_field.mul, self.galois_field.div
+
+        locator, previous = [1], [1]
+        errors, shift, previous_discrepancy = 0, 1, 1
+
+        for n, syndrome in enumerate(syndromes):
+            discrepancy = syndrome
+            for i in range(1, errors + 1):
+                discrepancy ^= mul(locator[i], syndromes[n - i])
+
+            if discrepancy == 0:
+                shift += 1
+                continue
+
+            scale = div(discrepancy, previous_discrepancy)
+            updated = locator + [0] * max(0, len(previous) + shift - len(locator))
+            for i, coefficient in enumerate(previous):
+                updated[i + shift] ^= mul(scale, coefficient)
+
+            if 2 * errors <= n:
+                previous, previous_discrepancy = locator, discrepancy
+                errors, shift = n + 1 - errors, 1
+            else:
+                shift += 1
+
+            locator = updated
+
+        return locator[:errors + 1]
+
+    def _chien_search(self, locator: list[int], length: int) -> list[int]:
+        """Find the error positions as the roots of Λ(x), evaluated at every α^-p at once.
+
+        Returns:
+            list[int]: Exponents p (0 for the last codeword) of the error locations.
+        """
+
+        order = self.galois_field.order
+        points = np.frombuffer(bytes(self.galois_field.exp[order - p] for p in range(length)), dtype=np.uint8)
+        values = GaloisPolynomial(locator, self.galois_field).evaluate(points)
+
+        return np.flatnonzero(values == 0).tolist()
+
+    def _forney(self, syndromes: list[int], locator: list[int], positions: list[int]) -> list[int]:
+        """Compute the error magnitudes at the given positions.
+
+        Returns:
+            list[int]: Magnitude to XOR into the codeword at each position.
+        """
+
+        mul, div, exp, order = self.galois_field.mul, self.galois_field.div, self.galois_field.exp, self.galois_field.order
+
+        # Ω(x) = S(x)Λ(x) mod x^degree
+        evaluator = [0] * len(syndromes)
+        for i, coefficient in enumerate(locator):
+            for j in range(len(syndromes) - i):
+                evaluator[i + j] ^= mul(coefficient, syndromes[j])
+
+        # Formal derivative of Λ(x): only odd powers survive in characteristic 2.
+        derivative = [coefficient if i % 2 else 0 for i, coefficient in enumerate(locator)][1:]
+
+        magnitudes = []
+        for position in positions:
+            x_inverse = exp[order - position]
+            numerator, denominator = 0, 0
+            for coefficient in reversed(evaluator):
+                numerator = mul(numerator, x_inverse) ^ coefficient
+            for coefficient in reversed(derivative):
+                denominator = mul(denominator, x_inverse) ^ coefficient
+            magnitudes.append(mul(exp[position], div(numerator, denominator)))
+
+        return magnitudes
+
+    def _correct(self, codeword: bytes, syndromes: list[int], degree: int) -> tuple[bytes, int]:
+        """Correct a single codeword with non-zero syndromes.
+
+        Raises:
+            ValueError: If the codeword has more errors than can be corrected.
+        """
+
+        locator = self._berlekamp_massey(syndromes)
+        errors = len(locator) - 1
+        positions = self._chien_search(locator, len(codeword))
+
+        if errors == 0 or 2 * errors > degree or len(positions) != errors:
+            raise ValueError("Too many errors to correct")
+
+        corrected = bytearray(codeword)
+        for position, magnitude in zip(positions, self._forney(syndromes, locator, positions)):
+            corrected[len(codeword) - 1 - position] ^= magnitude
+
+        if self.syndromes([bytes(corrected)], degree).any():
+            raise ValueError("Too many errors to correct")
+
+        return bytes(corrected[:-degree]), errors
+
+    def decode(self, codeword: bytes, degree: int) -> tuple[bytes, int]:
+        """Correct a received codeword and return its data codewords.
+
+        Args:
+            codeword (bytes): Received data codewords followed by EC codewords.
+            degree (int): Number of error correction codewords.
+
+        Returns:
+            bytes: The corrected data codewords.
+            int: The number of codewords that were corrected.
+
+        Raises:
+            ValueError: If the codeword has more errors than can be corrected.
+        """
+
+        return self.decode_blocks([codeword], degree)[0]
+
+    def decode_blocks(self, codewords: list[bytes], degree: int) -> list[tuple[bytes, int]]:
+        """Correct every block of a QR code, computing all syndromes in one batch.
+
+        Clean blocks (the common case when verifying a freshly printed code) skip the
+        Berlekamp-Massey, Chien and Forney stages entirely.
+
+        Args:
+            codewords (list[bytes]): Received blocks, each data codewords followed by EC codewords.
+            degree (int): Number of error correction codewords per block.
+
+        Returns:
+            list[tuple[bytes, int]]: The corrected data codewords and error count of each block.
+
+        Raises:
+            ValueError: If any block has more errors than can be corrected.
+        """
+
+        all_syndromes = self.syndromes(codewords, degree)
+        results = []
+
+        for codeword, syndromes in zip(codewords, all_syndromes):
+            if not syndromes.any():
+                results.append((bytes(codeword[:-degree]), 0))
+            else:
+                results.append(self._correct(codeword, syndromes.tolist(), degree))
+
+        return results
+
+# REED SOLOMON CLASS TESTS #
+
+class TestReedSolomon(unittest.TestCase):
+
+    def setUp(self):
+        self.gf = GaloisField(0x11D, 0x100, 2)
+        self.rs = ReedSolomon(self.gf)
+
+    def test_generator_polynomial(self):
+        generator = self.rs.generator_polynomial(10)
+        self.assertEqual(len(generator), 11)
+        self.assertEqual([self.gf.log[c] for c in generator],
+                         [45, 32, 94, 64, 70, 118, 61, 46, 67, 251, 0])
+
+    def test_generator_polynomial_roots(self):
+        for degree in (7, 13, 30):
+            generator = self.rs.generator_polynomial(degree)
+            for power in range(degree):
+                x, value = self.gf.exp[power], 0
+                for c in reversed(generator):
+                    value = self.gf.mul(value, x) ^ c
+                self.assertEqual(value, 0)
+
+    def test_encode(self):
+        data = bytes([32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236, 17, 236, 17])
+        self.assertEqual(list(self.rs.encode(data, 10)), [196, 35, 39, 119, 235, 215, 231, 226, 93, 23])
+
+        data = bytes([67, 85, 70, 134, 87, 38, 85, 194, 119, 50, 6, 18, 6, 103, 38])
+        self.assertEqual(list(self.rs.encode(data, 18)),
+                         [213, 199, 11, 45, 115, 247, 241, 223, 229, 248, 154, 117, 154, 111, 86, 161, 111, 39])
+
+    def test_encode_codeword_divisible_by_generator(self):
+        data = bytes(range(1, 120, 3))
+        codeword = data + self.rs.encode(data, 30)
+        for power in range(30):
+            x, value = self.gf.exp[power], 0
+            for c in codeword:
+                value = self.gf.mul(value, x) ^ c
+            self.assertEqual(value, 0)
+
+    def test_decode(self):
+        rng = np.random.default_rng(1)
+        for degree, length in ((10, 26), (18, 33), (30, 151)):
+            data = rng.integers(0, 256, length - degree, dtype=np.uint8).tobytes()
+            codeword = data + self.rs.encode(data, degree)
+            self.assertEqual(self.rs.decode(codeword, degree), (data, 0))
+
+            for errors in range(1, degree // 2 + 1):
+                damaged = bytearray(codeword)
+                for position in rng.choice(length, errors, replace=False):
+                    damaged[position] ^= int(rng.integers(1, 256))
+                self.assertEqual(self.rs.decode(bytes(damaged), degree), (data, errors))
+
+    def test_decode_blocks(self):
+        blocks = [bytes(range(i, i + 15 + i % 2)) for i in range(4)]
+        codewords = [block + self.rs.encode(block, 18) for block in blocks]
+        damaged = [bytearray(codeword) for codeword in codewords]
+        damaged[1][3] ^= 0x55
+        damaged[3][-1] ^= 0x01
+
+        syndromes = self.rs.syndromes([bytes(codeword) for codeword in damaged], 18)
+        self.assertEqual(syndromes.any(axis=1).tolist(), [False, True, False, True])
+
+        results = self.rs.decode_blocks([bytes(codeword) for codeword in damaged], 18)
+        self.assertEqual(results, [(block, int(i in (1, 3))) for i, block in enumerate(blocks)])
+
+    def test_decode_too_many_errors(self):
+        data = bytes(range(16))
+        damaged = bytearray(data + self.rs.encode(data, 10))
+        for position in range(0, 12, 2):
+            damaged[position] ^= 0xFF
+        self.assertRaises(ValueError, self.rs.decode, bytes(damaged), 10)
+
+    def test_generator_polynomial_cached(self):
+        self.assertIs(self.rs.generator_polynomial(22), ReedSolomon(self.gf).generator_polynomial(22))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import io
+import os
+import struct
+import unittest
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+# RENDERER CLASS #
+
+class Renderer:
+
+    FORMATS = ("pbm", "png", "svg")
+
+    PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+    def __init__(self, modules: np.ndarray, border: int = 4, scale: int = 1):
+        """Initialise a renderer for a module matrix.
+
+        Args:
+            modules (np.ndarray): Square uint8 matrix of modules, 1 for dark.
+            border (int): Width of the light quiet zone, in modules.
+            scale (int): Pixels per module for raster formats.
+
+        Raises:
+            ValueError: If the border is negative or the scale is not positive.
+        """
+
+        if border < 0 or scale < 1:
+            raise ValueError("Border must be non-negative and scale must be positive")
+
+        self.modules = modules
+        self.border = border
+        self.scale = scale
+
+        self.size = len(modules) + 2 * border
+        self.pixel_size = self.size * scale
+
+    def _rows(self, dark: int = 1) -> Iterator[bytes]:
+        """Yield each pixel row of the image, including the quiet zone, packed 8 pixels per byte.
+
+        Args:
+            dark (int): Bit value to use for dark pixels (1 for PBM, 0 for grayscale PNG).
+
+        Returns:
+            Iterator[bytes]: Packed rows, most significant bit first, each repeated scale times.
+        """
+
+        light_row = np.packbits(np.full(self.pixel_size, 1 - dark, dtype=np.uint8)).tobytes()
+        quiet_zone = self.border * self.scale
+
+        for _ in range(quiet_zone):
+            yield light_row
+
+        pixels = np.full(self.pixel_size, 1 - dark, dtype=np.uint8)
+        for row in self.modules:
+            pixels[quiet_zone:self.pixel_size - quiet_zone] = np.repeat(row if dark else 1 - row, self.scale)
+            packed = np.packbits(pixels).tobytes()
+            for _ in range(self.scale):
+                yield packed
+
+        for _ in range(quiet_zone):
+            yield light_row
+
+    def write_pbm(self, stream: BinaryIO) -> None:
+        """Stream the image to a binary stream as a raw (P4) PBM.
+
+        Args:
+            stream (BinaryIO): File, socket file or buffer to write to.
+        """
+
+        stream.write(b"P4\n%d %d\n" % (self.pixel_size, self.pixel_size))
+        for row in self._rows(dark=1):
+            stream.write(row)
+
+    def _write_png_chunk(self, stream: BinaryIO, chunk_type: bytes, data: bytes) -> None:
+        stream.write(struct.pack(">I", len(data)))
+        stream.write(chunk_type)
+        stream.write(data)
+        stream.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def write_png(self, stream: BinaryIO, chunk_size: int = 1 << 16) -> None:
+        """Stream the image to a binary stream as a 1-bit grayscale PNG, compressed with zlib.
+
+        Rows are compressed as they are produced and flushed in IDAT chunks of about
+        chunk_size bytes, so the whole image is never held in memory.
+
+        Args:
+            stream (BinaryIO): File, socket file or buffer to write to.
+            chunk_size (int): Approximate size of each IDAT chunk.
+        """
+
+        stream.write(self.PNG_SIGNATURE)
+        self._write_png_chunk(stream, b"IHDR", struct.pack(">IIBBBBB", self.pixel_size, self.pixel_size, 1, 0, 0, 0, 0))
+
+        compressor = zlib.compressobj(9)
+        pending = bytearray()
+
+        for row in self._rows(dark=0):
+            pending += compressor.compress(b"\x00" + row)
+            if len(pending) >= chunk_size:
+                self._write_png_chunk(stream, b"IDAT", bytes(pending))
+                pending.clear()
+
+        pending += compressor.flush()
+        self._write_png_chunk(stream, b"IDAT", bytes(pending))
+        self._write_png_chunk(stream, b"IEND", b"")
+
+    def write_svg(self, stream: BinaryIO) -> None:
+        """Stream the image to a binary stream as an SVG in module units.
+
+        Each horizontal run of dark modules is merged into one rectangle, written as a
+        subpath of a single path element, one row at a time.
+
+        Args:
+            stream (BinaryIO): File, socket file or buffer to write to.
+        """
+
+        size = self.size
+        pixels = size * self.scale
+
+        stream.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+        stream.write(b'<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" viewBox="0 0 %d %d" '
+                     b'shape-rendering="crispEdges">' % (pixels, pixels, size, size))
+        stream.write(b'<rect width="100%" height="100%" fill="#fff"/><path fill="#000" d="')
+
+        for y, row in enumerate(self.modules, self.border):
+            edges = np.flatnonzero(np.diff(row, prepend=0, append=0))
+            if len(edges):
+                starts, ends = edges[::2] + self.border, edges[1::2] + self.border
+                stream.write("".join(f"M{x} {y}h{w}v1h-{w}z" for x, w in zip(starts.tolist(), (ends - starts).tolist()))
+                             .encode("ascii"))
+
+        stream.write(b'"/></svg>\n')
+
+    def write(self, stream: BinaryIO, file_format: str) -> None:
+        """Stream the image to a binary stream in a given format.
+
+        Args:
+            stream (BinaryIO): File, socket file or buffer to write to.
+            file_format (str): One of "pbm", "png" or "svg".
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+
+        match file_format.lower():
+            case "pbm":
+                self.write_pbm(stream)
+            case "png":
+                self.write_png(stream)
+            case "svg":
+                self.write_svg(stream)
+            case _:
+                raise ValueError(f"Unsupported format {file_format!r}, expected one of {', '.join(self.FORMATS)}")
+
+    def render(self, file_format: str) -> bytes:
+        """Render the image to bytes in a given format.
+
+        Returns:
+            bytes: The encoded image.
+        """
+
+        stream = io.BytesIO()
+        self.write(stream, file_format)
+        return stream.getvalue()
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Save the image to a file, choosing the format from its extension.
+
+        Raises:
+            ValueError: If the extension is not a supported format.
+        """
+
+        file_format = Path(path).suffix.lstrip(".")
+        if file_format.lower() not in self.FORMATS:
+            raise ValueError(f"Unsupported format {file_format!r}, expected one of {', '.join(self.FORMATS)}")
+
+        with open(path, "wb") as stream:
+            self.write(stream, file_format)
+
+# RENDERER CLASS TESTS #
+
+class TestRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.modules = np.array([[1, 1, 0], [0, 1, 0], [1, 0, 1]], dtype=np.uint8)
+
+    def _png_pixels(self, data: bytes) -> np.ndarray:
+        self.assertEqual(data[:8], Renderer.PNG_SIGNATURE)
+        position, idat = 8, b""
+        while position < len(data):
+            length, chunk_type = struct.unpack(">I4s", data[position:position + 8])
+            chunk = data[position + 8:position + 8 + length]
+            self.assertEqual(struct.unpack(">I", data[position + 8 + length:position + 12 + length])[0],
+                             zlib.crc32(chunk_type + chunk))
+            if chunk_type == b"IHDR":
+                width = struct.unpack(">I", chunk[:4])[0]
+            elif chunk_type == b"IDAT":
+                idat += chunk
+            position += 12 + length
+        raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(width, -1)
+        self.assertFalse(raw[:, 0].any())
+        return np.unpackbits(raw[:, 1:], axis=1)[:, :width]
+
+    def test_pbm(self):
+        data = Renderer(self.modules, border=1, scale=2).render("pbm")
+        header = b"P4\n10 10\n"
+        self.assertTrue(data.startswith(header))
+        rows = np.unpackbits(np.frombuffer(data[len(header):], dtype=np.uint8).reshape(10, 2), axis=1)[:, :10]
+        expected = np.pad(self.modules, 1).repeat(2, axis=0).repeat(2, axis=1)
+        self.assertTrue(np.array_equal(rows, expected))
+
+    def test_png(self):
+        pixels = self._png_pixels(Renderer(self.modules, border=2, scale=3).render("png"))
+        expected = 1 - np.pad(self.modules, 2).repeat(3, axis=0).repeat(3, axis=1)
+        self.assertTrue(np.array_equal(pixels, expected))
+
+    def test_png_multiple_chunks(self):
+        modules = np.random.default_rng(0).integers(0, 2, (1024, 1024), dtype=np.uint8)
+        stream = io.BytesIO()
+        Renderer(modules).write_png(stream, chunk_size=1024)
+        self.assertGreater(stream.getvalue().count(b"IDAT"), 1)
+        expected = 1 - np.pad(modules, 4)
+        self.assertTrue(np.array_equal(self._png_pixels(stream.getvalue()), expected))
+
+    def test_svg_merges_runs(self):
+        svg = Renderer(self.modules, border=1).render("svg").decode("ascii")
+        self.assertIn('viewBox="0 0 5 5"', svg)
+        self.assertIn('d="M1 1h2v1h-2zM2 2h1v1h-1zM1 3h1v1h-1zM3 3h1v1h-1z"', svg)
+
+    def test_unsupported_format(self):
+        self.assertRaises(ValueError, Renderer(self.modules).render, "gif")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+# IMPORTS #
+
+from __future__ import annotations
+
+import csv
+import os
+import struct
+import tempfile
+import unittest
+from functools import cache
+
+import numpy as np
+
+# SPECIFICATION TABLES CLASS #
+
+class SpecificationTables:
+
+    VERSIONS = 40
+
+    # Format information value of each error correction level, in the order of the specification
+    ERROR_CORRECTION_LEVELS = {"L": 1, "M": 0, "Q": 3, "H": 2}
+
+    # Column offset of each mode value within the capacity columns
+    MODE_INDICES = {1: 0, 2: 1, 4: 2, 8: 3}
+
+    CHARACTER_COUNT_INDICATORS = [
+        (1, 9, [10, 9, 8, 8]),
+        (10, 26, [12, 11, 16, 10]),
+        (27, 40, [14, 13, 16, 12]),
+    ]
+
+    COLUMNS = ("data_codewords", "error_correction_codewords", "group_1_blocks", "group_1_data_codewords",
+               "group_2_blocks", "group_2_data_codewords", "numeric_capacity", "alphanumeric_capacity",
+               "byte_capacity", "kanji_capacity")
+
+    SHAPE = (VERSIONS + 1, 4, len(COLUMNS))
+    DTYPE = np.dtype("<u2")
+
+    SIDECAR_MAGIC = b"QRSPEC01"
+    SIDECAR_HEADER = struct.Struct("<8sqq")
+
+    CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "qr.csv")
+    SIDECAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__", "qr.spec.bin")
+
+    def __init__(self, table: np.ndarray):
+        """Initialise the specification tables from a compiled table.
+
+        The table is indexed by version (row 0 unused), error correction value and column. It is
+        unpacked once into plain dicts keyed by (version, error correction) or, for capacities,
+        (version, error correction, mode), using the values of QRCode.ERROR_CORRECTIONS and
+        QRCode.MODES, in the order of the specification.
+
+        Args:
+            table (np.ndarray): Read-only uint16 array of shape SHAPE.
+        """
+
+        self.table = table
+
+        self.capacities: dict[tuple[int, int, int], int] = {}
+        self.total_codewords: dict[tuple[int, int], int] = {}
+        self.codeword_block_group_distributions: dict[tuple[int, int], list[int]] = {}
+        self.error_correction_codewords: dict[tuple[int, int], int] = {}
+
+        rows = table.tolist()
+        for version in range(1, self.VERSIONS + 1):
+            for error_correction in self.ERROR_CORRECTION_LEVELS.values():
+                row = rows[version][error_correction]
+                key = (version, error_correction)
+                for mode, mode_index in self.MODE_INDICES.items():
+                    self.capacities[(*key, mode)] = row[6 + mode_index]
+                self.total_codewords[key] = row[0]
+                self.codeword_block_group_distributions[key] = row[2:6]
+                self.error_correction_codewords[key] = row[1]
+
+    @classmethod
+    def _character_capacity(cls, mode_index: int, bits: int) -> int:
+        """Return the most characters of a mode that fit in a number of bits after the mode indicator
+        and character count indicator."""
+
+        match mode_index:
+            case 0:
+                return 3 * (bits // 10) + (2 if bits % 10 >= 7 else 1 if bits % 10 >= 4 else 0)
+            case 1:
+                return 2 * (bits // 11) + (bits % 11 >= 6)
+            case 2:
+                return bits // 8
+            case _:
+                return bits // 13
+
+    @classmethod
+    def compile(cls, path: str | os.PathLike) -> np.ndarray:
+        """Compile the specification CSV into a flat table, deriving the character capacities.
+
+        Args:
+            path: The CSV file, one row per version and error correction level
+
+        Returns:
+            np.ndarray: uint16 array of shape SHAPE.
+
+        Raises:
+            ValueError: If a row is malformed, inconsistent or missing.
+        """
+
+        table = np.zeros(cls.SHAPE, dtype=cls.DTYPE)
+        seen = set()
+
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            rows = csv.reader(file)
+            next(rows, None)
+
+            for row in rows:
+                if not row:
+                    continue
+
+                try:
+                    version, level = row[0].split("-")
+                    version, error_correction = int(version), cls.ERROR_CORRECTION_LEVELS[level]
+                    data_codewords, error_correction_codewords, *groups = (int(cell or 0) for cell in row[1:7])
+                except (ValueError, KeyError):
+                    raise ValueError(f"Malformed specification row {row!r}") from None
+
+                if not 1 <= version <= cls.VERSIONS or groups[0] * groups[1] + groups[2] * groups[3] != data_codewords:
+                    raise ValueError(f"Inconsistent specification row {row!r}")
+
+                table[version, error_correction, :6] = (data_codewords, error_correction_codewords, *groups)
+                seen.add((version, error_correction))
+
+        if len(seen) != cls.VERSIONS * 4:
+            raise ValueError("Specification is missing versions or error correction levels")
+
+        for first, last, lengths in cls.CHARACTER_COUNT_INDICATORS:
+            for version in range(first, last + 1):
+                for error_correction in range(4):
+                    bits = 8 * int(table[version, error_correction, 0]) - 4
+                    for mode_index, length in enumerate(lengths):
+                        table[version, error_correction, 6 + mode_index] = min(
+                            cls._character_capacity(mode_index, bits - length), (1 << length) - 1)
+
+        table.flags.writeable = False
+        return table
+
+    @classmethod
+    def load(cls, path: str | os.PathLike = CSV_PATH,
+             sidecar_path: str | os.PathLike | None = SIDECAR_PATH) -> SpecificationTables:
+        """Load the specification tables, from the cached sidecar file if it is up to date.
+
+        The sidecar records the modification time and size of the CSV it was compiled from and
+        is recompiled whenever they change. If it cannot be written the tables are kept in memory.
+
+        Args:
+            path: The specification CSV
+            sidecar_path: Where to cache the compiled tables (optional, never cached if not given)
+
+        Returns:
+            SpecificationTables: The tables.
+        """
+
+        status = os.stat(path)
+        header = cls.SIDECAR_HEADER.pack(cls.SIDECAR_MAGIC, status.st_mtime_ns, status.st_size)
+
+        if sidecar_path is not None:
+            try:
+                with open(sidecar_path, "rb") as file:
+                    data = file.read()
+                table = np.frombuffer(data, dtype=cls.DTYPE, offset=len(header))
+                if data.startswith(header) and table.size == np.prod(cls.SHAPE):
+                    return cls(table.reshape(cls.SHAPE))
+            except (OSError, ValueError):
+                pass
+
+        table = cls.compile(path)
+
+        if sidecar_path is not None:
+            try:
+                os.makedirs(os.path.dirname(sidecar_path), exist_ok=True)
+                descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(sidecar_path))
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(header)
+                    file.write(table.tobytes())
+                os.replace(temporary_path, sidecar_path)
+            except OSError:
+                pass
+
+        return cls(table)
+
+    @classmethod
+    @cache
+    def shared(cls) -> SpecificationTables:
+        """Return the tables of the bundled specification, loaded once per process."""
+
+        return cls.load()
+
+# SPECIFICATION TABLES CLASS TESTS #
+
+class TestSpecificationTables(unittest.TestCase):
+
+    def test_tables(self):
+        tables = SpecificationTables.load(sidecar_path=None)
+        self.assertEqual(tables.total_codewords[(1, 1)], 19)
+        self.assertEqual(tables.error_correction_codewords[(40, 2)], 30)
+        self.assertEqual(tables.codeword_block_group_distributions[(40, 0)], [18, 47, 31, 48])
+        self.assertEqual(tables.capacities[(1, 1, 1)], 41)
+        self.assertEqual(tables.capacities[(40, 1, 1)], 7089)
+        self.assertEqual(tables.capacities[(40, 2, 8)], 784)
+
+        self.assertEqual(list(tables.capacities)[:5], [(1, 1, 1), (1, 1, 2), (1, 1, 4), (1, 1, 8), (1, 0, 1)])
+        self.assertEqual((len(tables.total_codewords), len(tables.capacities)), (160, 640))
+        for key in ((0, 1), (41, 1), (1, 4), (1, -1), (1.5, 1), (1,), "1-L"):
+            self.assertNotIn(key, tables.total_codewords)
+        self.assertNotIn((1, 1, 3), tables.capacities)
+        self.assertRaises(ValueError, tables.table.__setitem__, (1, 1, 0), 0)
+
+    def test_sidecar(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "qr.csv")
+            sidecar_path = os.path.join(directory, "cache", "qr.spec.bin")
+            with open(SpecificationTables.CSV_PATH, "rb") as source, open(path, "wb") as copy:
+                copy.write(source.read())
+
+            compiled = SpecificationTables.load(path, sidecar_path)
+            self.assertTrue(os.path.exists(sidecar_path))
+            loaded = SpecificationTables.load(path, sidecar_path)
+            self.assertTrue(np.array_equal(loaded.table, compiled.table))
+            self.assertFalse(loaded.table.flags.writeable)
+
+            with open(path, "r+", encoding="utf-8-sig") as file:
+                text = file.read().replace("1-L,19,7,1,19,,,19", "1-L,20,7,1,20,,,20")
+                file.seek(0)
+                file.write(text)
+            os.utime(path, ns=(os.stat(sidecar_path).st_mtime_ns + 1,) * 2)
+            self.assertEqual(SpecificationTables.load(path, sidecar_path).total_codewords[(1, 1)], 20)
+
+    def test_inconsistent_row(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "qr.csv")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("header\n1-L,19,7,1,18,,,19\n")
+            self.assertRaises(ValueError, SpecificationTables.compile, path)
+
+
+if __name__ == '__main__':
+    unittest.main()
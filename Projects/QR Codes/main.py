@@ -1,6 +1,7 @@
 
 # IMPORT MODULES #
 
+import json
 import sys
 
 from QRCode import QRCode
@@ -12,7 +13,36 @@ if __name__ == "__main__":
     match function:
         case "create":
             args = sys.argv[2] if len(sys.argv) > 2 else None
-            QRCode(args)
+            output = sys.argv[3] if len(sys.argv) > 3 else None
+            qr_code = QRCode(args)
+            if output is None:
+                sys.stdout.buffer.write(qr_code.render("svg"))
+            else:
+                qr_code.save(output)
+        case "batch":
+            path = sys.argv[2] if len(sys.argv) > 2 else None
+            output = sys.argv[3] if len(sys.argv) > 3 else "labels"
+            file_format = sys.argv[4] if len(sys.argv) > 4 else "svg"
+            if path is None:
+                raise RuntimeError("A CSV or newline separated file of payloads must be given.")
+            from Batch import BatchEncoder
+            for index, result in BatchEncoder(errors="return").render_file(path, output, file_format):
+                if isinstance(result, ValueError):
+                    print(f"Payload {index + 1}: {result}", file=sys.stderr)
+                else:
+                    print(result)
+        case "benchmark":
+            output = sys.argv[2] if len(sys.argv) > 2 else "benchmark.json"
+            from Benchmark import Benchmark
+            Benchmark().write(output)
+        case "compare":
+            if len(sys.argv) < 4:
+                raise RuntimeError("A baseline and a current benchmark JSON file must be given.")
+            from Benchmark import Benchmark
+            with open(sys.argv[2], encoding="utf-8") as baseline, open(sys.argv[3], encoding="utf-8") as current:
+                ratios = Benchmark.compare(json.load(baseline), json.load(current))
+            for stage, ratio in ratios.items():
+                print(f"{stage}: {ratio:.3f}x")
         case "test":
             #numericalTest = QRCode("8675309")
             alphanumericalTest = QRCode("HELLO WORLD", QRCode.ERROR_CORRECTIONS.M)